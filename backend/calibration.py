@@ -1,6 +1,7 @@
 import json
+import time
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 import numpy as np
 
@@ -10,6 +11,10 @@ except Exception:
 	cv2 = None
 
 CALIB_FILE = Path(__file__).resolve().parent / "calibration.json"
+# Calibração intrínseca (lente) fica ao lado da homografia
+LENS_FILE = CALIB_FILE.with_name("lens.json")
+LENS_FRAMES_DIR = CALIB_FILE.with_name("lens_frames")
+LENS_MODES = ("points", "remap")
 
 
 def compute_homography(camera_points: List[Tuple[float, float]]) -> Optional[np.ndarray]:
@@ -29,14 +34,226 @@ def compute_homography(camera_points: List[Tuple[float, float]]) -> Optional[np.
 def apply_homography(H: np.ndarray, x: float, y: float) -> Tuple[float, float]:
 	"""
 	Aplica H em (x,y) da câmera para coordenadas normalizadas do projetor.
+	Para vários pontos, use `apply_homography_points`.
 	"""
-	pt = np.array([x, y, 1.0], dtype=np.float64)
-	w = H @ pt
-	if w[2] == 0:
+	h = H.tolist() if isinstance(H, np.ndarray) else H
+	w = h[2][0] * x + h[2][1] * y + h[2][2]
+	if w == 0:
 		return (0.0, 0.0)
-	u = float(w[0] / w[2])
-	v = float(w[1] / w[2])
-	return (u, v)
+	u = (h[0][0] * x + h[0][1] * y + h[0][2]) / w
+	v = (h[1][0] * x + h[1][1] * y + h[1][2]) / w
+	return (float(u), float(v))
+
+
+def apply_homography_points(H: np.ndarray, points: np.ndarray) -> np.ndarray:
+	"""
+	Versão vetorizada de `apply_homography`: mapeia N pontos (N x 2, pixels
+	da câmera) numa única multiplicação. Pontos com w == 0 viram (0, 0).
+	"""
+	pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+	proj = pts @ H[:, :2].T + H[:, 2]
+	w = proj[:, 2:3]
+	ok = w != 0
+	return np.where(ok, proj[:, :2] / np.where(ok, w, 1.0), 0.0)
+
+
+def apply_homography_boxes(H: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+	"""
+	Mapeia N caixas (N x 4: x1, y1, x2, y2 em pixels da câmera) para
+	quadriláteros no projetor (N x 4 x 2), cantos na ordem
+	topo-esquerda, topo-direita, base-direita, base-esquerda.
+	"""
+	b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+	corners = np.stack([
+		b[:, [0, 1]], b[:, [2, 1]], b[:, [2, 3]], b[:, [0, 3]],
+	], axis=1)
+	return apply_homography_points(H, corners.reshape(-1, 2)).reshape(-1, 4, 2)
+
+
+def projector_roi(
+	H: np.ndarray, frame_w: int, frame_h: int, margin: float = 0.02, lens: Optional["LensModel"] = None,
+) -> Optional[Tuple[int, int, int, int]]:
+	"""
+	Retângulo (x1, y1, x2, y2) em pixels da câmera que cobre a área projetada.
+	Mapeia os cantos do projetor (0..1, expandidos por `margin`) pela homografia
+	inversa e retorna a caixa envolvente limitada ao frame, ou None se degenerada.
+	Com `lens` (modo "points"), a borda é amostrada e levada de volta à imagem
+	distorcida, onde os lados deixam de ser retos.
+	"""
+	try:
+		Hinv = np.linalg.inv(H)
+	except np.linalg.LinAlgError:
+		return None
+	lo, hi = -margin, 1.0 + margin
+	if lens is None:
+		border = np.array([[lo, lo], [hi, lo], [hi, hi], [lo, hi]], dtype=np.float64)
+	else:
+		t = np.linspace(lo, hi, 9)
+		border = np.concatenate([
+			np.stack([t, np.full_like(t, lo)], 1), np.stack([t, np.full_like(t, hi)], 1),
+			np.stack([np.full_like(t, lo), t], 1), np.stack([np.full_like(t, hi), t], 1),
+		])
+	xy = apply_homography_points(Hinv, border)
+	if lens is not None:
+		xy = lens.distort_points(xy, frame_w, frame_h)
+	if not np.all(np.isfinite(xy)):
+		return None
+	x1 = int(max(0, np.floor(xy[:, 0].min())))
+	y1 = int(max(0, np.floor(xy[:, 1].min())))
+	x2 = int(min(frame_w, np.ceil(xy[:, 0].max())))
+	y2 = int(min(frame_h, np.ceil(xy[:, 1].max())))
+	if x2 - x1 < 16 or y2 - y1 < 16:
+		return None
+	return (x1, y1, x2, y2)
+
+
+class LensModel:
+	"""
+	Modelo intrínseco da câmera (matriz K e coeficientes de distorção) obtido
+	com `calibrate_lens`. Dois modos de uso:
+	- "remap": a FrameSource corrige cada frame com um único cv2.remap, com os
+	  mapas de initUndistortRectifyMap calculados uma vez por resolução;
+	- "points": nada por frame; só os pontos (pontas de dedo, cantos das caixas)
+	  são corrigidos com cv2.undistortPoints antes da homografia.
+	Se o frame tiver outra resolução que a da calibração, K é escalada.
+	"""
+	def __init__(self, K: np.ndarray, dist: np.ndarray, size: Tuple[int, int], mode: str = "points", rms: Optional[float] = None) -> None:
+		self.K = np.asarray(K, dtype=np.float64).reshape(3, 3)
+		self.dist = np.asarray(dist, dtype=np.float64).reshape(-1)
+		self.size = (int(size[0]), int(size[1]))
+		self.mode = mode if mode in LENS_MODES else "points"
+		self.rms = rms
+		self._maps: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+	def _K_for(self, w: int, h: int) -> np.ndarray:
+		if (w, h) == self.size:
+			return self.K
+		sx, sy = w / self.size[0], h / self.size[1]
+		K = self.K.copy()
+		K[0, 0] *= sx
+		K[0, 2] *= sx
+		K[1, 1] *= sy
+		K[1, 2] *= sy
+		return K
+
+	def maps(self, w: int, h: int) -> Tuple[np.ndarray, np.ndarray]:
+		"""Mapas de remap (formato CV_16SC2, o mais rápido) para a resolução, em cache."""
+		cached = self._maps.get((w, h))
+		if cached is None:
+			K = self._K_for(w, h)
+			cached = cv2.initUndistortRectifyMap(K, self.dist, None, K, (w, h), cv2.CV_16SC2)
+			self._maps[(w, h)] = cached
+		return cached
+
+	def remap(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+		h, w = frame.shape[:2]
+		map1, map2 = self.maps(w, h)
+		if dst is None:
+			return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+		return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR, dst=dst)
+
+	def undistort_points(self, points: np.ndarray, w: int, h: int) -> np.ndarray:
+		"""Pixels da imagem distorcida -> pixels da imagem corrigida (N x 2)."""
+		pts = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+		if pts.shape[0] == 0:
+			return pts.reshape(-1, 2)
+		K = self._K_for(w, h)
+		return cv2.undistortPoints(pts, K, self.dist, P=K).reshape(-1, 2)
+
+	def distort_points(self, points: np.ndarray, w: int, h: int) -> np.ndarray:
+		"""Inverso de `undistort_points`: pixels corrigidos -> pixels distorcidos."""
+		pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		if pts.shape[0] == 0:
+			return pts
+		K = self._K_for(w, h)
+		rays = np.column_stack([(pts - K[:2, 2]) / (K[0, 0], K[1, 1]), np.ones(len(pts))])
+		out, _ = cv2.projectPoints(rays.reshape(-1, 1, 3), np.zeros(3), np.zeros(3), K, self.dist)
+		return out.reshape(-1, 2)
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"K": self.K.tolist(), "dist": self.dist.tolist(), "size": list(self.size), "mode": self.mode, "rms": self.rms}
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> "LensModel":
+		return cls(data["K"], data["dist"], tuple(data["size"]), data.get("mode", "points"), data.get("rms"))
+
+
+def find_chessboard(frame: np.ndarray, pattern: Tuple[int, int] = (9, 6)) -> Optional[np.ndarray]:
+	"""Cantos internos do tabuleiro (refinados a subpixel) ou None."""
+	if cv2 is None:
+		return None
+	gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+	flags = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE
+	found, corners = cv2.findChessboardCorners(gray, pattern, flags=flags)
+	if not found:
+		return None
+	criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 1e-3)
+	return cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+
+
+def calibrate_lens(frames: List[np.ndarray], pattern: Tuple[int, int] = (9, 6), mode: str = "points", min_views: int = 5) -> Optional[LensModel]:
+	"""
+	Calibração intrínseca por tabuleiro de xadrez (`pattern` = cantos internos
+	colunas x linhas) em frames salvos. Precisa de ao menos `min_views` frames
+	com o tabuleiro encontrado, de preferência em posições e inclinações variadas.
+	"""
+	if cv2 is None or not frames:
+		return None
+	obj = np.zeros((pattern[0] * pattern[1], 3), np.float32)
+	obj[:, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2)
+	object_points, image_points = [], []
+	h, w = frames[0].shape[:2]
+	for frame in frames:
+		if frame.shape[:2] != (h, w):
+			continue
+		corners = find_chessboard(frame, pattern)
+		if corners is not None:
+			object_points.append(obj)
+			image_points.append(corners)
+	if len(image_points) < min_views:
+		return None
+	rms, K, dist, _, _ = cv2.calibrateCamera(object_points, image_points, (w, h), None, None)
+	return LensModel(K, dist, (w, h), mode, float(rms))
+
+
+def load_lens_frames(directory: Path = LENS_FRAMES_DIR) -> List[np.ndarray]:
+	if cv2 is None or not directory.exists():
+		return []
+	frames = []
+	for p in sorted(directory.iterdir()):
+		if p.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp"):
+			img = cv2.imread(str(p))
+			if img is not None:
+				frames.append(img)
+	return frames
+
+
+def save_lens_view(frame: np.ndarray, pattern: Tuple[int, int] = (9, 6), directory: Path = LENS_FRAMES_DIR) -> Optional[str]:
+	"""Salva o frame em `directory` se o tabuleiro for encontrado. Retorna o nome do arquivo ou None."""
+	if find_chessboard(frame, pattern) is None:
+		return None
+	directory.mkdir(parents=True, exist_ok=True)
+	path = directory / f"view_{int(time.time() * 1000)}.png"
+	cv2.imwrite(str(path), frame)
+	return path.name
+
+
+def save_lens(lens: LensModel) -> None:
+	LENS_FILE.write_text(json.dumps(lens.to_dict()))
+
+
+def load_lens() -> Optional[LensModel]:
+	if cv2 is None or not LENS_FILE.exists():
+		return None
+	try:
+		return LensModel.from_dict(json.loads(LENS_FILE.read_text()))
+	except Exception:
+		return None
+
+
+def clear_lens() -> None:
+	if LENS_FILE.exists():
+		LENS_FILE.unlink()
 
 
 def save_homography(H: np.ndarray) -> None:
@@ -0,0 +1,350 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from .gestures import GESTURE_KINDS
+from .latency import get_latency_monitor
+from .wire import EncodedMessage, available_encoding
+
+# Tipos das mensagens de toque: contatos do TouchEngine ("touch") e gestos
+# (o "type" de um gesto é o próprio kind, ver GestureEvent.to_message)
+TOUCH_TYPES = ("touch",) + GESTURE_KINDS
+# Tipos de mensagem que nunca são descartados por cliente lento (nem pelo
+# barramento entre processos, ver backend/event_bus.py): toques e avisos de estado
+LOSSLESS_TYPES = TOUCH_TYPES + ("scanner", "data")
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+# Tópicos de assinatura do /ws e os tipos de mensagem de cada um
+TOPICS = {
+	"tap": TOUCH_TYPES,
+	"detections": ("detections",),
+	"scanner": ("scanner",),
+	"data": ("data",),
+}
+_TYPE_TOPIC = {t: topic for topic, types in TOPICS.items() for t in types}
+# Tópicos guardados no log para reenvio na reconexão (detecções velhas não interessam)
+REPLAY_TOPICS = ("tap", "scanner", "data")
+
+
+def topic_for(message: dict) -> Optional[str]:
+	"""Tópico da mensagem; None para mensagens de controle, entregues a todos."""
+	return _TYPE_TOPIC.get(message.get("type"))
+
+
+class ClientConnection:
+	"""
+	Um WebSocket com fila de envio limitada e uma task escritora própria:
+	um cliente lento só atrasa (e perde) as próprias mensagens.
+	"""
+	def __init__(self, websocket: WebSocket, manager: "ConnectionManager", encoding: str = "json") -> None:
+		self.websocket = websocket
+		self._manager = manager
+		# "json", "msgpack" ou "packed" (ver backend/wire.py), negociada no connect
+		self.encoding = encoding
+		self._queue: Deque[EncodedMessage] = deque()
+		self._wakeup = asyncio.Event()
+		self._task: Optional[asyncio.Task] = None
+		self.sent = 0
+		self.dropped = 0
+		# Descartes desde o último envio bem-sucedido (critério de cliente lento)
+		self.drops_since_send = 0
+		self.closed = False
+		# Tópicos assinados (None = todos, para clientes que nunca enviam "subscribe")
+		self.topics: Optional[frozenset] = None
+		# Limite de taxa por tópico: intervalo mínimo, próximo envio permitido e a
+		# mensagem mais recente retida enquanto espera (a última sempre chega)
+		self._intervals: Dict[str, float] = {}
+		self._next_allowed: Dict[str, float] = {}
+		self._pending: Dict[str, EncodedMessage] = {}
+		self.rate_limited = 0
+
+	@property
+	def depth(self) -> int:
+		return len(self._queue)
+
+	def start(self) -> None:
+		self._task = asyncio.create_task(self._writer())
+
+	def subscribe(self, topics: Optional[List[str]], rates: Optional[Dict[str, float]] = None) -> List[str]:
+		"""
+		Define os tópicos deste cliente (None ou lista vazia = todos) e limites
+		opcionais em mensagens por segundo, ex.: {"detections": 10}. O tópico
+		"tap" nunca é limitado. Retorna os tópicos efetivos.
+		"""
+		valid = [t for t in (topics or []) if t in TOPICS]
+		self.topics = frozenset(valid) if valid else None
+		self._intervals = {}
+		for topic, hz in (rates or {}).items():
+			try:
+				hz = float(hz)
+			except (TypeError, ValueError):
+				continue
+			if topic in TOPICS and topic != "tap" and hz > 0:
+				self._intervals[topic] = 1.0 / hz
+		self._pending.clear()
+		return sorted(self.topics) if self.topics is not None else sorted(TOPICS)
+
+	def wants(self, item: EncodedMessage) -> bool:
+		return item.topic is None or self.topics is None or item.topic in self.topics
+
+	def offer(self, item: EncodedMessage) -> bool:
+		"""
+		Aplica o limite de taxa do tópico e enfileira. Acima da taxa, guarda só a
+		mensagem mais recente e a envia quando o intervalo vencer.
+		"""
+		interval = self._intervals.get(item.topic) if item.topic is not None and not item.lossless else None
+		if interval:
+			loop = asyncio.get_running_loop()
+			now = loop.time()
+			allowed = self._next_allowed.get(item.topic, 0.0)
+			if now < allowed:
+				if item.topic not in self._pending:
+					loop.call_later(allowed - now, self._flush_pending, item.topic)
+				else:
+					self.rate_limited += 1
+				self._pending[item.topic] = item
+				return self.drops_since_send < self._manager.slow_drop_limit
+			self._next_allowed[item.topic] = now + interval
+		return self.enqueue(item)
+
+	def _flush_pending(self, topic: str) -> None:
+		item = self._pending.pop(topic, None)
+		if item is None or self.closed:
+			return
+		interval = self._intervals.get(topic)
+		if interval:
+			self._next_allowed[topic] = asyncio.get_running_loop().time() + interval
+		self.enqueue(item)
+
+	def enqueue(self, item: EncodedMessage) -> bool:
+		"""
+		Enfileira sem bloquear. Com a fila cheia aplica a política do gerenciador;
+		retorna False se o cliente passou do limite e deve ser desconectado.
+		"""
+		m = self._manager
+		queue = self._queue
+		lossless = item.lossless
+		if len(queue) >= m.max_queue and not (m.overflow == "drop_oldest" and self._drop_oldest_lossy()):
+			if not lossless:
+				self._count_drop()
+				return self.drops_since_send < m.slow_drop_limit
+			if len(queue) >= m.max_queue * m.lossless_factor:
+				# Nem toques cabem mais: o cliente não está lendo
+				return False
+		queue.append(item)
+		self._wakeup.set()
+		return self.drops_since_send < m.slow_drop_limit
+
+	def _drop_oldest_lossy(self) -> bool:
+		for i, queued in enumerate(self._queue):
+			if not queued.lossless:
+				del self._queue[i]
+				self._count_drop()
+				return True
+		return False
+
+	def _count_drop(self) -> None:
+		self.dropped += 1
+		self.drops_since_send += 1
+		self._manager.dropped += 1
+
+	async def _writer(self) -> None:
+		monitor = get_latency_monitor()
+		ws = self.websocket
+		try:
+			while True:
+				if not self._queue:
+					self._wakeup.clear()
+					await self._wakeup.wait()
+					continue
+				payload = self._queue.popleft().payload(self.encoding)
+				t_send = time.monotonic()
+				if isinstance(payload, bytes):
+					await ws.send_bytes(payload)
+				else:
+					await ws.send_text(payload)
+				monitor.record("ws.send", time.monotonic() - t_send)
+				self.sent += 1
+				self.drops_since_send = 0
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			# Conexão quebrada: sai do broadcast
+			self._manager._remove(self)
+
+	async def close(self, code: int = 1000) -> None:
+		self.closed = True
+		task = self._task
+		if task is not None and task is not asyncio.current_task():
+			task.cancel()
+		try:
+			await self.websocket.close(code=code)
+		except Exception:
+			pass
+
+
+class ConnectionManager:
+	"""
+	Gerencia conexões WebSocket e broadcast de mensagens.
+	Cada cliente recebe só os tópicos que assinou (ver `TOPICS`).
+	Cada mensagem é codificada uma única vez por codificação em uso e os
+	mesmos bytes vão para todos os clientes. O broadcast só enfileira (não espera nenhum socket); cada conexão tem uma
+	task escritora e uma fila de até `max_queue` mensagens. Com a fila cheia,
+	a política `overflow` descarta a detecção mais antiga ("drop_oldest") ou a
+	nova ("drop_newest"); mensagens de `lossless_types` (toques) nunca são
+	descartadas, mas um cliente com `lossless_factor` vezes a fila cheia ou
+	`slow_drop_limit` descartes seguidos sem conseguir enviar é desconectado.
+	"""
+	def __init__(
+		self,
+		max_queue: int = 64,
+		overflow: str = "drop_oldest",
+		lossless_types: Tuple[str, ...] = LOSSLESS_TYPES,
+		lossless_factor: int = 4,
+		slow_drop_limit: int = 300,
+		log_size: int = 1024,
+	) -> None:
+		self._connections: List[ClientConnection] = []
+		# Numeração das mensagens: `epoch` muda a cada início do processo, `seq` cresce
+		# a cada broadcast. O log guarda (instante, mensagem) dos REPLAY_TOPICS.
+		self.epoch = f"{int(time.time() * 1000):x}"
+		self.seq = 0
+		self._log: Deque[Tuple[float, EncodedMessage]] = deque(maxlen=max(1, int(log_size)))
+		# Seq da última entrada que saiu do log (0 = nada perdido nesta epoch). Detecções
+		# avançam `seq` sem entrar no log, então a cobertura não é o seq da mais antiga.
+		self._evicted_seq = 0
+		# Estado compacto para quem perdeu mais do que o log cobre
+		self._last_scanner: Optional[dict] = None
+		self._data_seq: Dict[str, int] = {}
+		self.resumes = 0
+		self.snapshots = 0
+		self.max_queue = max(1, int(max_queue))
+		self.overflow = overflow if overflow in OVERFLOW_POLICIES else "drop_oldest"
+		self.lossless_types = frozenset(lossless_types)
+		self.lossless_factor = max(1, int(lossless_factor))
+		self.slow_drop_limit = max(1, int(slow_drop_limit))
+		# Contadores globais
+		self.dropped = 0
+		self.slow_disconnects = 0
+		# Com vários processos (ver backend/event_bus.py): repassa ao barramento
+		# o que foi originado neste processo
+		self.relay: Optional[Callable[[dict], None]] = None
+
+	async def connect(
+		self, websocket: WebSocket, encoding: str = "json", topics: Optional[List[str]] = None,
+		last_seq: Optional[int] = None, epoch: str = "",
+	) -> ClientConnection:
+		"""
+		Aceita o cliente. Com `last_seq` (e o `epoch` recebido no hello anterior),
+		reenvia o que ele perdeu desde então, ou um snapshot se o log não cobrir.
+		Reenvio e entrada no broadcast acontecem sem await entre eles, então
+		nenhuma mensagem fica de fora nem chega duplicada.
+		"""
+		await websocket.accept()
+		client = ClientConnection(websocket, self, available_encoding(encoding))
+		if topics:
+			client.subscribe(topics)
+		# Informa a codificação efetiva (cai para JSON se a pedida não estiver disponível)
+		client.enqueue(EncodedMessage(
+			{"type": "hello", "encoding": client.encoding, "epoch": self.epoch, "seq": self.seq}, lossless=True,
+		))
+		if last_seq is not None:
+			self._resume(client, last_seq, epoch)
+		client.start()
+		self._connections.append(client)
+		return client
+
+	def _resume(self, client: ClientConnection, last_seq: int, epoch: str) -> None:
+		if epoch == self.epoch and last_seq >= self.seq:
+			return
+		if epoch != self.epoch or last_seq < self._evicted_seq:
+			self._send_snapshot(client, last_seq if epoch == self.epoch else 0)
+			return
+		self.resumes += 1
+		now = time.monotonic()
+		for t, item in self._log:
+			if item.message["seq"] <= last_seq or not client.wants(item):
+				continue
+			# Marcado como reenvio, com a idade, para o cliente decidir (ex.: ignorar toques velhos)
+			replay = {**item.message, "replayed": True, "age_ms": round((now - t) * 1000.0, 1)}
+			client.enqueue(EncodedMessage(replay, lossless=True, topic=item.topic))
+
+	def _send_snapshot(self, client: ClientConnection, since_seq: int) -> None:
+		"""Estado atual do scanner e as coleções alteradas desde `since_seq` (o cliente recarrega)."""
+		self.snapshots += 1
+		client.enqueue(EncodedMessage({
+			"type": "snapshot",
+			"seq": self.seq,
+			"epoch": self.epoch,
+			"scanner": self._last_scanner,
+			"data_changed": sorted(c for c, seq in self._data_seq.items() if seq > since_seq),
+		}, lossless=True))
+
+	async def disconnect(self, websocket: WebSocket) -> None:
+		for client in list(self._connections):
+			if client.websocket is websocket:
+				self._remove(client)
+				await client.close()
+
+	def _remove(self, client: ClientConnection) -> None:
+		if client in self._connections:
+			self._connections.remove(client)
+
+	def broadcast(self, message: dict, relay: bool = True) -> None:
+		"""
+		Enfileira a mensagem para todos os clientes sem esperar nenhum envio.
+		`relay=False` para mensagens que já vieram do barramento.
+		"""
+		if relay and self.relay is not None:
+			self.relay(message)
+		self.seq += 1
+		message["seq"] = self.seq
+		item = EncodedMessage(message, message.get("type") in self.lossless_types, topic_for(message))
+		if item.topic in REPLAY_TOPICS:
+			if len(self._log) == self._log.maxlen:
+				self._evicted_seq = self._log[0][1].message["seq"]
+			self._log.append((time.monotonic(), item))
+			if item.topic == "scanner":
+				self._last_scanner = message
+			elif item.topic == "data":
+				self._data_seq[str(message.get("collection"))] = self.seq
+		slow: List[ClientConnection] = []
+		for client in self._connections:
+			if not client.wants(item):
+				continue
+			if not client.offer(item):
+				slow.append(client)
+		for client in slow:
+			self._remove(client)
+			self.slow_disconnects += 1
+			# 1013 = "try again later": o cliente pode reconectar
+			asyncio.create_task(client.close(code=1013))
+
+	def send(self, client: ClientConnection, message: dict) -> None:
+		"""Mensagem de controle para um único cliente (sem tópico e sem perda)."""
+		client.enqueue(EncodedMessage(message, lossless=True))
+
+	async def broadcast_json(self, message: dict) -> None:
+		t0 = time.monotonic()
+		self.broadcast(message)
+		get_latency_monitor().record("ws.broadcast", time.monotonic() - t0)
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"clients": len(self._connections),
+			"epoch": self.epoch,
+			"seq": self.seq,
+			"log": len(self._log),
+			"resumes": self.resumes,
+			"snapshots": self.snapshots,
+			"max_queue": self.max_queue,
+			"overflow": self.overflow,
+			"dropped": self.dropped,
+			"slow_disconnects": self.slow_disconnects,
+			"queues": [c.depth for c in self._connections],
+			"encodings": [c.encoding for c in self._connections],
+			"topics": [sorted(c.topics) if c.topics is not None else None for c in self._connections],
+			"rate_limited": sum(c.rate_limited for c in self._connections),
+		}
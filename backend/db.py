@@ -1,24 +1,184 @@
 import json
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Caminho para o arquivo app.db na raiz do projeto
 DB_PATH = Path(__file__).resolve().parent.parent / "app.db"
 
+# Ajustes do pool (ver ConnectionPool)
+READERS = int(os.environ.get("AXON_DB_READERS", "4"))
+MMAP_SIZE = 256 << 20
+CACHE_SIZE_KB = 16 << 10
+CACHED_STATEMENTS = 256
 
-def get_connection() -> sqlite3.Connection:
-	"""
-	Retorna uma conexão SQLite com configurações apropriadas.
-	"""
-	conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+
+def _open(path: Path) -> sqlite3.Connection:
+	conn = sqlite3.connect(str(path), check_same_thread=False, cached_statements=CACHED_STATEMENTS)
 	conn.row_factory = sqlite3.Row
 	# Habilita suporte a chaves estrangeiras (por padrão vem desativado no SQLite)
 	conn.execute("PRAGMA foreign_keys = ON;")
 	return conn
 
 
-def init_db() -> None:
+def get_connection() -> sqlite3.Connection:
+	"""
+	Retorna uma conexão SQLite nova (quem chama fecha). As rotas usam o pool
+	(`reader()`/`writer()`); isto fica para scripts e manutenção.
+	"""
+	return _open(DB_PATH)
+
+
+class ConnectionPool:
+	"""
+	Conexões de longa duração para o app.db: uma de escrita (serializada por
+	lock) e até `readers` de leitura. Em WAL as leituras não esperam as
+	importações e vice-versa. Cada conexão guarda as instruções já preparadas
+	(`cached_statements`), então as consultas repetidas das rotas não são
+	recompiladas. Thread-safe: as rotas chamam o db via asyncio.to_thread, então
+	leituras correm em paralelo entre si e com a escrita. Cada processo
+	(worker) tem o seu pool.
+	"""
+	def __init__(self, path: Path, readers: int = READERS) -> None:
+		self.path = Path(path)
+		self._write_lock = threading.Lock()
+		self._writer = self._configure(_open(self.path))
+		# WAL é persistente no arquivo; basta ativar uma vez pela conexão de escrita
+		self.journal_mode = self._writer.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+		self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+		self._max_readers = max(1, readers)
+		self._opened_readers = 0
+		self._readers_lock = threading.Lock()
+		self.reads = 0
+		self.writes = 0
+		self.reader_waits = 0
+
+	@staticmethod
+	def _configure(conn: sqlite3.Connection) -> sqlite3.Connection:
+		# NORMAL em WAL: durável a cada checkpoint, sem fsync por commit
+		conn.execute("PRAGMA synchronous = NORMAL;")
+		conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
+		conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB};")
+		conn.execute("PRAGMA temp_store = MEMORY;")
+		conn.execute("PRAGMA busy_timeout = 5000;")
+		return conn
+
+	def _acquire_reader(self) -> sqlite3.Connection:
+		try:
+			return self._readers.get_nowait()
+		except queue.Empty:
+			pass
+		with self._readers_lock:
+			if self._opened_readers < self._max_readers:
+				self._opened_readers += 1
+				conn = self._configure(_open(self.path))
+				conn.execute("PRAGMA query_only = ON;")
+				return conn
+		self.reader_waits += 1
+		return self._readers.get()
+
+	@contextmanager
+	def reader(self) -> Iterator[sqlite3.Connection]:
+		conn = self._acquire_reader()
+		self.reads += 1
+		try:
+			yield conn
+		finally:
+			# Fecha a transação implícita de leitura antes de devolver ao pool
+			if conn.in_transaction:
+				conn.rollback()
+			self._readers.put(conn)
+
+	@contextmanager
+	def writer(self) -> Iterator[sqlite3.Connection]:
+		"""Transação de escrita: commit ao sair, rollback em exceção."""
+		with self._write_lock:
+			conn = self._writer
+			self.writes += 1
+			try:
+				yield conn
+				conn.commit()
+			except BaseException:
+				conn.rollback()
+				raise
+
+	def close(self) -> None:
+		while True:
+			try:
+				self._readers.get_nowait().close()
+			except queue.Empty:
+				break
+		with self._write_lock:
+			# Devolve ao app.db tudo o que está no -wal: parado, o arquivo principal fica completo
+			try:
+				self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+			except sqlite3.Error:
+				pass
+			self._writer.close()
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"path": str(self.path),
+			"journal_mode": self.journal_mode,
+			"readers_open": self._opened_readers,
+			"readers_idle": self._readers.qsize(),
+			"reads": self.reads,
+			"writes": self.writes,
+			"reader_waits": self.reader_waits,
+		}
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def init_pool(path: Optional[Path] = None) -> ConnectionPool:
+	"""
+	Abre o pool do processo em `path` (padrão DB_PATH), fechando o anterior.
+	É o único lugar onde o banco do processo troca (startup, testes).
+	"""
+	global _pool
+	with _pool_lock:
+		if _pool is not None:
+			_pool.close()
+		_pool = ConnectionPool(Path(DB_PATH if path is None else path))
+		return _pool
+
+
+def get_pool() -> ConnectionPool:
+	"""Pool do processo; sem init_pool, é aberto em DB_PATH no primeiro uso."""
+	global _pool
+	# Caminho quente sem lock: só init_pool/close_pool trocam o pool
+	pool = _pool
+	if pool is not None:
+		return pool
+	with _pool_lock:
+		if _pool is None:
+			_pool = ConnectionPool(Path(DB_PATH))
+		return _pool
+
+
+def close_pool() -> None:
+	global _pool
+	with _pool_lock:
+		if _pool is not None:
+			_pool.close()
+			_pool = None
+
+
+def reader(pool: Optional[ConnectionPool] = None):
+	return (pool or get_pool()).reader()
+
+
+def writer(pool: Optional[ConnectionPool] = None):
+	return (pool or get_pool()).writer()
+
+
+def init_db(pool: Optional[ConnectionPool] = None) -> None:
 	"""
 	Cria as tabelas necessárias se ainda não existirem.
 	- projects: armazena projetos como JSON (id como string)
@@ -27,7 +187,7 @@ def init_db() -> None:
 	- calendar_events: armazena eventos do calendário como JSON (id como string)
 	- notes: armazena notas como JSON (id como string)
 	"""
-	with get_connection() as conn:
+	with writer(pool) as conn:
 		conn.executescript(
 			"""
 			CREATE TABLE IF NOT EXISTS projects (
@@ -63,92 +223,88 @@ def init_db() -> None:
 		)
 
 
-def _upsert(conn: sqlite3.Connection, table: str, key_column: str, key_value: str, payload: Dict[str, Any]) -> None:
-	conn.execute(
-		f"""
+def _upsert_sql(table: str, key_column: str) -> str:
+	# Texto constante por tabela: a conexão reaproveita a instrução preparada
+	return f"""
 		INSERT INTO {table} ({key_column}, data, updated_at)
 		VALUES (?, ?, strftime('%s','now'))
 		ON CONFLICT({key_column}) DO UPDATE SET
 			data = excluded.data,
 			updated_at = excluded.updated_at
-		""",
-		(key_value, json.dumps(payload, ensure_ascii=False)),
-	)
+		"""
+
+
+def _upsert(conn: sqlite3.Connection, table: str, key_column: str, key_value: str, payload: Dict[str, Any]) -> None:
+	conn.execute(_upsert_sql(table, key_column), (key_value, json.dumps(payload, ensure_ascii=False)))
+
 
+def _json_rows(items: Iterable[Any], id_key: str) -> List[Tuple[str, str]]:
+	"""(id, JSON) dos objetos válidos; ignora não-dicts e objetos sem id."""
+	rows: List[Tuple[str, str]] = []
+	for obj in items:
+		if not isinstance(obj, dict):
+			print(f"[DB] Objeto ignorado (não é dict): {type(obj)}")
+			continue
+		obj_id = obj.get(id_key)
+		if not obj_id:
+			print(f"[DB] Objeto ignorado (sem {id_key}): {list(obj.keys())[:5] if obj else 'vazio'}")
+			continue
+		rows.append((str(obj_id), json.dumps(obj, ensure_ascii=False)))
+	return rows
 
-def bulk_upsert_json(table: str, items: Iterable[Dict[str, Any]], id_key: str = "id") -> Tuple[int, List[str]]:
+
+def bulk_upsert_json(
+	table: str, items: Iterable[Dict[str, Any]], id_key: str = "id", pool: Optional[ConnectionPool] = None,
+) -> Tuple[int, List[str]]:
 	"""
-	Insere/atualiza em lote uma coleção de objetos JSON.
+	Insere/atualiza em lote uma coleção de objetos JSON, numa única transação
+	na conexão de escrita do pool.
 	Retorna (count_ok, ids_ok).
 	"""
-	count = 0
-	ok_ids: List[str] = []
 	# Converter para lista para evitar problemas com iteráveis consumidos
 	items_list = list(items) if not isinstance(items, list) else items
 	print(f"[DB] Iniciando bulk_upsert_json para tabela '{table}' com {len(items_list)} itens")
-	conn = get_connection()
-	print(f"[DB] Conexão estabelecida com banco: {DB_PATH}")
+	rows = _json_rows(items_list, id_key)
 	try:
-		for obj in items_list:
-			if not isinstance(obj, dict):
-				print(f"[DB] Objeto ignorado (não é dict): {type(obj)}")
-				continue
-			obj_id = obj.get(id_key)
-			if not obj_id:
-				print(f"[DB] Objeto ignorado (sem {id_key}): {list(obj.keys())[:5] if obj else 'vazio'}")
-				continue
-			print(f"[DB] Salvando {table} id={obj_id}, nome={obj.get('name', 'N/A')[:30]}")
-			_upsert(conn, table, "id", str(obj_id), obj)
-			count += 1
-			ok_ids.append(str(obj_id))
-		print(f"[DB] Antes do commit: {count} itens processados")
-		conn.commit()  # Commit explícito
-		print(f"[DB] ✅ Commit realizado: {count} itens salvos em {table}")
-		
-		# Verificar se realmente salvou
-		cur = conn.cursor()
-		cur.execute(f"SELECT COUNT(*) FROM {table}")
-		total = cur.fetchone()[0]
-		print(f"[DB] Verificação: {total} itens na tabela {table} após commit")
+		with writer(pool) as conn:
+			conn.executemany(_upsert_sql(table, "id"), rows)
+		print(f"[DB] ✅ Commit realizado: {len(rows)} itens salvos em {table}")
 	except Exception as e:
-		conn.rollback()  # Rollback em caso de erro
 		print(f"[DB] ❌ Erro ao salvar: {e}")
 		import traceback
 		traceback.print_exc()
 		raise e
-	finally:
-		conn.close()
-	return count, ok_ids
+	return len(rows), [r[0] for r in rows]
 
 
-def upsert_singleton_state(key: str, data: Dict[str, Any]) -> None:
+def upsert_singleton_state(key: str, data: Dict[str, Any], pool: Optional[ConnectionPool] = None) -> None:
 	"""
 	Salva um JSON único em planner_state com a chave fornecida (ex: 'state').
 	"""
-	with get_connection() as conn:
-		conn.execute(
-			"""
-			INSERT INTO planner_state (key, data, updated_at)
-			VALUES (?, ?, strftime('%s','now'))
-			ON CONFLICT(key) DO UPDATE SET
-				data = excluded.data,
-				updated_at = excluded.updated_at
-			""",
-			(key, json.dumps(data, ensure_ascii=False)),
-		)
+	with writer(pool) as conn:
+		_upsert(conn, "planner_state", "key", key, data)
 
 
-def get_all_json(table: str) -> List[Dict[str, Any]]:
-	with get_connection() as conn:
-		cur = conn.execute(f"SELECT data FROM {table}")
-		rows = cur.fetchall()
-		return [json.loads(r["data"]) for r in rows]
+def replace_planner(key: str, state: Dict[str, Any], events: Iterable[Any], pool: Optional[ConnectionPool] = None) -> int:
+	"""
+	Salva o estado do planner e substitui todos os eventos do calendário,
+	numa única transação. Retorna quantos eventos foram gravados.
+	"""
+	rows = _json_rows(events, "id")
+	with writer(pool) as conn:
+		_upsert(conn, "planner_state", "key", key, state)
+		conn.execute("DELETE FROM calendar_events")
+		conn.executemany(_upsert_sql("calendar_events", "id"), rows)
+	return len(rows)
 
 
-def get_singleton_state(key: str) -> Optional[Dict[str, Any]]:
-	with get_connection() as conn:
-		cur = conn.execute("SELECT data FROM planner_state WHERE key = ?", (key,))
-		row = cur.fetchone()
-		return json.loads(row["data"]) if row else None
+def get_all_json(table: str, pool: Optional[ConnectionPool] = None) -> List[Dict[str, Any]]:
+	with reader(pool) as conn:
+		rows = conn.execute(f"SELECT data FROM {table}").fetchall()
+	return [json.loads(r["data"]) for r in rows]
 
 
+def get_singleton_state(key: str, pool: Optional[ConnectionPool] = None) -> Optional[Dict[str, Any]]:
+	with reader(pool) as conn:
+		row = conn.execute("SELECT data FROM planner_state WHERE key = ?", (key,)).fetchone()
+	return json.loads(row["data"]) if row else None
@@ -0,0 +1,333 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .connections import LOSSLESS_TYPES
+from .wire import dumps_json
+
+# Mensagens que o hub nunca descarta para um assinante lento (as mesmas do /ws)
+_LOSSLESS = frozenset(LOSSLESS_TYPES)
+# Limite do buffer de escrita por assinante antes de descartar detecções
+MAX_PEER_BUFFER = 1 << 20
+
+
+def default_address() -> str:
+	"""
+	Endereço do barramento (AXON_BUS): "unix:/caminho.sock" ou "tcp:host:porta".
+	Padrão: socket Unix no diretório temporário; TCP local no Windows.
+	"""
+	env = os.environ.get("AXON_BUS", "").strip()
+	if env:
+		return env
+	if os.name == "nt" or not hasattr(asyncio, "open_unix_connection"):
+		return "tcp:127.0.0.1:8765"
+	return "unix:" + os.path.join(tempfile.gettempdir(), "axon-bus.sock")
+
+
+def _parse(address: str) -> Tuple[str, Any]:
+	kind, _, rest = address.partition(":")
+	if kind == "unix":
+		return "unix", rest
+	if kind == "tcp":
+		host, _, port = rest.rpartition(":")
+		return "tcp", (host or "127.0.0.1", int(port))
+	raise ValueError(f"endereço de barramento inválido: {address}")
+
+
+def _frame(envelope: Dict[str, Any]) -> bytes:
+	data = dumps_json(envelope).encode("utf-8")
+	return struct.pack(">I", len(data)) + data
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+	(size,) = struct.unpack(">I", await reader.readexactly(4))
+	return json.loads(await reader.readexactly(size))
+
+
+class BusHub:
+	"""
+	Lado do processo produtor (câmera e detectores). Aceita conexões dos
+	workers da API e:
+	- repassa a todos os eventos publicados localmente (`publish`) e os que
+	  um worker publica (ex.: mudanças de dados), exceto a quem publicou;
+	- atende chamadas RPC ({"op": "call", "method", "params"}) com `rpc_handler`;
+	- entrega a `on_notify`, sem repassar, avisos dirigidos só ao produtor
+	  (ex.: ecos de latência dos clientes).
+	Assinantes lentos perdem detecções, nunca toques nem avisos de estado.
+	"""
+	def __init__(
+		self,
+		address: str,
+		rpc_handler: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+		on_publish: Optional[Callable[[Dict[str, Any]], None]] = None,
+		on_notify: Optional[Callable[[Dict[str, Any]], None]] = None,
+	) -> None:
+		self.address = address
+		self._rpc_handler = rpc_handler
+		self._on_publish = on_publish
+		self._on_notify = on_notify
+		self._server: Optional[asyncio.AbstractServer] = None
+		self._peers: List[asyncio.StreamWriter] = []
+		self.published = 0
+		self.dropped = 0
+		self.calls = 0
+		self.call_errors = 0
+
+	async def start(self) -> None:
+		kind, target = _parse(self.address)
+		if kind == "unix":
+			if os.path.exists(target):
+				os.unlink(target)
+			self._server = await asyncio.start_unix_server(self._handle, path=target)
+		else:
+			self._server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+
+	async def stop(self) -> None:
+		for writer in list(self._peers):
+			writer.close()
+		self._peers.clear()
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+			self._server = None
+		kind, target = _parse(self.address)
+		if kind == "unix" and os.path.exists(target):
+			try:
+				os.unlink(target)
+			except OSError:
+				pass
+
+	def publish(self, message: Dict[str, Any], origin: Optional[asyncio.StreamWriter] = None) -> None:
+		"""Envia o evento a todos os workers conectados (codificado uma vez)."""
+		if not self._peers:
+			return
+		frame = _frame({"op": "event", "msg": message})
+		lossless = message.get("type") in _LOSSLESS
+		self.published += 1
+		for writer in list(self._peers):
+			if writer is origin:
+				continue
+			if writer.is_closing():
+				self._drop_peer(writer)
+				continue
+			if not lossless and writer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+				self.dropped += 1
+				continue
+			writer.write(frame)
+
+	def _drop_peer(self, writer: asyncio.StreamWriter) -> None:
+		if writer in self._peers:
+			self._peers.remove(writer)
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		self._peers.append(writer)
+		try:
+			while True:
+				envelope = await _read_frame(reader)
+				op = envelope.get("op")
+				if op == "publish":
+					message = envelope.get("msg") or {}
+					self.publish(message, origin=writer)
+					if self._on_publish is not None:
+						self._on_publish(message)
+				elif op == "notify":
+					if self._on_notify is not None:
+						self._on_notify(envelope.get("msg") or {})
+				elif op == "call":
+					asyncio.create_task(self._call(writer, envelope))
+		except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+			# Cancelamento só ocorre no desligamento do loop
+			pass
+		finally:
+			self._drop_peer(writer)
+			writer.close()
+
+	async def _call(self, writer: asyncio.StreamWriter, envelope: Dict[str, Any]) -> None:
+		self.calls += 1
+		reply: Dict[str, Any] = {"op": "reply", "id": envelope.get("id")}
+		try:
+			reply["result"] = await self._rpc_handler(str(envelope.get("method")), envelope.get("params") or {})
+		except Exception as e:
+			self.call_errors += 1
+			reply["error"] = str(e)
+		if not writer.is_closing():
+			writer.write(_frame(reply))
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"address": self.address,
+			"workers": len(self._peers),
+			"published": self.published,
+			"dropped": self.dropped,
+			"calls": self.calls,
+			"call_errors": self.call_errors,
+		}
+
+
+class BusClient:
+	"""
+	Lado de um worker da API: recebe os eventos do produtor (`on_message`),
+	publica eventos locais para os demais workers e faz chamadas RPC.
+	Reconecta sozinho se o produtor reiniciar.
+	"""
+	def __init__(self, address: str, on_message: Callable[[Dict[str, Any]], None]) -> None:
+		self.address = address
+		self._on_message = on_message
+		self._writer: Optional[asyncio.StreamWriter] = None
+		self._task: Optional[asyncio.Task] = None
+		self._calls: Dict[int, asyncio.Future] = {}
+		self._next_id = 1
+		self.received = 0
+		self.publish_dropped = 0
+		self.reconnects = 0
+
+	@property
+	def connected(self) -> bool:
+		return self._writer is not None and not self._writer.is_closing()
+
+	def start(self) -> None:
+		self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+		if self._writer is not None:
+			self._writer.close()
+			self._writer = None
+
+	async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+		kind, target = _parse(self.address)
+		if kind == "unix":
+			return await asyncio.open_unix_connection(path=target)
+		return await asyncio.open_connection(host=target[0], port=target[1])
+
+	async def _run(self) -> None:
+		delay = 0.2
+		while True:
+			try:
+				reader, writer = await self._connect()
+			except (OSError, ValueError):
+				await asyncio.sleep(delay)
+				delay = min(5.0, delay * 2)
+				continue
+			delay = 0.2
+			self._writer = writer
+			try:
+				while True:
+					envelope = await _read_frame(reader)
+					op = envelope.get("op")
+					if op == "event":
+						self.received += 1
+						try:
+							self._on_message(envelope.get("msg") or {})
+						except Exception:
+							pass
+					elif op == "reply":
+						fut = self._calls.pop(envelope.get("id"), None)
+						if fut is not None and not fut.done():
+							if "error" in envelope:
+								fut.set_exception(RuntimeError(envelope["error"]))
+							else:
+								fut.set_result(envelope.get("result"))
+			except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+				pass
+			finally:
+				self._writer = None
+				writer.close()
+				for fut in self._calls.values():
+					if not fut.done():
+						fut.set_exception(ConnectionError("barramento desconectado"))
+				self._calls.clear()
+			self.reconnects += 1
+
+	def publish(self, message: Dict[str, Any]) -> None:
+		"""Evento originado neste worker (ex.: mudança de dados) para os demais."""
+		writer = self._writer
+		if writer is None or writer.is_closing():
+			self.publish_dropped += 1
+			return
+		writer.write(_frame({"op": "publish", "msg": message}))
+
+	def notify(self, message: Dict[str, Any]) -> None:
+		"""Aviso só para o produtor (não repassado aos demais workers)."""
+		writer = self._writer
+		if writer is not None and not writer.is_closing():
+			writer.write(_frame({"op": "notify", "msg": message}))
+
+	async def call(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10.0) -> Any:
+		writer = self._writer
+		if writer is None or writer.is_closing():
+			raise ConnectionError("produtor indisponível")
+		call_id = self._next_id
+		self._next_id += 1
+		fut = asyncio.get_running_loop().create_future()
+		self._calls[call_id] = fut
+		writer.write(_frame({"op": "call", "id": call_id, "method": method, "params": params or {}}))
+		try:
+			return await asyncio.wait_for(fut, timeout)
+		finally:
+			self._calls.pop(call_id, None)
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"address": self.address,
+			"connected": self.connected,
+			"received": self.received,
+			"publish_dropped": self.publish_dropped,
+			"reconnects": self.reconnects,
+			"pending_calls": len(self._calls),
+		}
+
+
+async def asgi_request(
+	app, method: str, path: str, query_string: str = "", headers: Optional[Dict[str, str]] = None, body: bytes = b"",
+) -> Dict[str, Any]:
+	"""
+	Executa uma requisição HTTP diretamente no app ASGI deste processo (sem
+	socket) e devolve {"status", "headers", "body_b64"}. Usado pelo RPC "http"
+	para que os workers encaminhem ao produtor as rotas de câmera e calibração.
+	Respostas em streaming não são suportadas.
+	"""
+	raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+	if body:
+		raw_headers.append((b"content-length", str(len(body)).encode("ascii")))
+	scope = {
+		"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+		"method": method.upper(), "scheme": "http", "path": path, "raw_path": path.encode("utf-8"),
+		"query_string": query_string.encode("latin-1"), "root_path": "", "headers": raw_headers,
+		"client": ("127.0.0.1", 0), "server": ("127.0.0.1", 0),
+	}
+	sent = False
+
+	async def receive() -> Dict[str, Any]:
+		nonlocal sent
+		if not sent:
+			sent = True
+			return {"type": "http.request", "body": body, "more_body": False}
+		# Nada mais a ler: espera como um cliente que não desconecta
+		await asyncio.sleep(3600)
+		return {"type": "http.disconnect"}
+
+	result: Dict[str, Any] = {"status": 500, "headers": [], "body": b""}
+	chunks: List[bytes] = []
+
+	async def send(event: Dict[str, Any]) -> None:
+		if event["type"] == "http.response.start":
+			result["status"] = event["status"]
+			result["headers"] = [
+				[k.decode("latin-1"), v.decode("latin-1")] for k, v in event.get("headers", [])
+				if k.lower() != b"content-length"
+			]
+		elif event["type"] == "http.response.body":
+			chunks.append(event.get("body", b""))
+
+	await app(scope, receive, send)
+	return {
+		"status": result["status"],
+		"headers": result["headers"],
+		"body_b64": base64.b64encode(b"".join(chunks)).decode("ascii"),
+	}
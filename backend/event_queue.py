@@ -0,0 +1,153 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+# Item da fila: (instante de enfileiramento, mensagem)
+QueueItem = Tuple[float, Any]
+
+
+class EventQueue:
+	"""
+	Fila de eventos dos detectores com duas faixas:
+	- toques/gestos: sem perda, em ordem, sempre atendidos primeiro;
+	- detecções: só a mais recente por `source` (a mais nova substitui a que
+	  ainda não saiu), então um loop atrasado nunca reenvia caixas velhas.
+	`put_nowait` deve ser chamado no loop asyncio (via call_soon_threadsafe).
+	"""
+	def __init__(self) -> None:
+		self._touch: Deque[QueueItem] = deque()
+		self._detections: Dict[str, QueueItem] = {}
+		self._ready = asyncio.Event()
+		# Métricas
+		self.enqueued_touch = 0
+		self.enqueued_detections = 0
+		self.coalesced = 0
+		self.max_touch_depth = 0
+		# Detecções substituídas desde a última que saiu (mede o atraso do loop)
+		self._superseded = 0
+
+	def put_nowait(self, item: QueueItem) -> None:
+		message = item[1]
+		if isinstance(message, dict) and message.get("type") == "detections":
+			key = str(message.get("source") or "detections")
+			if key in self._detections:
+				self.coalesced += 1
+				self._superseded += 1
+			self._detections[key] = item
+			self.enqueued_detections += 1
+		else:
+			self._touch.append(item)
+			self.enqueued_touch += 1
+			if len(self._touch) > self.max_touch_depth:
+				self.max_touch_depth = len(self._touch)
+		self._ready.set()
+
+	async def get(self) -> QueueItem:
+		while not self._touch and not self._detections:
+			self._ready.clear()
+			await self._ready.wait()
+		if self._touch:
+			return self._touch.popleft()
+		key = next(iter(self._detections))
+		self._superseded = 0
+		return self._detections.pop(key)
+
+	def qsize(self) -> int:
+		return len(self._touch) + len(self._detections)
+
+	def pressure(self) -> int:
+		"""Profundidade mais as detecções descartadas desde a última entrega (para o controle de FPS)."""
+		return self.qsize() + self._superseded
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"touch_depth": len(self._touch),
+			"detection_depth": len(self._detections),
+			"max_touch_depth": self.max_touch_depth,
+			"enqueued_touch": self.enqueued_touch,
+			"enqueued_detections": self.enqueued_detections,
+			"coalesced": self.coalesced,
+		}
+
+
+class EventBridge:
+	"""
+	Passagem thread -> loop para os callbacks dos detectores. `submit` só
+	anexa a um deque (thread-safe) e, se ainda não houver um dreno agendado,
+	agenda um único `call_soon_threadsafe`; o dreno entrega no loop tudo o que
+	acumulou. Sem coroutine nem Future por evento. Erros são contados em
+	`stats()` em vez de sumirem em Futures que ninguém aguarda.
+	"""
+	def __init__(self, loop: asyncio.AbstractEventLoop, sink: Callable[[Any], None]) -> None:
+		self._loop = loop
+		self._sink = sink
+		self._pending: Deque[Any] = deque()
+		self._lock = threading.Lock()
+		self._scheduled = False
+		self.submitted = 0
+		self.delivered = 0
+		self.batches = 0
+		self.max_batch = 0
+		self.submit_errors = 0
+		self.sink_errors = 0
+		self.last_error: Optional[str] = None
+
+	@property
+	def loop(self) -> asyncio.AbstractEventLoop:
+		return self._loop
+
+	def submit(self, item: Any) -> None:
+		"""Chamado de qualquer thread."""
+		self._pending.append(item)
+		with self._lock:
+			self.submitted += 1
+			if self._scheduled:
+				return
+			self._scheduled = True
+		try:
+			self._loop.call_soon_threadsafe(self._drain)
+		except RuntimeError as e:
+			# Loop fechado (desligamento): descarta o que estiver pendente
+			with self._lock:
+				self._scheduled = False
+			self.submit_errors += 1
+			self.last_error = repr(e)
+			self._pending.clear()
+
+	def _drain(self) -> None:
+		# Libera o agendamento antes de drenar: o que chegar durante o dreno agenda outro
+		with self._lock:
+			self._scheduled = False
+		pending = self._pending
+		n = 0
+		while pending:
+			try:
+				item = pending.popleft()
+			except IndexError:
+				break
+			n += 1
+			try:
+				self._sink(item)
+				self.delivered += 1
+			except Exception as e:
+				self.sink_errors += 1
+				self.last_error = repr(e)
+		if n:
+			self.batches += 1
+			if n > self.max_batch:
+				self.max_batch = n
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"submitted": self.submitted,
+			"delivered": self.delivered,
+			"pending": len(self._pending),
+			"batches": self.batches,
+			"avg_batch": round(self.delivered / self.batches, 2) if self.batches else None,
+			"max_batch": self.max_batch,
+			"submit_errors": self.submit_errors,
+			"sink_errors": self.sink_errors,
+			"last_error": self.last_error,
+		}
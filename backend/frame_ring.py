@@ -0,0 +1,191 @@
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Cabeçalho: [seq mais recente, altura, largura, canais, número de slots, reservado...]
+_HEADER_FIELDS = 8
+_HEADER_BYTES = _HEADER_FIELDS * 8
+
+
+def _attach_shm(name: Optional[str]) -> shared_memory.SharedMemory:
+	shm = shared_memory.SharedMemory(name=name, create=False)
+	# Antes do Python 3.13 o resource_tracker de um processo independente
+	# removeria o bloco quando o leitor terminasse; só o criador deve fazer
+	# unlink. Filhos do multiprocessing compartilham o tracker do pai.
+	if multiprocessing.parent_process() is None:
+		try:
+			from multiprocessing import resource_tracker
+			resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+		except Exception:
+			pass
+	return shm
+
+
+class FrameRing:
+	"""
+	Buffer circular de frames pré-alocado em `multiprocessing.shared_memory`.
+
+	Layout do bloco compartilhado:
+	- cabeçalho (8 x int64)
+	- seq de cada slot (int64), 0 = vazio e -1 = em escrita
+	- timestamp de captura de cada slot (float64, time.monotonic)
+	- frames (slots x altura x largura x canais, uint8)
+
+	Um único escritor (FrameSource) grava cada frame diretamente no slot
+	`seq % slots`. Leitores, no mesmo processo ou em outro (via `attach`),
+	obtêm views sem cópia e conferem pelo seq se o frame ainda é válido
+	(protocolo tipo seqlock: seq antes e depois da leitura).
+	"""
+	def __init__(self, shape: Tuple[int, int, int], slots: int = 8, name: Optional[str] = None, create: bool = True, start_seq: int = 0) -> None:
+		h, w, c = (int(v) for v in shape)
+		self._slots = max(2, int(slots))
+		frame_bytes = h * w * c
+		size = _HEADER_BYTES + self._slots * 16 + self._slots * frame_bytes
+		if create:
+			self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+		else:
+			self._shm = _attach_shm(name)
+		self._owner = create
+		buf = self._shm.buf
+		self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf, offset=0)
+		self._seqs = np.ndarray((self._slots,), dtype=np.int64, buffer=buf, offset=_HEADER_BYTES)
+		self._stamps = np.ndarray((self._slots,), dtype=np.float64, buffer=buf, offset=_HEADER_BYTES + self._slots * 8)
+		self._frames = np.ndarray(
+			(self._slots, h, w, c), dtype=np.uint8, buffer=buf,
+			offset=_HEADER_BYTES + self._slots * 16,
+		)
+		self._shape = (h, w, c)
+		if create:
+			self._header[:] = 0
+			self._header[0] = start_seq
+			self._header[1:5] = (h, w, c, self._slots)
+			self._seqs[:] = 0
+			self._stamps[:] = 0.0
+
+	@classmethod
+	def attach(cls, name: str) -> "FrameRing":
+		"""Conecta a um ring já criado por outro processo (somente leitura)."""
+		shm = _attach_shm(name)
+		try:
+			header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf, offset=0).copy()
+		finally:
+			shm.close()
+		h, w, c, slots = (int(v) for v in header[1:5])
+		return cls((h, w, c), slots=slots, name=name, create=False)
+
+	@property
+	def name(self) -> str:
+		return self._shm.name
+
+	@property
+	def shape(self) -> Tuple[int, int, int]:
+		return self._shape
+
+	@property
+	def slots(self) -> int:
+		return self._slots
+
+	@property
+	def latest_seq(self) -> int:
+		return int(self._header[0])
+
+	def describe(self) -> dict:
+		"""Dados necessários para outro processo chamar `attach`."""
+		h, w, c = self._shape
+		return {"name": self.name, "h": h, "w": w, "c": c, "slots": self._slots, "latest_seq": self.latest_seq}
+
+	# ===== Escrita (apenas o produtor) =====
+
+	def begin_write(self) -> Tuple[int, np.ndarray]:
+		"""
+		Reserva o próximo slot e retorna (seq, view gravável).
+		O chamador preenche a view (ex.: cap.read(view)) e confirma com `commit`.
+		"""
+		seq = int(self._header[0]) + 1
+		idx = seq % self._slots
+		self._seqs[idx] = -1
+		return seq, self._frames[idx]
+
+	def commit(self, seq: int, timestamp: float) -> None:
+		idx = seq % self._slots
+		self._stamps[idx] = timestamp
+		self._seqs[idx] = seq
+		self._header[0] = seq
+
+	def abort(self, seq: int) -> None:
+		"""Desfaz um `begin_write` cuja leitura falhou."""
+		self._seqs[seq % self._slots] = 0
+
+	def write(self, frame: np.ndarray, timestamp: float) -> int:
+		seq, view = self.begin_write()
+		np.copyto(view, frame)
+		self.commit(seq, timestamp)
+		return seq
+
+	# ===== Leitura =====
+
+	def is_valid(self, seq: int) -> bool:
+		"""Indica se o frame `seq` ainda está no ring (não foi sobrescrito)."""
+		return seq > 0 and int(self._seqs[seq % self._slots]) == seq
+
+	def get(self, seq: int, copy: bool = False) -> Optional[Tuple[int, float, np.ndarray]]:
+		"""
+		Retorna (seq, timestamp, frame) do frame `seq`, ou None se já foi sobrescrito.
+		Sem cópia, a view é somente leitura e deve ser revalidada com `is_valid`
+		após o uso se o consumidor for lento.
+		"""
+		if seq <= 0:
+			return None
+		idx = seq % self._slots
+		if int(self._seqs[idx]) != seq:
+			return None
+		ts = float(self._stamps[idx])
+		if copy:
+			frame = self._frames[idx].copy()
+			if int(self._seqs[idx]) != seq:
+				return None
+		else:
+			frame = self._frames[idx].view()
+			frame.flags.writeable = False
+		return (seq, ts, frame)
+
+	def latest(self, copy: bool = False) -> Optional[Tuple[int, float, np.ndarray]]:
+		return self.get(self.latest_seq, copy=copy)
+
+	def views_alive(self) -> int:
+		"""
+		Quantas views de frames (de `get`/`begin_write` ou derivadas delas, como
+		recortes) ainda existem. O numpy faz o `base` de toda view derivada apontar
+		para `_frames`, então basta contar as referências a ele.
+		"""
+		frames = self._frames
+		if frames is None:
+			return 0
+		# Descontados: o atributo, a variável local e o argumento do getrefcount
+		return max(0, sys.getrefcount(frames) - 3)
+
+	def close(self) -> bool:
+		"""
+		Libera o mapeamento (e remove o bloco, se for o criador). Com views de
+		frames ainda vivas não fecha (desmapear derrubaria o processo ao usá-las)
+		e retorna False; chame de novo depois que elas forem soltas.
+		"""
+		if self._owner:
+			# O nome some já; quem ainda tem o bloco mapeado continua lendo
+			self._owner = False
+			try:
+				self._shm.unlink()
+			except Exception:
+				pass
+		if self.views_alive():
+			return False
+		# Remove referências às views antes de fechar o mapeamento
+		self._header = self._seqs = self._stamps = self._frames = None  # type: ignore[assignment]
+		try:
+			self._shm.close()
+		except Exception:
+			pass
+		return True
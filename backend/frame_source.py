@@ -0,0 +1,329 @@
+import secrets
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .frame_ring import FrameRing
+
+try:
+	import cv2  # type: ignore
+except Exception:
+	cv2 = None
+
+# Silencia logs ruidosos do OpenCV, evitando mensagens de backend no Windows
+if cv2 is not None:
+	try:
+		if hasattr(cv2, "utils") and hasattr(cv2.utils, "logging"):
+			cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_SILENT)
+	except Exception:
+		pass
+
+
+def open_capture(camera_index: int, width: int = 1280, height: int = 720):
+	"""
+	Abre a câmera tentando os backends na ordem de preferência do Windows.
+	Retorna o cv2.VideoCapture aberto ou None.
+	"""
+	if cv2 is None:
+		return None
+	cap = None
+	# Preferir MSMF primeiro no Windows, pois DSHOW pode falhar por índice em alguns sistemas
+	for backend in (getattr(cv2, "CAP_MSMF", 1400), getattr(cv2, "CAP_DSHOW", 700), getattr(cv2, "CAP_ANY", 0)):
+		try:
+			cap = cv2.VideoCapture(camera_index, backend)
+			if cap.isOpened():
+				break
+			cap.release()
+		except Exception:
+			try:
+				if cap is not None:
+					cap.release()
+			except Exception:
+				pass
+		cap = None
+	# Fallback final: tentar sem especificar backend
+	if cap is None:
+		try:
+			cap = cv2.VideoCapture(camera_index)
+		except Exception:
+			cap = None
+	if cap is None or not cap.isOpened():
+		return None
+	# Opcional: fixa resolução comum para melhorar compatibilidade
+	try:
+		cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+		cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+	except Exception:
+		pass
+	return cap
+
+
+class FrameSubscription:
+	"""
+	Assinatura de um consumidor na FrameSource.
+	Cada assinatura tem seu próprio ritmo máximo (`max_fps`) e lembra o último
+	frame entregue, de modo que `read` só devolve frames novos.
+	"""
+	def __init__(self, source: "FrameSource", name: str, max_fps: Optional[float]) -> None:
+		self._source = source
+		self.name = name
+		self._min_dt = 0.0 if not max_fps else 1.0 / max(1e-6, max_fps)
+		self._last_seq = 0
+		self._last_delivery = 0.0
+		self.delivered = 0
+
+	def set_max_fps(self, max_fps: Optional[float]) -> None:
+		self._min_dt = 0.0 if not max_fps else 1.0 / max(1e-6, max_fps)
+
+	def read(self, timeout: float = 1.0) -> Optional[Tuple[int, float, object]]:
+		"""
+		Bloqueia até haver um frame mais novo que o último entregue e até o
+		intervalo mínimo da assinatura ter passado.
+		Retorna (seq, timestamp, frame) ou None em timeout/parada.
+		"""
+		deadline = time.monotonic() + timeout
+		wait = self._last_delivery + self._min_dt - time.monotonic()
+		if wait > 0:
+			if wait >= timeout:
+				time.sleep(timeout)
+				return None
+			time.sleep(wait)
+		item = self._source.wait_frame(self._last_seq, max(0.0, deadline - time.monotonic()))
+		if item is None:
+			return None
+		self._last_seq = item[0]
+		self._last_delivery = time.monotonic()
+		self.delivered += 1
+		self._source._delivered(self)
+		return item
+
+	def close(self) -> None:
+		self._source.unsubscribe(self)
+
+
+class FrameSource:
+	"""
+	Dono único da câmera: abre o dispositivo uma vez, decodifica cada frame uma
+	única vez e distribui para qualquer número de assinantes (ObjectDetector,
+	TouchDetector, /frame.jpg), cada um com seu próprio ritmo.
+
+	Os frames são decodificados diretamente num FrameRing em memória
+	compartilhada; assinantes recebem views somente leitura (sem cópia) junto
+	com o seq e o timestamp de captura (time.monotonic).
+	Com `lens`, os frames já chegam aos assinantes sem distorção de lente.
+	"""
+	def __init__(self, camera_index: int = 0, width: int = 1280, height: int = 720, ring_slots: int = 8, lens=None) -> None:
+		self._camera_index = camera_index
+		# Identifica esta fonte entre reinícios do scanner (e do processo): o seq
+		# recomeça em 1 e `id()` pode se repetir, então ETags e caches usam isto
+		self.token = secrets.token_hex(6)
+		# LensModel no modo "remap": cada frame é corrigido por um único cv2.remap direto no ring
+		self._lens = lens
+		self._scratch: Optional[np.ndarray] = None
+		self._width = width
+		self._height = height
+		self._ring_slots = ring_slots
+		self._ring: Optional[FrameRing] = None
+		# Rings substituídos (mudança de resolução) ainda com views em uso por algum assinante
+		self._retired: List[FrameRing] = []
+		self._cond = threading.Condition()
+		self._stop_event = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._subscribers: List[FrameSubscription] = []
+		self._seq = 0
+		self._opened = False
+
+	@property
+	def camera_index(self) -> int:
+		return self._camera_index
+
+	@property
+	def is_open(self) -> bool:
+		return self._opened
+
+	@property
+	def latest_seq(self) -> int:
+		"""Seq do frame mais recente (0 antes do primeiro frame)."""
+		return self._seq
+
+	@property
+	def ring(self) -> Optional[FrameRing]:
+		"""Ring em memória compartilhada (None até o primeiro frame)."""
+		return self._ring
+
+	def start(self) -> None:
+		if self._thread and self._thread.is_alive():
+			return
+		self._stop_event.clear()
+		self._thread = threading.Thread(target=self._run, name="FrameSourceThread", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stop_event.set()
+		with self._cond:
+			self._cond.notify_all()
+		if self._thread and self._thread.is_alive():
+			self._thread.join(timeout=2.0)
+
+	def subscribe(self, name: str = "", max_fps: Optional[float] = None) -> FrameSubscription:
+		sub = FrameSubscription(self, name, max_fps)
+		with self._cond:
+			self._subscribers.append(sub)
+		return sub
+
+	def unsubscribe(self, sub: FrameSubscription) -> None:
+		with self._cond:
+			if sub in self._subscribers:
+				self._subscribers.remove(sub)
+
+	def subscriber_count(self) -> int:
+		with self._cond:
+			return len(self._subscribers)
+
+	def wait_frame(self, after_seq: int, timeout: float) -> Optional[Tuple[int, float, object]]:
+		"""
+		Espera um frame com seq > after_seq. Retorna (seq, timestamp, view) ou None.
+		A view aponta para o ring; use `is_valid(seq)` se precisar conferir
+		depois de um processamento longo.
+		"""
+		with self._cond:
+			if self._retired:
+				self._close_retired()
+			if self._seq <= after_seq and not self._stop_event.is_set():
+				self._cond.wait_for(lambda: self._seq > after_seq or self._stop_event.is_set(), timeout)
+			if self._seq <= after_seq or self._ring is None:
+				return None
+			return self._ring.get(self._seq)
+
+	def is_valid(self, seq: int) -> bool:
+		ring = self._ring
+		return ring is not None and ring.is_valid(seq)
+
+	def set_lens(self, lens) -> None:
+		"""Troca (ou remove, com None) a correção de lente aplicada aos próximos frames."""
+		self._lens = lens
+
+	def get_latest(self, copy: bool = True) -> Optional[Tuple[int, float, object]]:
+		"""Retorna (seq, timestamp, frame) do frame mais recente ou None."""
+		ring = self._ring
+		if ring is None:
+			return None
+		return ring.latest(copy=copy)
+
+	def get_last_frame(self):
+		"""Retorna uma cópia do último frame da câmera (BGR) ou None."""
+		item = self.get_latest(copy=True)
+		return item[2] if item is not None else None
+
+	def _run(self) -> None:
+		cap = open_capture(self._camera_index, self._width, self._height)
+		if cap is None:
+			return
+		self._opened = True
+		try:
+			while not self._stop_event.is_set():
+				ring = self._ring
+				lens = self._lens
+				if lens is not None:
+					# Decodifica num buffer de rascunho e corrige a lente direto no slot do ring
+					ok, raw = cap.read(self._scratch)
+					if not ok or raw is None:
+						time.sleep(0.01)
+						continue
+					self._scratch = raw
+					ts = time.monotonic()
+					if ring is None or ring.shape != tuple(raw.shape):
+						ring = self._create_ring(raw.shape)
+					seq, view = ring.begin_write()
+					lens.remap(raw, dst=view)
+					ring.commit(seq, ts)
+				elif ring is None:
+					ok, frame = cap.read()
+					if not ok or frame is None:
+						time.sleep(0.01)
+						continue
+					# Primeiro frame define o formato do ring
+					ring = self._create_ring(frame.shape)
+					seq = ring.write(frame, time.monotonic())
+				else:
+					seq, view = ring.begin_write()
+					# Decodifica direto no slot do ring (sem alocar um array por frame)
+					ok, frame = cap.read(view)
+					if not ok or frame is None:
+						ring.abort(seq)
+						time.sleep(0.01)
+						continue
+					ts = time.monotonic()
+					if frame.shape != view.shape:
+						# Resolução mudou: recria o ring com o novo formato
+						ring.abort(seq)
+						ring = self._create_ring(frame.shape)
+						seq = ring.write(frame, ts)
+					else:
+						if frame.ctypes.data != view.ctypes.data:
+							np.copyto(view, frame)
+						ring.commit(seq, ts)
+				with self._cond:
+					self._seq = seq
+					self._cond.notify_all()
+		finally:
+			self._opened = False
+			cap.release()
+			with self._cond:
+				self._cond.notify_all()
+
+	def _publish_frame(self, frame: np.ndarray, ts: float) -> int:
+		"""Copia um frame já decodificado para o ring e acorda os assinantes."""
+		ring = self._ring
+		if ring is None or ring.shape != tuple(frame.shape):
+			ring = self._create_ring(frame.shape)
+		lens = self._lens
+		if lens is not None:
+			seq, view = ring.begin_write()
+			lens.remap(frame, dst=view)
+			ring.commit(seq, ts)
+		else:
+			seq = ring.write(frame, ts)
+		with self._cond:
+			self._seq = seq
+			self._cond.notify_all()
+		return seq
+
+	def _delivered(self, sub: FrameSubscription) -> None:
+		"""Gancho chamado após cada entrega a um assinante (usado pelo replay)."""
+		pass
+
+	def _create_ring(self, shape) -> FrameRing:
+		# O seq continua do ring anterior para que os assinantes não percam a sequência
+		ring = FrameRing(tuple(shape), slots=self._ring_slots, start_seq=self._seq)
+		with self._cond:
+			old = self._ring
+			self._ring = ring
+			if old is not None:
+				# Assinantes podem estar processando uma view do ring antigo agora
+				self._retired.append(old)
+				self._close_retired()
+		return ring
+
+	def _close_retired(self) -> None:
+		"""
+		Fecha os rings antigos cujas views já foram soltas por todos os
+		assinantes; os demais ficam para a próxima tentativa (a cada
+		`wait_frame`). Chamado com `_cond` adquirido.
+		"""
+		self._retired = [old for old in self._retired if not old.close()]
+
+	def close(self) -> None:
+		"""Para a captura e libera a memória compartilhada."""
+		self.stop()
+		with self._cond:
+			ring = self._ring
+			self._ring = None
+			retired = self._retired
+			self._retired = []
+		if ring is not None:
+			ring.close()
+		for old in retired:
+			old.close()
@@ -0,0 +1,230 @@
+import math
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+# Valores de `GestureEvent.kind`, que viram o "type" da mensagem no /ws
+GESTURE_KINDS = ("tap", "long_press", "drag", "pinch")
+
+
+@dataclass
+class GestureEvent:
+	"""
+	Gesto reconhecido no espaço da tela projetada (x, y em [0.0, 1.0]).
+	kind: um de GESTURE_KINDS; phase: "start", "move" ou
+	"end" para gestos contínuos.
+	"""
+	kind: str
+	x: float
+	y: float
+	ts: float
+	contact_id: int = 0
+	phase: Optional[str] = None
+	source: str = "detector"
+	extra: Dict[str, Any] = field(default_factory=dict)
+
+	def to_message(self) -> Dict[str, Any]:
+		msg: Dict[str, Any] = {"type": self.kind, "x": self.x, "y": self.y, "source": self.source, "id": self.contact_id, "ts": self.ts}
+		if self.phase is not None:
+			msg["phase"] = self.phase
+		msg.update(self.extra)
+		return msg
+
+
+class _ContactState:
+	def __init__(self, ev: Any, ts: float) -> None:
+		self.last_ev = ev
+		self.id = ev.contact_id
+		self.x0 = self.x = ev.x
+		self.y0 = self.y = ev.y
+		self.t0 = self.ts = ts
+		self.source = ev.source
+		self.dragging = False
+		self.long_fired = False
+		self.multi = False  # participou de um gesto de dois dedos
+		self.up_at: Optional[float] = None
+
+
+class GestureRecognizer:
+	"""
+	Máquina de estados de gestos sobre os contatos down/move/up do TouchDetector.
+
+	- tap: soltou antes de `tap_max_duration` sem andar mais que `tap_max_distance`;
+	- long_press: parado por `long_press` segundos (dispara uma vez, sem soltar);
+	- drag: start/move/end depois de andar mais que `drag_threshold`;
+	- pinch: start/move/end com dois contatos, com escala relativa à distância inicial.
+
+	Por padrão o "up" (e o tap) sai na hora, sem latência extra. Com
+	`up_debounce` > 0 o "up" só é confirmado após esse intervalo; se um novo
+	"down" aparecer perto (`rejoin_distance`) antes disso, o contato continua.
+	Só vale a pena com um motor que reemita "down" em poucos ms (o TouchEngine
+	exige alguns frames parados) e com valores de poucos ms; o chamador deve
+	chamar `poll` até `next_deadline`. Moves menores que `move_epsilon` são
+	descartados.
+
+	Distâncias em unidades normalizadas da tela; tempos em segundos, no mesmo
+	relógio dos eventos (time.monotonic). `feed` e `poll` fazem só aritmética
+	sobre poucos contatos: o custo fica na casa dos microssegundos.
+	"""
+	def __init__(
+		self,
+		tap_max_duration: float = 0.35,
+		tap_max_distance: float = 0.015,
+		long_press: float = 0.6,
+		drag_threshold: float = 0.02,
+		up_debounce: float = 0.0,
+		rejoin_distance: float = 0.03,
+		move_epsilon: float = 0.002,
+	) -> None:
+		self.tap_max_duration = tap_max_duration
+		self.tap_max_distance = tap_max_distance
+		self.long_press = long_press
+		self.drag_threshold = drag_threshold
+		self.up_debounce = up_debounce
+		self.rejoin_distance = rejoin_distance
+		self.move_epsilon = move_epsilon
+		self._contacts: Dict[int, _ContactState] = {}
+		self._alias: Dict[int, int] = {}  # id novo -> contato retomado pelo debounce
+		self._pinch: Optional[tuple] = None  # (id_a, id_b, distância inicial)
+
+	def feed(self, ev: Any) -> List[Any]:
+		"""
+		Processa um TouchEvent e retorna os eventos a publicar (o próprio
+		evento de contato, se for relevante, seguido dos gestos).
+		Eventos com phase "tap" (modo teste) passam direto.
+		"""
+		ts = ev.ts or time.monotonic()
+		phase = ev.phase
+		if phase == "tap":
+			return [ev]
+		out: List[Any] = []
+		cid = self._alias.get(ev.contact_id, ev.contact_id)
+		if phase == "down":
+			revived = self._rejoin(ev.x, ev.y, ts)
+			if revived is not None:
+				self._alias[ev.contact_id] = revived.id
+				revived.up_at = None
+				return self._move(revived, ev, ts, out)
+			state = _ContactState(ev, ts)
+			self._contacts[ev.contact_id] = state
+			out.append(ev)
+			self._maybe_start_pinch(ts, out)
+			return out
+		state = self._contacts.get(cid)
+		if state is None:
+			return out
+		if phase == "move":
+			return self._move(state, ev, ts, out)
+		if phase == "up":
+			state.x, state.y, state.ts = ev.x, ev.y, ts
+			state.last_ev = ev
+			if self.up_debounce > 0.0:
+				state.up_at = ts
+			else:
+				self._finish(state, ts, out)
+		return out
+
+	def poll(self, now: Optional[float] = None) -> List[Any]:
+		"""Confirma "up" pendentes e dispara long-press; chamar a cada frame e em `next_deadline`."""
+		now = time.monotonic() if now is None else now
+		out: List[Any] = []
+		for state in list(self._contacts.values()):
+			if state.up_at is not None:
+				# Mesma conta de next_deadline: acordar no prazo já confirma
+				if now >= state.up_at + self.up_debounce:
+					self._finish(state, state.up_at, out)
+				continue
+			if state.long_fired or state.dragging or state.multi:
+				continue
+			if now >= state.t0 + self.long_press:
+				state.long_fired = True
+				out.append(GestureEvent("long_press", state.x, state.y, now, state.id, source=state.source))
+		return out
+
+	def next_deadline(self) -> Optional[float]:
+		"""Instante do próximo "up" pendente ou long-press (para agendar o `poll`)."""
+		deadlines = []
+		for state in self._contacts.values():
+			if state.up_at is not None:
+				deadlines.append(state.up_at + self.up_debounce)
+			elif not (state.long_fired or state.dragging or state.multi):
+				deadlines.append(state.t0 + self.long_press)
+		return min(deadlines) if deadlines else None
+
+	def reset(self) -> None:
+		self._contacts.clear()
+		self._alias.clear()
+		self._pinch = None
+
+	def _active(self) -> List[_ContactState]:
+		return [s for s in self._contacts.values() if s.up_at is None]
+
+	def _rejoin(self, x: float, y: float, ts: float) -> Optional[_ContactState]:
+		for state in self._contacts.values():
+			if state.up_at is None or ts - state.up_at > self.up_debounce:
+				continue
+			if math.hypot(x - state.x, y - state.y) <= self.rejoin_distance:
+				return state
+		return None
+
+	def _move(self, state: _ContactState, ev: Any, ts: float, out: List[Any]) -> List[Any]:
+		dx = ev.x - state.x
+		dy = ev.y - state.y
+		if abs(dx) < self.move_epsilon and abs(dy) < self.move_epsilon:
+			return out
+		state.x, state.y, state.ts = ev.x, ev.y, ts
+		ev.contact_id = state.id
+		ev.phase = "move"
+		state.last_ev = ev
+		out.append(ev)
+		if self._pinch is not None and state.id in self._pinch[:2]:
+			self._emit_pinch("move", ts, out)
+			return out
+		if state.multi:
+			return out
+		if not state.dragging and math.hypot(ev.x - state.x0, ev.y - state.y0) > self.drag_threshold:
+			state.dragging = True
+			out.append(GestureEvent("drag", state.x0, state.y0, ts, state.id, phase="start", source=state.source))
+		if state.dragging:
+			out.append(GestureEvent("drag", state.x, state.y, ts, state.id, phase="move", source=state.source, extra={"dx": dx, "dy": dy}))
+		return out
+
+	def _maybe_start_pinch(self, ts: float, out: List[Any]) -> None:
+		active = self._active()
+		if self._pinch is not None or len(active) != 2:
+			return
+		a, b = active
+		for s in (a, b):
+			# Um arrasto em andamento vira pinça
+			if s.dragging:
+				out.append(GestureEvent("drag", s.x, s.y, ts, s.id, phase="end", source=s.source))
+				s.dragging = False
+			s.multi = True
+		self._pinch = (a.id, b.id, max(1e-6, math.hypot(a.x - b.x, a.y - b.y)))
+		self._emit_pinch("start", ts, out)
+
+	def _emit_pinch(self, phase: str, ts: float, out: List[Any]) -> None:
+		ida, idb, d0 = self._pinch
+		a = self._contacts[ida]
+		b = self._contacts[idb]
+		d = math.hypot(a.x - b.x, a.y - b.y)
+		out.append(GestureEvent(
+			"pinch", (a.x + b.x) * 0.5, (a.y + b.y) * 0.5, ts, ida, phase=phase, source=a.source,
+			extra={"scale": d / d0, "distance": d},
+		))
+
+	def _finish(self, state: _ContactState, ts: float, out: List[Any]) -> None:
+		# O "up" sai antes do gesto, como pointerup antes de click no navegador
+		out.append(replace(state.last_ev, x=state.x, y=state.y, phase="up", contact_id=state.id, ts=ts))
+		if self._pinch is not None and state.id in self._pinch[:2]:
+			self._emit_pinch("end", ts, out)
+			self._pinch = None
+		elif state.dragging:
+			out.append(GestureEvent("drag", state.x, state.y, ts, state.id, phase="end", source=state.source))
+		elif not state.multi and not state.long_fired:
+			moved = math.hypot(state.x - state.x0, state.y - state.y0)
+			if ts - state.t0 <= self.tap_max_duration and moved <= self.tap_max_distance:
+				out.append(GestureEvent("tap", state.x, state.y, ts, state.id, source=state.source))
+		del self._contacts[state.id]
+		for k in [k for k, v in self._alias.items() if v == state.id]:
+			del self._alias[k]
@@ -0,0 +1,214 @@
+import ast
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .object_detector import YOLO, DetectedObject, parse_results
+
+try:
+	import cv2  # type: ignore
+except Exception:
+	cv2 = None
+
+try:
+	import onnxruntime as ort  # type: ignore
+except Exception:
+	ort = None
+
+# Modelos exportados (ONNX / OpenVINO) ficam em cache aqui para não reexportar a cada start
+MODEL_CACHE_DIR = Path(__file__).resolve().parent / "models"
+
+BACKEND_NAMES = ("torch", "onnx", "onnx-int8", "openvino")
+
+
+class InferenceBackend(ABC):
+	"""
+	Interface comum dos backends de inferência.
+	`predict` recebe um frame BGR e retorna DetectedObject com coords
+	normalizadas [0..1] ao frame recebido. Um backend sem `load` ou `predict`
+	falha já ao ser instanciado. O mesmo backend pode ser compartilhado
+	(ModelRegistry): quem precisa de outro limiar passa `min_confidence` na
+	chamada em vez de alterar o atributo.
+	"""
+	name = "base"
+
+	def __init__(self, model_name: str, min_confidence: float = 0.5, imgsz: int = 640) -> None:
+		self.model_name = model_name
+		self.min_confidence = min_confidence
+		self.imgsz = imgsz
+
+	@abstractmethod
+	def load(self) -> bool:
+		"""Carrega (e exporta, se preciso) o modelo; False se indisponível."""
+
+	@abstractmethod
+	def predict(self, frame: np.ndarray, min_confidence: Optional[float] = None) -> List[DetectedObject]:
+		"""Detecções no frame BGR, com coords normalizadas [0..1]."""
+
+	def _threshold(self, min_confidence: Optional[float]) -> float:
+		return self.min_confidence if min_confidence is None else float(min_confidence)
+
+
+class UltralyticsBackend(InferenceBackend):
+	"""PyTorch via Ultralytics (comportamento original)."""
+	name = "torch"
+
+	def __init__(self, model_name: str, min_confidence: float = 0.5, imgsz: int = 640) -> None:
+		super().__init__(model_name, min_confidence, imgsz)
+		self._model = None
+
+	def load(self) -> bool:
+		if YOLO is None:
+			return False
+		try:
+			self._model = YOLO(self.model_name)
+		except Exception:
+			return False
+		return True
+
+	def predict(self, frame: np.ndarray, min_confidence: Optional[float] = None) -> List[DetectedObject]:
+		results = self._model(frame, verbose=False)
+		h, w = frame.shape[:2]
+		return parse_results(results, w, h, self._threshold(min_confidence))
+
+
+class OpenVinoBackend(UltralyticsBackend):
+	"""Exporta uma vez para OpenVINO (cache em disco) e roda pelo Ultralytics."""
+	name = "openvino"
+
+	def load(self) -> bool:
+		if YOLO is None:
+			return False
+		target = MODEL_CACHE_DIR / f"{Path(self.model_name).stem}-{self.imgsz}_openvino_model"
+		try:
+			if not target.exists():
+				exported = Path(YOLO(self.model_name).export(format="openvino", imgsz=self.imgsz))
+				MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+				exported.rename(target)
+			self._model = YOLO(str(target), task="detect")
+		except Exception:
+			return False
+		return True
+
+
+class OnnxBackend(InferenceBackend):
+	"""
+	ONNX Runtime em CPU. Exporta o modelo uma vez para ONNX (cache em disco)
+	e, com `int8=True`, gera também uma versão com quantização dinâmica INT8.
+	Pré e pós-processamento (letterbox, NMS) são feitos aqui com NumPy/OpenCV.
+	"""
+	name = "onnx"
+
+	def __init__(self, model_name: str, min_confidence: float = 0.5, imgsz: int = 640, int8: bool = False, iou_threshold: float = 0.45) -> None:
+		super().__init__(model_name, min_confidence, imgsz)
+		self.int8 = int8
+		self.iou_threshold = iou_threshold
+		self._session = None
+		self._input_name = ""
+		self._names: Dict[int, str] = {}
+		if int8:
+			self.name = "onnx-int8"
+
+	def onnx_path(self) -> Path:
+		suffix = "-int8" if self.int8 else ""
+		return MODEL_CACHE_DIR / f"{Path(self.model_name).stem}-{self.imgsz}{suffix}.onnx"
+
+	def _ensure_exported(self) -> Optional[Path]:
+		fp32 = MODEL_CACHE_DIR / f"{Path(self.model_name).stem}-{self.imgsz}.onnx"
+		if Path(self.model_name).suffix == ".onnx":
+			fp32 = Path(self.model_name)
+		if not fp32.exists():
+			if YOLO is None:
+				return None
+			exported = Path(YOLO(self.model_name).export(format="onnx", imgsz=self.imgsz, dynamic=False, simplify=True))
+			MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+			exported.rename(fp32)
+		if not self.int8:
+			return fp32
+		int8 = self.onnx_path()
+		if not int8.exists():
+			from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+			quantize_dynamic(str(fp32), str(int8), weight_type=QuantType.QUInt8)
+		return int8
+
+	def load(self) -> bool:
+		if ort is None or cv2 is None:
+			return False
+		try:
+			path = self._ensure_exported()
+			if path is None:
+				return False
+			opts = ort.SessionOptions()
+			opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+			self._session = ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+			self._input_name = self._session.get_inputs()[0].name
+			# O Ultralytics grava os nomes das classes nos metadados do ONNX
+			meta = self._session.get_modelmeta().custom_metadata_map
+			if "names" in meta:
+				self._names = {int(k): str(v) for k, v in ast.literal_eval(meta["names"]).items()}
+		except Exception:
+			self._session = None
+			return False
+		return True
+
+	def _letterbox(self, frame: np.ndarray):
+		h, w = frame.shape[:2]
+		r = min(self.imgsz / h, self.imgsz / w)
+		nw, nh = int(round(w * r)), int(round(h * r))
+		px, py = (self.imgsz - nw) // 2, (self.imgsz - nh) // 2
+		canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+		canvas[py:py + nh, px:px + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+		blob = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) * (1.0 / 255.0)
+		return np.ascontiguousarray(blob), r, px, py
+
+	def predict(self, frame: np.ndarray, min_confidence: Optional[float] = None) -> List[DetectedObject]:
+		threshold = self._threshold(min_confidence)
+		h, w = frame.shape[:2]
+		blob, r, px, py = self._letterbox(frame)
+		out = self._session.run(None, {self._input_name: blob})[0]
+		# Saída YOLOv8: (1, 4 + classes, N) com caixas cx, cy, w, h
+		pred = out[0].T
+		scores = pred[:, 4:]
+		cls = scores.argmax(axis=1)
+		conf = scores[np.arange(scores.shape[0]), cls]
+		keep = conf >= threshold
+		if not keep.any():
+			return []
+		pred, cls, conf = pred[keep], cls[keep], conf[keep]
+		xywh = pred[:, :4].copy()
+		xywh[:, 0] -= xywh[:, 2] * 0.5
+		xywh[:, 1] -= xywh[:, 3] * 0.5
+		# NMS por classe: desloca as caixas de cada classe para não se sobreporem
+		offset = (cls.astype(np.float32) * 4096.0)[:, None]
+		nms_boxes = xywh.copy()
+		nms_boxes[:, :2] += offset
+		idx = cv2.dnn.NMSBoxes(nms_boxes.tolist(), conf.astype(float).tolist(), threshold, self.iou_threshold)
+		idx = np.array(idx, dtype=int).reshape(-1)
+		if idx.size == 0:
+			return []
+		boxes = xywh[idx]
+		x1 = (boxes[:, 0] - px) / r
+		y1 = (boxes[:, 1] - py) / r
+		x2 = x1 + boxes[:, 2] / r
+		y2 = y1 + boxes[:, 3] / r
+		norm = np.clip(np.stack([x1 / w, y1 / h, x2 / w, y2 / h], axis=1), 0.0, 1.0).tolist()
+		return [
+			DetectedObject(
+				label=self._names.get(int(c), str(int(c))),
+				confidence=float(s),
+				x1=b[0], y1=b[1], x2=b[2], y2=b[3],
+			) for b, c, s in zip(norm, cls[idx].tolist(), conf[idx].tolist())
+		]
+
+
+def create_backend(name: str, model_name: str, min_confidence: float = 0.5, imgsz: int = 640) -> InferenceBackend:
+	"""Seletor de backend: "torch", "onnx", "onnx-int8" ou "openvino"."""
+	if name == "onnx":
+		return OnnxBackend(model_name, min_confidence, imgsz)
+	if name == "onnx-int8":
+		return OnnxBackend(model_name, min_confidence, imgsz, int8=True)
+	if name == "openvino":
+		return OpenVinoBackend(model_name, min_confidence, imgsz)
+	return UltralyticsBackend(model_name, min_confidence, imgsz)
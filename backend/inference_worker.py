@@ -0,0 +1,248 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _worker_main(worker_id: int, model_name: str, min_confidence: float, backend_name: str, requests, results) -> None:
+	"""
+	Loop de um processo de inferência.
+	Recebe (req_id, ring_name, seq, roi) e devolve (req_id, objects | None, infer_s).
+	O frame é lido direto do FrameRing (memória compartilhada), sem pickle.
+	"""
+	# Imports locais: só o processo filho carrega torch/ultralytics
+	from .frame_ring import FrameRing
+	from .inference_backends import create_backend
+	from .model_registry import warmup
+
+	model = create_backend(backend_name, model_name, min_confidence)
+	if model.load():
+		# Primeira inferência é lenta: paga o custo antes de anunciar "ready"
+		warmup(model)
+	else:
+		model = None
+	results.put(("ready", worker_id, model is not None))
+	ring: Optional[FrameRing] = None
+	try:
+		while True:
+			req = requests.get()
+			if req is None:
+				break
+			req_id, ring_name, seq, roi = req
+			if model is None:
+				results.put((req_id, None, 0.0))
+				continue
+			try:
+				if ring is None or ring.name != ring_name:
+					if ring is not None:
+						# Solta as views do frame anterior antes de desmapear o ring antigo
+						item = frame = None
+						ring.close()
+					ring = FrameRing.attach(ring_name)
+				item = ring.get(seq)
+				if item is None:
+					# Frame já sobrescrito no ring: descarta
+					results.put((req_id, None, 0.0))
+					continue
+				frame = item[2]
+				if roi is not None:
+					# Coords retornadas ficam normalizadas ao recorte
+					frame = frame[roi[1]:roi[3], roi[0]:roi[2]]
+				t0 = time.perf_counter()
+				objects = model.predict(frame)
+				infer_s = time.perf_counter() - t0
+				if not ring.is_valid(seq):
+					# Slot sobrescrito durante o predict (view sem cópia): resultado não confiável
+					results.put((req_id, None, infer_s))
+					continue
+				results.put((req_id, objects, infer_s))
+			except Exception:
+				results.put((req_id, None, 0.0))
+	finally:
+		if ring is not None:
+			ring.close()
+
+
+class InferencePool:
+	"""
+	Pool de processos de inferência YOLO (qualquer backend de inference_backends).
+	O servidor envia apenas (nome do ring, seq) por uma fila; os workers leem o
+	frame da memória compartilhada e devolvem a lista de DetectedObject.
+	Assim o trabalho pesado do torch e o pós-processamento ficam fora do GIL
+	do processo do uvicorn.
+	Mais de um worker só ajuda com chamadores concorrentes de `infer`; o
+	ObjectDetector espera cada resultado antes do próximo frame e usa um só.
+	Workers que morrem ou não carregam o modelo são detectados: quando não
+	sobra nenhum, `state` vira "failed", `error` explica o motivo e `infer`
+	retorna None na hora em vez de esperar para sempre.
+	"""
+	def __init__(self, model_name: str, min_confidence: float = 0.5, workers: int = 1, timeout: float = 5.0, backend: str = "torch") -> None:
+		self._model_name = model_name
+		self._backend = backend
+		self._min_conf = min_confidence
+		self._workers = max(1, int(workers))
+		self._timeout = timeout
+		self._ctx = multiprocessing.get_context("spawn")
+		self._requests = None
+		self._results = None
+		self._procs: List[Any] = []
+		self._ids = itertools.count(1)
+		self._pending: Dict[int, list] = {}
+		self._lock = threading.Lock()
+		self._dispatcher: Optional[threading.Thread] = None
+		self._stop_event = threading.Event()
+		# Estado por worker: "loading", "ready", "load_failed" ou "dead"
+		self._worker_states: List[str] = []
+		self.ready_workers = 0
+		self.error: Optional[str] = None
+		self.completed = 0
+		self.failed = 0
+
+	def start(self) -> None:
+		if self._procs:
+			return
+		self._stop_event.clear()
+		self._worker_states = ["loading"] * self._workers
+		self.ready_workers = 0
+		self.error = None
+		self._requests = self._ctx.Queue()
+		self._results = self._ctx.Queue()
+		for i in range(self._workers):
+			p = self._ctx.Process(
+				target=_worker_main,
+				args=(i, self._model_name, self._min_conf, self._backend, self._requests, self._results),
+				name=f"InferenceWorker-{i}",
+				daemon=True,
+			)
+			p.start()
+			self._procs.append(p)
+		self._dispatcher = threading.Thread(target=self._dispatch, name="InferencePoolDispatcher", daemon=True)
+		self._dispatcher.start()
+
+	def stop(self) -> None:
+		self._stop_event.set()
+		if self._requests is not None:
+			for _ in self._procs:
+				try:
+					self._requests.put(None)
+				except Exception:
+					pass
+		for p in self._procs:
+			p.join(timeout=2.0)
+			if p.is_alive():
+				p.terminate()
+		self._procs = []
+		if self._dispatcher and self._dispatcher.is_alive():
+			self._dispatcher.join(timeout=1.0)
+		# Libera chamadores que ainda aguardam
+		with self._lock:
+			for slot in self._pending.values():
+				slot[0].set()
+			self._pending.clear()
+
+	def infer(self, ring_name: str, seq: int, timeout: Optional[float] = None, roi: Optional[tuple] = None):
+		"""
+		Envia o frame `seq` do ring para inferência e bloqueia até o resultado.
+		Com `roi` (x1, y1, x2, y2 em pixels), infere só no recorte.
+		Retorna List[DetectedObject] ou None (erro, timeout ou frame descartado).
+		"""
+		if not self._procs or self._requests is None:
+			return None
+		if self.ready_workers == 0:
+			self._check_workers()
+			if self.error is None:
+				# Workers ainda carregando o modelo
+				time.sleep(0.1)
+			return None
+		req_id = next(self._ids)
+		slot = [threading.Event(), None]
+		with self._lock:
+			self._pending[req_id] = slot
+		self._requests.put((req_id, ring_name, seq, roi))
+		if not slot[0].wait(self._timeout if timeout is None else timeout):
+			with self._lock:
+				self._pending.pop(req_id, None)
+			self.failed += 1
+			return None
+		return slot[1]
+
+	def _dispatch(self) -> None:
+		while not self._stop_event.is_set():
+			try:
+				msg = self._results.get(timeout=0.5)
+			except queue.Empty:
+				self._check_workers()
+				continue
+			except Exception:
+				break
+			if msg[0] == "ready":
+				self._set_worker_state(msg[1], "ready" if msg[2] else "load_failed")
+				continue
+			req_id, objects, _ = msg
+			with self._lock:
+				slot = self._pending.pop(req_id, None)
+			if objects is None:
+				self.failed += 1
+			else:
+				self.completed += 1
+			if slot is not None:
+				slot[1] = objects
+				slot[0].set()
+
+	def _check_workers(self) -> None:
+		"""Marca como "dead" os workers cujo processo terminou."""
+		if self._stop_event.is_set():
+			return
+		for i, p in enumerate(self._procs):
+			if self._worker_states[i] in ("loading", "ready") and not p.is_alive():
+				self._set_worker_state(i, "dead", p.exitcode)
+
+	def _set_worker_state(self, worker_id: int, state: str, exitcode: Optional[int] = None) -> None:
+		pending: list = []
+		with self._lock:
+			self._worker_states[worker_id] = state
+			self.ready_workers = self._worker_states.count("ready")
+			failed_now = self.error is None and self.ready_workers + self._worker_states.count("loading") == 0
+			if failed_now:
+				if "load_failed" in self._worker_states:
+					self.error = f"falha ao carregar o modelo {self._model_name} ({self._backend})"
+				else:
+					self.error = f"workers de inferência encerrados (exitcode={exitcode})"
+				# Sem workers vivos, ninguém responde: libera quem ainda aguarda
+				pending = list(self._pending.values())
+				self._pending.clear()
+		if state == "load_failed":
+			print(f"[Backend] InferenceWorker-{worker_id}: falha ao carregar {self._model_name} ({self._backend})")
+		elif state == "dead":
+			print(f"[Backend] InferenceWorker-{worker_id} encerrou inesperadamente (exitcode={exitcode})")
+		if failed_now:
+			print(f"[Backend] InferencePool indisponível: {self.error}")
+		for slot in pending:
+			slot[0].set()
+
+	@property
+	def is_ready(self) -> bool:
+		return self.ready_workers > 0
+
+	@property
+	def state(self) -> str:
+		""""stopped", "loading", "ready" ou "failed" (nenhum worker utilizável)."""
+		if not self._procs:
+			return "stopped"
+		if self.error is not None:
+			return "failed"
+		return "ready" if self.ready_workers > 0 else "loading"
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"backend": self._backend,
+			"state": self.state,
+			"error": self.error,
+			"workers": len(self._procs),
+			"ready_workers": self.ready_workers,
+			"worker_states": list(self._worker_states),
+			"completed": self.completed,
+			"failed": self.failed,
+		}
@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Um registro por toque/gesto e um por objeto detectado (os objetos do mesmo
+# frame compartilham `seq`). Tempos em time.monotonic() do servidor; NaN = ausente.
+RECORD_DTYPE = np.dtype([
+	("t_capture", "<f8"),  # captura do frame (ts da mensagem)
+	("t_emit", "<f8"),     # entrada na fila de eventos
+	("t_sent", "<f8"),     # broadcast
+	("seq", "<u4"),        # seq do broadcast (ver backend/connections.py)
+	("kind", "u1"),        # índice em KINDS
+	("phase", "u1"),       # índice em PHASES
+	("contact_id", "<i4"), # id do contato ou track_id (-1 = sem)
+	("x", "<f4"),          # toque: ponto; detecção: x1
+	("y", "<f4"),          # toque: ponto; detecção: y1
+	("x2", "<f4"),
+	("y2", "<f4"),
+	("confidence", "<f4"), # detecção: confiança; pinça: escala
+	("label", "S16"),
+])
+KINDS = ("other", "tap", "touch", "long_press", "drag", "pinch", "detections")
+PHASES = ("", "down", "move", "up", "start", "end")
+_KIND_INDEX = {k: i for i, k in enumerate(KINDS)}
+_PHASE_INDEX = {p: i for i, p in enumerate(PHASES)}
+
+MAGIC = b"AXJ1"
+SEGMENT_SUFFIX = ".axj"
+_NAN = float("nan")
+
+
+def _header_bytes() -> bytes:
+	meta = json.dumps({"dtype": RECORD_DTYPE.descr, "kinds": KINDS, "phases": PHASES}).encode("utf-8")
+	# Registros começam alinhados a 8 bytes
+	meta += b" " * (-(len(MAGIC) + 4 + len(meta)) % 8)
+	return MAGIC + struct.pack("<I", len(meta)) + meta
+
+
+def _f(v: Any) -> float:
+	return _NAN if v is None else float(v)
+
+
+def message_records(message: Dict[str, Any], t_emit: float) -> List[Tuple]:
+	"""Converte uma mensagem do worker de eventos em tuplas de RECORD_DTYPE."""
+	kind = str(message.get("type") or "other")
+	k = _KIND_INDEX.get(kind, 0)
+	base = (_f(message.get("ts")), t_emit, _f(message.get("t_sent")), int(message.get("seq") or 0) & 0xFFFFFFFF)
+	if kind == "detections":
+		objects = message.get("objects") or ()
+		if not objects:
+			# Frame sem objetos: um registro marcador (sem id, caixa NaN, label
+			# vazio) preserva o instante e a latência desse broadcast
+			return [base + (k, 0, -1, _NAN, _NAN, _NAN, _NAN, _NAN, b"")]
+		out = []
+		for o in objects:
+			tid = o.get("track_id")
+			out.append(base + (
+				k, 0, -1 if tid is None else int(tid),
+				o["x1"], o["y1"], o["x2"], o["y2"], o["confidence"],
+				str(o.get("label", ""))[:16].encode("utf-8", "ignore")[:16],
+			))
+		return out
+	cid = message.get("id")
+	return [base + (
+		k, _PHASE_INDEX.get(str(message.get("phase") or ""), 0), -1 if cid is None else int(cid),
+		_f(message.get("x")), _f(message.get("y")), _NAN, _NAN, _f(message.get("scale")),
+		str(message.get("source") or "")[:16].encode("utf-8", "ignore")[:16],
+	)]
+
+
+class JournalWriter:
+	"""
+	Diário binário, só de acréscimo, dos toques e detecções que passam pelo
+	worker de eventos. `append` roda no loop e só converte a mensagem em tuplas;
+	a gravação acontece em lote numa thread (asyncio.to_thread) a cada
+	`flush_interval` ou `batch_size` registros. Os segmentos giram ao passar
+	de `max_segment_bytes`; só os `keep_segments` mais recentes são mantidos.
+	"""
+	def __init__(
+		self,
+		directory: Path,
+		max_segment_bytes: int = 64 << 20,
+		keep_segments: int = 32,
+		flush_interval: float = 0.5,
+		batch_size: int = 4096,
+		max_pending: int = 200_000,
+	) -> None:
+		self.directory = Path(directory)
+		self.max_segment_bytes = max_segment_bytes
+		self.keep_segments = keep_segments
+		self.flush_interval = flush_interval
+		self.batch_size = batch_size
+		self.max_pending = max_pending
+		self._pending: List[Tuple] = []
+		self._wakeup: Optional[asyncio.Event] = None
+		self._task: Optional[asyncio.Task] = None
+		self._closing = False
+		self._file = None
+		self._segment: Optional[Path] = None
+		self._segment_bytes = 0
+		self._segment_count = 0
+		self._io_lock = threading.Lock()
+		self.records = 0
+		self.dropped = 0
+		self.flushes = 0
+		self.write_errors = 0
+
+	def start(self) -> None:
+		self.directory.mkdir(parents=True, exist_ok=True)
+		self._wakeup = asyncio.Event()
+		self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		# Sem cancel(): a tarefa grava o que restou e sai sozinha (um cancel
+		# concorrente com o wakeup pode se perder dentro de wait_for)
+		task, self._task = self._task, None
+		if task is not None:
+			self._closing = True
+			self._wakeup.set()
+			await task
+		with self._io_lock:
+			self._close_file()
+
+	def append(self, message: Dict[str, Any], t_emit: float) -> None:
+		if self._task is None:
+			return
+		records = message_records(message, t_emit)
+		if len(self._pending) + len(records) > self.max_pending:
+			# Disco parado: descarta em vez de crescer a memória sem limite
+			self.dropped += len(records)
+			return
+		self._pending.extend(records)
+		if len(self._pending) >= self.batch_size:
+			self._wakeup.set()
+
+	def _take(self) -> List[Tuple]:
+		pending, self._pending = self._pending, []
+		return pending
+
+	async def _run(self) -> None:
+		while not self._closing:
+			try:
+				await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+			except asyncio.TimeoutError:
+				pass
+			self._wakeup.clear()
+			batch = self._take()
+			if batch:
+				await asyncio.to_thread(self._write, batch)
+		# Ao parar: o que chegou durante a última gravação (ou antes de a tarefa rodar)
+		batch = self._take()
+		if batch:
+			await asyncio.to_thread(self._write, batch)
+
+	def _write(self, batch: List[Tuple]) -> None:
+		if not batch:
+			return
+		try:
+			data = np.array(batch, dtype=RECORD_DTYPE).tobytes()
+			with self._io_lock:
+				if self._file is None or self._segment_bytes + len(data) > self.max_segment_bytes:
+					self._rotate()
+				self._file.write(data)
+				self._file.flush()
+				self._segment_bytes += len(data)
+			self.records += len(batch)
+			self.flushes += 1
+		except Exception:
+			self.write_errors += 1
+
+	def _rotate(self) -> None:
+		self._close_file()
+		# Contador no nome: duas rotações no mesmo segundo não colidem
+		self._segment_count += 1
+		name = time.strftime("segment-%Y%m%d-%H%M%S") + f"-{os.getpid()}-{self._segment_count:05d}{SEGMENT_SUFFIX}"
+		self._segment = self.directory / name
+		self._file = open(self._segment, "ab")
+		header = _header_bytes()
+		self._file.write(header)
+		self._segment_bytes = len(header)
+		for old in list_segments(self.directory)[:-self.keep_segments]:
+			try:
+				old.unlink()
+			except OSError:
+				pass
+
+	def _close_file(self) -> None:
+		# Chamado com _io_lock adquirido
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"directory": str(self.directory),
+			"segment": self._segment.name if self._segment is not None else None,
+			"records": self.records,
+			"pending": len(self._pending),
+			"dropped": self.dropped,
+			"flushes": self.flushes,
+			"write_errors": self.write_errors,
+		}
+
+
+def list_segments(directory: Path) -> List[Path]:
+	"""Segmentos em ordem cronológica (o nome carrega a data)."""
+	directory = Path(directory)
+	if not directory.exists():
+		return []
+	return sorted(directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+
+def open_segment(path: Path) -> np.ndarray:
+	"""
+	Mapeia um segmento em memória como array estruturado (RECORD_DTYPE), sem
+	copiar. Um registro final incompleto (gravação interrompida) é ignorado.
+	"""
+	path = Path(path)
+	with open(path, "rb") as f:
+		head = f.read(len(MAGIC) + 4)
+		if head[:4] != MAGIC:
+			raise ValueError(f"{path} não é um segmento do diário")
+		(meta_len,) = struct.unpack("<I", head[4:])
+	offset = len(MAGIC) + 4 + meta_len
+	count = (path.stat().st_size - offset) // RECORD_DTYPE.itemsize
+	if count <= 0:
+		return np.empty(0, dtype=RECORD_DTYPE)
+	return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+
+
+def load(directory: Path, kinds: Optional[Sequence[str]] = None) -> np.ndarray:
+	"""Concatena todos os segmentos (opcionalmente só alguns `kinds`) num array em memória."""
+	parts = [open_segment(p) for p in list_segments(directory)]
+	parts = [p for p in parts if len(p)]
+	if not parts:
+		return np.empty(0, dtype=RECORD_DTYPE)
+	data = np.concatenate(parts)
+	if kinds:
+		data = data[np.isin(data["kind"], [_KIND_INDEX[k] for k in kinds if k in _KIND_INDEX])]
+	return data
+
+
+def summary(data: np.ndarray) -> Dict[str, Any]:
+	"""Contagem por tipo e percentis de captura -> broadcast (ms)."""
+	out: Dict[str, Any] = {}
+	for i, kind in enumerate(KINDS):
+		sel = data[data["kind"] == i]
+		if not len(sel):
+			continue
+		if kind == "detections":
+			# Um broadcast por frame: usa só o primeiro objeto de cada seq
+			_, first = np.unique(sel["seq"], return_index=True)
+			frames = sel[first]
+		else:
+			frames = sel
+		lat = (frames["t_sent"] - frames["t_capture"]) * 1000.0
+		lat = lat[np.isfinite(lat)]
+		entry: Dict[str, Any] = {"records": int(len(sel)), "events": int(len(frames))}
+		if len(lat):
+			p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+			entry.update({"p50_ms": round(float(p50), 3), "p90_ms": round(float(p90), 3), "p99_ms": round(float(p99), 3)})
+		if kind == "detections":
+			# Marcadores de frame vazio não têm label
+			labels, counts = np.unique(sel["label"][sel["label"] != b""], return_counts=True)
+			entry["labels"] = {l.decode("utf-8", "ignore"): int(c) for l, c in zip(labels, counts)}
+		out[kind] = entry
+	return out
@@ -0,0 +1,95 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Limites dos buckets em ms (escala logarítmica de 50 µs a 10 s)
+_EDGES_MS: List[float] = np.geomspace(0.05, 10000.0, 64).tolist()
+
+
+class LatencyHistogram:
+	"""
+	Histograma de latência com buckets logarítmicos fixos. `record` custa um
+	bisect sobre 64 limites; percentis são aproximados pelo limite superior
+	do bucket (erro relativo de ~20%).
+	"""
+	def __init__(self) -> None:
+		self.counts = [0] * (len(_EDGES_MS) + 1)
+		self.count = 0
+		self.total_ms = 0.0
+		self.min_ms: Optional[float] = None
+		self.max_ms: Optional[float] = None
+
+	def record(self, ms: float) -> None:
+		self.counts[bisect.bisect_left(_EDGES_MS, ms)] += 1
+		self.count += 1
+		self.total_ms += ms
+		if self.min_ms is None or ms < self.min_ms:
+			self.min_ms = ms
+		if self.max_ms is None or ms > self.max_ms:
+			self.max_ms = ms
+
+	def percentile(self, p: float) -> Optional[float]:
+		if self.count == 0:
+			return None
+		target = self.count * p / 100.0
+		acc = 0
+		for i, c in enumerate(self.counts):
+			acc += c
+			if acc >= target and c:
+				return min(_EDGES_MS[i], self.max_ms) if i < len(_EDGES_MS) else self.max_ms
+		return self.max_ms
+
+	def snapshot(self) -> Dict[str, Any]:
+		def _r(v: Optional[float]) -> Optional[float]:
+			return None if v is None else round(v, 3)
+		return {
+			"count": self.count,
+			"mean_ms": _r(self.total_ms / self.count) if self.count else None,
+			"min_ms": _r(self.min_ms),
+			"p50_ms": _r(self.percentile(50)),
+			"p90_ms": _r(self.percentile(90)),
+			"p99_ms": _r(self.percentile(99)),
+			"max_ms": _r(self.max_ms),
+		}
+
+
+class LatencyMonitor:
+	"""
+	Histogramas por estágio do pipeline (nomes como "touch.produce",
+	"detections.handoff", "ws.send"). Pode ser chamado de qualquer thread.
+	"""
+	def __init__(self) -> None:
+		self._hists: Dict[str, LatencyHistogram] = {}
+		self._lock = threading.Lock()
+
+	def record(self, stage: str, seconds: float) -> None:
+		if seconds < 0:
+			return
+		with self._lock:
+			hist = self._hists.get(stage)
+			if hist is None:
+				hist = self._hists[stage] = LatencyHistogram()
+			hist.record(seconds * 1000.0)
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {stage: h.snapshot() for stage, h in sorted(self._hists.items())}
+
+	def reset(self) -> None:
+		with self._lock:
+			self._hists.clear()
+
+
+_monitor: Optional[LatencyMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_latency_monitor() -> LatencyMonitor:
+	"""Monitor único do processo."""
+	global _monitor
+	with _monitor_lock:
+		if _monitor is None:
+			_monitor = LatencyMonitor()
+		return _monitor
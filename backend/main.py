@@ -1,28 +1,57 @@
 import asyncio
+import base64
+import math
+import os
+import time
+import traceback
 from pathlib import Path
 from typing import List, Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, Response, JSONResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, Response, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import json
 
 # Local imports
 from .touch_detector import TouchDetector, TouchEvent
+from .gestures import GestureEvent, GestureRecognizer
 from .object_detector import ObjectDetector
+from .frame_source import FrameSource
+from .recording import RecordingSession, ReplayFrameSource, resolve_recording
+from .mjpeg import BOUNDARY, JpegCache, etag_for, mjpeg_stream
+from .motion_gate import MotionGate
+from .rate_controller import AdaptiveRateController
+from .tracker import MultiObjectTracker
+from .inference_backends import BACKEND_NAMES
+from .inference_worker import InferencePool
+from .model_registry import get_registry, preload_in_background
+from .latency import get_latency_monitor
+from .connections import TOUCH_TYPES, ClientConnection, ConnectionManager
+from .event_queue import EventBridge, EventQueue
+from .event_bus import BusClient, BusHub, asgi_request, default_address
+from .journal import JournalWriter
 from .calibration import (
+	LENS_FRAMES_DIR,
+	LENS_MODES,
 	compute_homography,
-	apply_homography,
 	save_homography,
 	load_homography,
 	clear_homography,
+	calibrate_lens,
+	load_lens_frames,
+	save_lens_view,
+	save_lens,
+	load_lens,
+	clear_lens,
 )
 from .db import (
 	init_db,
 	bulk_upsert_json,
-	upsert_singleton_state,
 	get_all_json,
 	get_singleton_state,
+	replace_planner,
+	init_pool,
+	close_pool,
 )
 from .converter import (
 	convert_length, convert_length_all, normalize_unit,
@@ -37,40 +66,11 @@ from .converter import (
 )
 
 
-class ConnectionManager:
-	"""
-	Gerencia conexões WebSocket e broadcast de mensagens JSON.
-	"""
-	def __init__(self) -> None:
-		self._connections: List[WebSocket] = []
-		self._lock = asyncio.Lock()
-
-	async def connect(self, websocket: WebSocket) -> None:
-		await websocket.accept()
-		async with self._lock:
-			self._connections.append(websocket)
-
-	async def disconnect(self, websocket: WebSocket) -> None:
-		async with self._lock:
-			if websocket in self._connections:
-				self._connections.remove(websocket)
-
-	async def broadcast_json(self, message: dict) -> None:
-		# Envia para todos; remove conexões quebradas
-		stale: List[WebSocket] = []
-		async with self._lock:
-			for ws in self._connections:
-				try:
-					await ws.send_json(message)
-				except Exception:
-					stale.append(ws)
-			for ws in stale:
-				if ws in self._connections:
-					self._connections.remove(ws)
-
-
 app = FastAPI(title="Jarvis Projection Touch")
-manager = ConnectionManager()
+manager = ConnectionManager(
+	max_queue=int(os.environ.get("AXON_WS_QUEUE", "64")),
+	overflow=os.environ.get("AXON_WS_OVERFLOW", "drop_oldest"),
+)
 
 # Static frontend
 FRONTEND_DIR = Path(__file__).resolve().parent.parent / "frontend"
@@ -84,72 +84,313 @@ async def index() -> FileResponse:
 
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-	await manager.connect(websocket)
+async def websocket_endpoint(
+	websocket: WebSocket, encoding: str = "json", topics: str = "", last_seq: Optional[int] = None, epoch: str = "",
+):
+	# /ws?encoding=json|msgpack|packed (ver backend/wire.py)
+	#    &topics=tap,detections (assinatura já na conexão)
+	#    &last_seq=N&epoch=E (reconexão: reenvia o que foi perdido ou manda um snapshot)
+	client = await manager.connect(
+		websocket, encoding, [t for t in topics.split(",") if t] or None, last_seq, epoch,
+	)
 	try:
-		# Mantém a conexão viva; recebimento não é usado no MVP
+		# O cliente envia assinaturas de tópicos e ecos de latência
 		while True:
-			await websocket.receive_text()
+			_handle_client_message(client, await websocket.receive_text())
 	except WebSocketDisconnect:
 		await manager.disconnect(websocket)
 	except Exception:
 		await manager.disconnect(websocket)
 
 
-# Integração: fila única de eventos (dicts ou TouchEvent) vinda dos detectores (threads).
-
-_event_queue: Optional[asyncio.Queue] = None
+def _handle_client_message(client: ClientConnection, text: str) -> None:
+	"""
+	Mensagens do frontend:
+	- {"type": "subscribe", "topics": ["tap", "detections", "scanner", "data"], "rates": {"detections": 10}}
+	  restringe o que o cliente recebe (sem subscribe, recebe tudo);
+	- {"type": "latency_echo", "kind", "ts", "t_sent", "handler_ms"}: eco de latência.
+	  ts e t_sent vêm do relógio monotônico do servidor; a ida até o cliente é
+	  estimada como metade do RTT do eco, somada ao tempo do handler no navegador.
+	"""
+	try:
+		msg = json.loads(text)
+	except Exception:
+		return
+	if not isinstance(msg, dict):
+		return
+	if msg.get("type") == "subscribe":
+		topics = msg.get("topics")
+		rates = msg.get("rates")
+		active = client.subscribe(
+			topics if isinstance(topics, list) else None,
+			rates if isinstance(rates, dict) else None,
+		)
+		manager.send(client, {"type": "subscribed", "topics": active})
+		return
+	if msg.get("type") != "latency_echo":
+		return
+	if _bus_client is not None:
+		# Workers da API: o monitor de latência vive no processo produtor
+		_bus_client.notify(msg)
+		return
+	_record_latency_echo(msg)
+
+
+# O "kind" do eco vira nome de histograma: só tipos que o servidor envia,
+# senão qualquer cliente criaria histogramas sem limite no produtor
+ECHO_KINDS = frozenset(TOUCH_TYPES + ("detections",))
+_echo_stats = {"accepted": 0, "rejected": 0, "last_rejected": None}
+
+
+def _reject_echo(reason: str) -> None:
+	_echo_stats["rejected"] += 1
+	_echo_stats["last_rejected"] = reason
+
+
+def _record_latency_echo(msg: dict) -> None:
+	kind = msg.get("kind")
+	if kind not in ECHO_KINDS:
+		_reject_echo(f"kind inválido: {str(kind)[:32]!r}")
+		return
+	try:
+		t_sent = float(msg["t_sent"])
+		handler_s = float(msg.get("handler_ms") or 0.0) / 1000.0
+		ts = float(msg["ts"]) if msg.get("ts") is not None else None
+	except (KeyError, TypeError, ValueError) as e:
+		_reject_echo(repr(e)[:80])
+		return
+	if not all(math.isfinite(v) for v in (t_sent, handler_s, ts if ts is not None else 0.0)):
+		_reject_echo("valor não finito")
+		return
+	now = time.monotonic()
+	rtt = now - t_sent
+	monitor = get_latency_monitor()
+	monitor.record(f"{kind}.client_rtt", rtt)
+	if ts is not None:
+		monitor.record(f"{kind}.glass_to_handler", (t_sent - ts) + rtt * 0.5 + handler_s)
+	_echo_stats["accepted"] += 1
+
+
+# Integração: fila de eventos vinda dos detectores (threads), com faixa sem perda
+# para toques e detecções coalescidas (ver backend/event_queue.py).
+# Cada item é (instante de enfileiramento, evento), para medir a passagem thread -> loop.
+
+_event_queue: Optional[EventQueue] = None
 _touch_detector: Optional[TouchDetector] = None
 _object_detector: Optional[ObjectDetector] = None
+_frame_source: Optional[FrameSource] = None  # dono único da câmera, compartilhado pelos detectores
+_recording: Optional[RecordingSession] = None
+_jpeg_cache = JpegCache()  # JPEG do último frame, compartilhado por /frame.jpg e /stream.mjpg
 _queue_worker_task: Optional[asyncio.Task] = None
+_bridge: Optional[EventBridge] = None  # passagem thread -> loop dos callbacks dos detectores
+# Diário binário dos toques e detecções (AXON_JOURNAL=diretório; ver backend/journal.py)
+_journal: Optional[JournalWriter] = None
 _H = None  # homografia (numpy array) ou None
 
+# Papel do processo (AXON_ROLE, definido por run.py --workers):
+# - "single": tudo neste processo (padrão);
+# - "producer": câmera e detectores; publica os eventos no barramento;
+# - "api": worker sem câmera; encaminha ao produtor as rotas abaixo.
+ROLE = os.environ.get("AXON_ROLE", "single").strip().lower()
+PRODUCER_PATHS = ("/api/scanner", "/api/calibration", "/api/latency", "/frame.jpg")
+_bus_hub: Optional[BusHub] = None
+_bus_client: Optional[BusClient] = None
+_lens = None  # LensModel (intrínsecos da câmera) ou None
+
+
+def _points_lens():
+	"""Lente a aplicar ponto a ponto (só no modo "points"; no "remap" os frames já vêm corrigidos)."""
+	lens = _lens
+	return lens if lens is not None and lens.mode == "points" else None
+
+
+def _remap_lens():
+	lens = _lens
+	return lens if lens is not None and lens.mode == "remap" else None
+
+
+def _scanner_state() -> dict:
+	return {
+		"touch_running": _touch_detector is not None,
+		"detector_running": _object_detector is not None,
+		"camera_open": _frame_source is not None and _frame_source.is_open,
+	}
+
+
+def _broadcast_scanner() -> None:
+	"""Avisa os clientes do tópico "scanner" que o estado do scanner mudou."""
+	manager.broadcast({"type": "scanner", **_scanner_state()})
 
-async def _event_queue_worker(queue: asyncio.Queue) -> None:
+
+def _broadcast_data(collection: str, action: str = "upsert", ids: Optional[List[str]] = None) -> None:
+	"""Avisa os clientes do tópico "data" que uma coleção do app.db mudou."""
+	manager.broadcast({"type": "data", "collection": collection, "action": action, "ids": ids or []})
+
+
+def _enqueue_event(item) -> None:
+	if _event_queue is not None:
+		_event_queue.put_nowait(item)
+
+
+def _make_emitter(loop: asyncio.AbstractEventLoop):
+	"""
+	Callback para as threads dos detectores: monta a mensagem ainda na thread,
+	carimba o instante e entrega ao EventBridge, que drena em lote no loop.
+	"""
+	global _bridge
+	if _bridge is None or _bridge.loop is not loop:
+		_bridge = EventBridge(loop, _enqueue_event)
+	bridge = _bridge
+
+	def _emit(item) -> None:
+		if isinstance(item, (TouchEvent, GestureEvent)):
+			item = item.to_message()
+		bridge.submit((time.monotonic(), item))
+	return _emit
+
+
+# Falhas ao entregar um evento (a mensagem é descartada; o worker continua)
+_worker_errors = {"errors": 0, "last_error": None}
+
+
+async def _deliver_event(monitor, t_emit: float, item) -> None:
+	t_dequeue = time.monotonic()
+	# Mensagens já prontas: toques convertidos e detecções mapeadas para o
+	# projetor na thread do produtor
+	if isinstance(item, dict):
+		message = item
+	else:
+		message = {"type": "unknown"}
+	kind = str(message.get("type") or "event")
+	# Estágios: captura -> produtor (thread) -> fila -> envio
+	capture_ts = message.get("ts")
+	monitor.record(f"{kind}.handoff", t_dequeue - t_emit)
+	if capture_ts:
+		monitor.record(f"{kind}.produce", t_emit - capture_ts)
+	if message.get("infer_ms") is not None:
+		monitor.record(f"{kind}.infer", message["infer_ms"] / 1000.0)
+	message["t_sent"] = time.monotonic()
+	await manager.broadcast_json(message)
+	if _journal is not None:
+		# Depois do broadcast, para gravar também o seq atribuído
+		_journal.append(message, t_emit)
+	if capture_ts:
+		monitor.record(f"{kind}.server", time.monotonic() - capture_ts)
+
+
+async def _event_queue_worker(queue: EventQueue) -> None:
+	monitor = get_latency_monitor()
 	while True:
-		item = await queue.get()
-		# Suporta TouchEvent e eventos já em dict
-		if isinstance(item, TouchEvent):
-			message = {"type": "tap", "x": item.x, "y": item.y, "source": item.source}
-		elif isinstance(item, dict):
-			# Se for detecções, tenta mapear para espaço do projetor via homografia
-			if item.get("type") == "detections" and "objects" in item and "frame_size" in item:
-				message = dict(item)  # cópia rala
-				if _H is not None:
-					w = item["frame_size"]["w"]
-					h = item["frame_size"]["h"]
-					mapped = []
-					for o in item["objects"]:
-						# centro em pixels da câmera
-						cx = ((float(o["x1"]) + float(o["x2"])) * 0.5) * float(w)
-						cy = ((float(o["y1"]) + float(o["y2"])) * 0.5) * float(h)
-						u, v = apply_homography(_H, cx, cy)
-						mapped.append({"label": o["label"], "confidence": o["confidence"], "cx": u, "cy": v})
-					message["objects_mapped"] = mapped
-					message["projector_mapped"] = True
-			else:
-				message = item
-		else:
-			message = {"type": "unknown"}
-		await manager.broadcast_json(message)
-		queue.task_done()
+		t_emit, item = await queue.get()
+		try:
+			await _deliver_event(monitor, t_emit, item)
+		except Exception as e:
+			# Uma mensagem ruim (ex.: "ts" não numérico) não pode parar a entrega dos demais eventos
+			_worker_errors["errors"] += 1
+			_worker_errors["last_error"] = repr(e)
+			if _worker_errors["errors"] == 1 or _worker_errors["errors"] % 100 == 0:
+				print(f"[Backend] ❌ Erro ao entregar evento ({_worker_errors['errors']}x): {e!r}")
+				traceback.print_exc()
+
+
+async def _bus_rpc(method: str, params: dict) -> dict:
+	"""RPC do barramento no produtor: "http" executa uma rota deste app."""
+	if method == "http":
+		body = base64.b64decode(params.get("body_b64") or "")
+		return await asgi_request(
+			app, params.get("method", "GET"), params.get("path", "/"),
+			params.get("query", ""), params.get("headers") or {}, body,
+		)
+	raise ValueError(f"método desconhecido: {method}")
+
+
+async def _forward_http(method: str, path: str, query: str = "", headers: Optional[dict] = None, body: bytes = b"") -> Response:
+	try:
+		result = await _bus_client.call("http", {
+			"method": method, "path": path, "query": query, "headers": headers or {},
+			"body_b64": base64.b64encode(body).decode("ascii"),
+		})
+	except Exception as e:
+		return JSONResponse({"error": f"Produtor indisponível: {e}"}, status_code=503)
+	response = Response(content=base64.b64decode(result["body_b64"]), status_code=result["status"])
+	for k, v in result["headers"]:
+		response.headers[k] = v
+	return response
+
+
+@app.middleware("http")
+async def _producer_proxy(request: Request, call_next):
+	"""Nos workers da API, câmera, calibração e latência são atendidas pelo produtor."""
+	if ROLE != "api" or not request.url.path.startswith(PRODUCER_PATHS):
+		return await call_next(request)
+	headers = {k: v for k, v in request.headers.items() if k in ("content-type", "if-none-match", "accept")}
+	return await _forward_http(request.method, request.url.path, request.url.query, headers, await request.body())
+
+
+async def _remote_mjpeg(quality: int, scale: float, fps: float):
+	"""MJPEG num worker da API: busca /frame.jpg no produtor (304 quando não há frame novo)."""
+	interval = 1.0 / max(0.5, min(30.0, fps))
+	etag = ""
+	while True:
+		response = await _forward_http("GET", "/frame.jpg", f"quality={quality}&scale={scale}", {"if-none-match": etag})
+		if response.status_code == 200:
+			etag = response.headers.get("etag", "")
+			data = response.body
+			yield (
+				f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(data)}\r\n\r\n".encode("ascii")
+				+ data + b"\r\n"
+			)
+		elif response.status_code not in (204, 304):
+			return
+		await asyncio.sleep(interval)
 
 
 @app.on_event("startup")
 async def on_startup() -> None:
-	global _event_queue, _touch_detector, _object_detector, _queue_worker_task
+	global _event_queue, _touch_detector, _object_detector, _queue_worker_task, _bus_hub, _bus_client, _journal
 	# Inicializa banco de dados (cria tabelas se necessário)
+	init_pool()
 	init_db()
+	if ROLE == "api":
+		# Eventos do produtor (e dos outros workers) chegam pelo barramento
+		_bus_client = BusClient(default_address(), lambda m: manager.broadcast(m, relay=False))
+		manager.relay = _bus_client.publish
+		_bus_client.start()
+		return
+	if ROLE == "producer":
+		_bus_hub = BusHub(
+			default_address(), _bus_rpc,
+			on_publish=lambda m: manager.broadcast(m, relay=False),
+			on_notify=_record_latency_echo,
+		)
+		manager.relay = _bus_hub.publish
+		await _bus_hub.start()
 	loop = asyncio.get_running_loop()
-	_event_queue = asyncio.Queue()
+	journal_dir = os.environ.get("AXON_JOURNAL", "").strip()
+	if journal_dir:
+		_journal = JournalWriter(Path(journal_dir))
+		_journal.start()
+	_event_queue = EventQueue()
 	_queue_worker_task = asyncio.create_task(_event_queue_worker(_event_queue))
 
 	# Não inicializa câmera no startup. Só quando o usuário acionar o "Scanner".
 	_touch_detector = None
 	_object_detector = None
 	# Carrega homografia, se existir
-	global _H
+	global _H, _lens
 	_H = load_homography()
+	_lens = load_lens()
+	# Pré-carregamento opcional do modelo (AXON_PRELOAD=process|thread), em segundo plano,
+	# para que o primeiro scan já responda rápido
+	preload = os.environ.get("AXON_PRELOAD", "").strip().lower()
+	preload_backend = os.environ.get("AXON_BACKEND", "torch")
+	if preload_backend not in BACKEND_NAMES:
+		preload_backend = "torch"
+	if preload == "process":
+		_acquire_inference_pool(preload_backend)
+		_release_inference_pool()
+	elif preload == "thread":
+		preload_in_background(preload_backend, DEFAULT_MODEL)
 
 
 @app.on_event("shutdown")
@@ -159,28 +400,62 @@ async def on_shutdown() -> None:
 		_touch_detector.stop()
 	if _object_detector:
 		_object_detector.stop()
+	if _recording:
+		_recording.stop()
+	if _frame_source:
+		_frame_source.close()
+	get_registry().close()
 	if _queue_worker_task:
 		_queue_worker_task.cancel()
+	if _journal is not None:
+		await _journal.stop()
+	close_pool()
+	if _bus_hub is not None:
+		await _bus_hub.stop()
+	if _bus_client is not None:
+		await _bus_client.stop()
 
 @app.get("/frame.jpg")
-async def frame_jpg():
+async def frame_jpg(request: Request, quality: int = 80, scale: float = 1.0):
 	"""
 	Último frame da câmera (para calibração). Pode ficar defasado alguns ms.
+	O JPEG é codificado uma vez por frame e o ETag segue o seq do frame:
+	com If-None-Match igual, responde 304 sem corpo.
 	"""
-	if _object_detector is None:
+	source = _frame_source
+	if source is None:
 		return Response(status_code=503)
-	frame = _object_detector.get_last_frame()
-	if frame is None:
+	item = await _jpeg_cache.get(source, quality, scale)
+	if item is None:
 		return Response(status_code=204)
-	try:
-		import cv2  # type: ignore
-		import numpy as np  # type: ignore
-		ok, buf = cv2.imencode(".jpg", frame)
-		if not ok:
-			return Response(status_code=500)
-		return Response(content=buf.tobytes(), media_type="image/jpeg")
-	except Exception:
-		return Response(status_code=500)
+	seq, data = item
+	etag = etag_for(source, seq, quality, scale)
+	headers = {"ETag": etag, "Cache-Control": "no-cache"}
+	if request.headers.get("if-none-match") == etag:
+		return Response(status_code=304, headers=headers)
+	return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/stream.mjpg")
+async def frame_stream(quality: int = 70, scale: float = 1.0, fps: float = 10.0):
+	"""
+	Stream MJPEG (multipart/x-mixed-replace) da câmera. Cada frame novo é
+	codificado uma vez e compartilhado por todos os clientes; `fps` limita o
+	ritmo por cliente (máx. 30).
+	"""
+	if ROLE == "api":
+		return StreamingResponse(
+			_remote_mjpeg(quality, scale, fps),
+			media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+			headers={"Cache-Control": "no-cache"},
+		)
+	if _frame_source is None:
+		return Response(status_code=503)
+	return StreamingResponse(
+		mjpeg_stream(lambda: _frame_source, _jpeg_cache, quality, scale, fps),
+		media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+		headers={"Cache-Control": "no-cache"},
+	)
 
 
 @app.get("/calibration")
@@ -247,7 +522,12 @@ async def inventory_page() -> FileResponse:
 
 @app.get("/api/calibration")
 async def calibration_status():
-	return JSONResponse({"has_homography": _H is not None})
+	lens = _lens
+	return JSONResponse({
+		"has_homography": _H is not None,
+		"has_lens": lens is not None,
+		"lens": None if lens is None else {"mode": lens.mode, "rms": lens.rms, "size": list(lens.size)},
+	})
 
 
 @app.post("/api/calibration")
@@ -264,6 +544,11 @@ async def calibration_set(payload: dict):
 		if not isinstance(points, list) or len(points) != 4:
 			return JSONResponse({"error": "camera_points deve ter 4 pontos"}, status_code=400)
 		cam_pts = [(float(p["x"]), float(p["y"])) for p in points]
+		lens = _points_lens()
+		if lens is not None:
+			# A homografia vive no espaço sem distorção, igual aos pontos dos detectores
+			w, h = _frame_size(lens)
+			cam_pts = [tuple(p) for p in lens.undistort_points(cam_pts, w, h).tolist()]
 		H = compute_homography(cam_pts)
 		if H is None:
 			return JSONResponse({"error": "Falha ao computar homografia"}, status_code=500)
@@ -273,6 +558,78 @@ async def calibration_set(payload: dict):
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
 
+def _frame_size(lens) -> tuple:
+	"""(w, h) do frame atual da câmera; sem captura, o tamanho da calibração da lente."""
+	source = _frame_source
+	latest = source.get_latest(copy=False) if source is not None else None
+	if latest is not None:
+		return latest[2].shape[1], latest[2].shape[0]
+	return lens.size
+
+
+@app.post("/api/calibration/lens/capture")
+async def lens_capture(payload: Optional[dict] = None):
+	"""
+	Salva o frame atual em backend/lens_frames/ para a calibração da lente.
+	Body opcional: { "pattern": [9, 6] } (cantos internos do tabuleiro).
+	Responde se o tabuleiro foi encontrado e quantas vistas já existem.
+	"""
+	source = _frame_source
+	frame = source.get_last_frame() if source is not None else None
+	if frame is None:
+		return JSONResponse({"error": "Câmera não iniciada. Inicie o scanner."}, status_code=409)
+	if _remap_lens() is not None:
+		return JSONResponse({"error": "Frames já corrigidos (modo remap). Remova a lente antes de recalibrar."}, status_code=409)
+	try:
+		pattern = tuple(int(v) for v in (payload or {}).get("pattern", (9, 6)))[:2]
+		saved = await asyncio.to_thread(save_lens_view, frame, pattern)
+		views = len(list(LENS_FRAMES_DIR.glob("*.png"))) if LENS_FRAMES_DIR.exists() else 0
+		return JSONResponse({"ok": True, "found": saved is not None, "saved": saved, "views": views})
+	except Exception as e:
+		return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.post("/api/calibration/lens")
+async def lens_calibrate(payload: Optional[dict] = None):
+	"""
+	Calibra a lente com as vistas salvas.
+	Body: { "pattern": [9, 6], "mode": "points" | "remap", "clear_frames": bool }
+	A homografia deve ser refeita depois (passa a viver no espaço sem distorção).
+	"""
+	global _lens
+	payload = payload or {}
+	try:
+		pattern = tuple(int(v) for v in payload.get("pattern", (9, 6)))[:2]
+		mode = payload.get("mode", "points")
+		if mode not in LENS_MODES:
+			return JSONResponse({"error": f"mode deve ser um de {list(LENS_MODES)}"}, status_code=400)
+		frames = await asyncio.to_thread(load_lens_frames, LENS_FRAMES_DIR)
+		lens = await asyncio.to_thread(calibrate_lens, frames, pattern, mode)
+		if lens is None:
+			return JSONResponse({"error": "Tabuleiro não encontrado em vistas suficientes", "views": len(frames)}, status_code=400)
+		save_lens(lens)
+		_lens = lens
+		if _frame_source is not None and not isinstance(_frame_source, ReplayFrameSource):
+			_frame_source.set_lens(_remap_lens())
+		_jpeg_cache.clear()
+		if payload.get("clear_frames"):
+			for f in LENS_FRAMES_DIR.glob("*.png"):
+				f.unlink()
+		return JSONResponse({"ok": True, "mode": lens.mode, "rms": lens.rms, "views": len(frames), "homography_stale": _H is not None})
+	except Exception as e:
+		return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.delete("/api/calibration/lens")
+async def lens_clear():
+	global _lens
+	_lens = None
+	clear_lens()
+	if _frame_source is not None and not isinstance(_frame_source, ReplayFrameSource):
+		_frame_source.set_lens(None)
+	_jpeg_cache.clear()
+	return JSONResponse({"ok": True})
+
 # ====== Conversor de velocidades ======
 
 @app.get("/api/convert/speed")
@@ -810,11 +1167,62 @@ async def calibration_clear():
 
 
 # Scanner: controla uso da câmera sob demanda
+
+DEFAULT_MODEL = "yolov8n.pt"
+DEFAULT_MIN_CONFIDENCE = 0.5
+_pool_key: Optional[tuple] = None  # chave do InferencePool em uso no ModelRegistry
+
+
+def _acquire_inference_pool(backend: str) -> Optional[InferencePool]:
+	"""Pool de inferência residente, reaproveitado entre ciclos start/stop."""
+	global _pool_key
+	key = ("pool", backend, DEFAULT_MODEL, DEFAULT_MIN_CONFIDENCE)
+
+	def _load() -> InferencePool:
+		# Um processo: o detector faz uma inferência por vez, mais workers não renderiam
+		pool = InferencePool(DEFAULT_MODEL, DEFAULT_MIN_CONFIDENCE, backend=backend)
+		pool.start()
+		return pool
+
+	pool = get_registry().get(key, _load, closer=lambda p: p.stop())
+	_pool_key = key
+	return pool
+
+
+def _release_inference_pool() -> None:
+	global _pool_key
+	if _pool_key is not None:
+		get_registry().release(_pool_key)
+		_pool_key = None
+
+@app.get("/api/latency")
+async def latency_stats():
+	"""Histogramas de latência por estágio (ms), da captura até o handler no navegador."""
+	return JSONResponse(get_latency_monitor().stats())
+
+
+@app.post("/api/latency/reset")
+async def latency_reset():
+	get_latency_monitor().reset()
+	return JSONResponse({"ok": True})
+
+
 @app.get("/api/scanner/status")
 async def scanner_status():
 	return JSONResponse({
-		"touch_running": _touch_detector is not None,
-		"detector_running": _object_detector is not None
+		**_scanner_state(),
+		"detector_fps": _object_detector.get_stats()["fps"] if _object_detector is not None else None,
+		"detector_stats": _object_detector.get_stats() if _object_detector is not None else None,
+		"touch_stats": _touch_detector.get_stats() if _touch_detector is not None else None,
+		"models": get_registry().stats(),
+		"jpeg": _jpeg_cache.stats(),
+		"ws": manager.stats(),
+		"events": _event_queue.stats() if _event_queue is not None else None,
+		"bridge": _bridge.stats() if _bridge is not None else None,
+		"bus": _bus_hub.stats() if _bus_hub is not None else None,
+		"journal": _journal.stats() if _journal is not None else None,
+		"event_worker": dict(_worker_errors),
+		"latency_echo": dict(_echo_stats),
 	})
 
 
@@ -825,40 +1233,150 @@ async def scanner_start(payload: Optional[dict] = None):
 	Body opcional:
 	{
 		"camera_index": 0,
-		"with_touch": true|false (padrão: false)
+		"with_touch": true|false (padrão: false),
+		"touch_segmentation": "skin"|"ir"|"motion" (padrão: "skin"),
+		"gestures": {"up_debounce": 0.0, "long_press": 0.6, "tap_max_duration": 0.35, "drag_threshold": 0.02},
+		"inference": "process"|"thread" (padrão: "thread"),
+		"motion_gate": true|false (padrão: false),
+		"motion_sensitivity": 0.01,  # fração de pixels alterados para reinferir
+		"refresh_interval": 5.0,      # segundos entre inferências forçadas
+		"roi": true|false (padrão: false; com true infere só na área calibrada),
+		"target_fps": 5.0,  # FPS fixo (ou inicial, com adaptive_fps)
+		"adaptive_fps": true|false (padrão: false; ajusta o FPS pela latência e pela fila),
+		"min_fps": 1.0,
+		"max_fps": 15.0,    # limites do controle adaptativo
+		"tracking": true|false (padrão: false),
+		"output_fps": 15.0, # ritmo das caixas previstas pelo rastreador (com tracking)
+		"backend": "torch"|"onnx"|"onnx-int8"|"openvino" (padrão: "torch"),
+		"replay": "nome",   # usa uma gravação no lugar da câmera
+		"replay_speed": 1.0,
+		"record": "nome"    # grava os frames enquanto o scanner roda
 	}
+	"replay" e "record" são nomes relativos ao diretório de gravações
+	(AXON_RECORDINGS, padrão recordings/); caminhos fora dele dão 400.
 	"""
-	global _touch_detector, _object_detector, _event_queue
+	global _touch_detector, _object_detector, _event_queue, _frame_source, _recording
 	try:
 		if _event_queue is None:
-			_event_queue = asyncio.Queue()
+			_event_queue = EventQueue()
 		camera_index = 0
 		with_touch = False
+		touch_segmentation = "skin"
+		gesture_opts: dict = {}
+		# Padrões iguais aos de antes das otimizações: pool de processos, portão de
+		# movimento, recorte ROI, FPS adaptativo e rastreador só quando pedidos
+		inference = "thread"
+		motion_gate: Optional[MotionGate] = None
+		roi = False
+		target_fps = 5.0
+		adaptive_fps = False
+		min_fps = 1.0
+		max_fps = 15.0
+		tracking = False
+		output_fps = 15.0
+		backend = "torch"
+		replay: Optional[Path] = None
+		replay_speed = 1.0
+		record_to: Optional[Path] = None
 		if isinstance(payload, dict):
+			try:
+				if payload.get("replay"):
+					replay = resolve_recording(payload["replay"])
+					replay_speed = float(payload.get("replay_speed") or 1.0)
+				if payload.get("record"):
+					record_to = resolve_recording(payload["record"])
+			except ValueError as e:
+				return JSONResponse({"error": str(e)}, status_code=400)
+			if replay is not None and not replay.is_dir():
+				return JSONResponse({"error": f"Gravação não encontrada: {payload['replay']}"}, status_code=404)
+			if payload.get("backend") in BACKEND_NAMES:
+				backend = payload["backend"]
+			if "tracking" in payload:
+				tracking = bool(payload.get("tracking"))
+			if "output_fps" in payload:
+				output_fps = float(payload["output_fps"])
+			if "target_fps" in payload:
+				target_fps = float(payload["target_fps"])
+			if "adaptive_fps" in payload:
+				adaptive_fps = bool(payload.get("adaptive_fps"))
+			if "min_fps" in payload:
+				min_fps = float(payload["min_fps"])
+			if "max_fps" in payload:
+				max_fps = float(payload["max_fps"])
+			if "roi" in payload:
+				roi = bool(payload.get("roi"))
+			if payload.get("motion_gate"):
+				motion_gate = MotionGate()
+			if motion_gate is not None:
+				if "motion_sensitivity" in payload:
+					motion_gate.sensitivity = float(payload["motion_sensitivity"])
+				if "refresh_interval" in payload:
+					motion_gate.refresh_interval = float(payload["refresh_interval"])
+			if payload.get("inference") in ("process", "thread"):
+				inference = payload["inference"]
 			if "camera_index" in payload:
 				camera_index = int(payload.get("camera_index") or 0)
 			if "with_touch" in payload:
 				with_touch = bool(payload.get("with_touch"))
+			if payload.get("touch_segmentation") in ("skin", "ir", "motion"):
+				touch_segmentation = payload["touch_segmentation"]
+			if isinstance(payload.get("gestures"), dict):
+				gesture_opts = {
+					k: float(v) for k, v in payload["gestures"].items()
+					if k in ("up_debounce", "long_press", "tap_max_duration", "tap_max_distance", "drag_threshold")
+				}
 		loop = asyncio.get_running_loop()
+		# Uma única captura alimenta todos os detectores
+		if _frame_source is None:
+			if replay:
+				# Gravação no lugar da câmera (ver backend/recording.py)
+				_frame_source = ReplayFrameSource(str(replay), speed=replay_speed, loop=True)
+			else:
+				_frame_source = FrameSource(camera_index, lens=_remap_lens())
+			_frame_source.start()
+		if record_to and _recording is None:
+			_recording = RecordingSession(_frame_source, str(record_to))
+			_recording.start()
 		# Inicia detector de objetos se ainda não estiver rodando
 		if _object_detector is None:
+			pool = None
+			if inference == "process":
+				pool = _acquire_inference_pool(backend)
 			_object_detector = ObjectDetector(
-				on_event=lambda msg: asyncio.run_coroutine_threadsafe(_event_queue.put(msg), loop),
+				on_event=_make_emitter(loop),
 				camera_index=camera_index,
-				model_name="yolov8n.pt",
-				min_confidence=0.5,
-				target_fps=5.0,
+				model_name=DEFAULT_MODEL,
+				min_confidence=DEFAULT_MIN_CONFIDENCE,
+				target_fps=target_fps,
 				enabled=True,
+				frame_source=_frame_source,
+				inference=inference,
+				motion_gate=motion_gate,
+				homography_provider=lambda: _H,
+				lens_provider=_points_lens,
+				roi=roi,
+				rate_controller=AdaptiveRateController(min_fps=min_fps, max_fps=max_fps, initial_fps=target_fps) if adaptive_fps else None,
+				queue_depth=lambda: _event_queue.pressure() if _event_queue is not None else 0,
+				tracker=MultiObjectTracker() if tracking else None,
+				output_fps=output_fps,
+				backend=backend,
+				pool=pool,
 			)
 			_object_detector.start()
 		# Inicia touch detector opcionalmente
 		if with_touch and _touch_detector is None:
 			_touch_detector = TouchDetector(
-				on_touch=lambda ev: asyncio.run_coroutine_threadsafe(_event_queue.put(ev), loop),
+				on_touch=_make_emitter(loop),
 				camera_index=camera_index,
 				test_mode=False,
+				frame_source=_frame_source,
+				homography_provider=lambda: _H,
+				segmentation=touch_segmentation,
+				gestures=GestureRecognizer(**gesture_opts),
+				lens_provider=_points_lens,
 			)
 			_touch_detector.start()
+		_broadcast_scanner()
 		return JSONResponse({"ok": True})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -867,7 +1385,7 @@ async def scanner_start(payload: Optional[dict] = None):
 @app.post("/api/scanner/stop")
 async def scanner_stop():
 	"""Para e libera a câmera."""
-	global _touch_detector, _object_detector
+	global _touch_detector, _object_detector, _frame_source, _recording
 	try:
 		if _touch_detector is not None:
 			_touch_detector.stop()
@@ -875,6 +1393,16 @@ async def scanner_stop():
 		if _object_detector is not None:
 			_object_detector.stop()
 			_object_detector = None
+		# O pool continua residente no registro (recarregar o modelo custa segundos)
+		_release_inference_pool()
+		if _recording is not None:
+			_recording.stop()
+			_recording = None
+		if _frame_source is not None:
+			_frame_source.close()
+			_frame_source = None
+		_jpeg_cache.clear()
+		_broadcast_scanner()
 		return JSONResponse({"ok": True})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -895,7 +1423,8 @@ async def import_projects(payload: dict):
 		projects = payload.get("projects")
 		if not isinstance(projects, list):
 			return JSONResponse({"error": "Campo 'projects' deve ser lista"}, status_code=400)
-		count, ids = bulk_upsert_json("projects", projects, id_key="id")
+		count, ids = await asyncio.to_thread(bulk_upsert_json, "projects", projects, id_key="id")
+		_broadcast_data("projects", ids=ids)
 		return JSONResponse({"ok": True, "count": count, "ids": ids})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -904,7 +1433,7 @@ async def import_projects(payload: dict):
 @app.get("/api/projects")
 async def list_projects():
 	try:
-		data = get_all_json("projects")
+		data = await asyncio.to_thread(get_all_json, "projects")
 		return JSONResponse({"projects": data})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -929,11 +1458,12 @@ async def import_projects(payload: dict):
 		if len(projects) == 0:
 			print("[Backend] Aviso: Lista de projetos vazia")
 			return JSONResponse({"error": "Lista de projetos vazia"}, status_code=400)
-		count, ids = bulk_upsert_json("projects", projects, id_key="id")
+		count, ids = await asyncio.to_thread(bulk_upsert_json, "projects", projects, id_key="id")
 		print(f"[Backend] ✅ Salvos {count} projetos no app.db: {ids}")  # Debug
 		if count == 0:
 			print("[Backend] ⚠️ AVISO: Nenhum projeto foi salvo!")
 			return JSONResponse({"error": "Nenhum projeto foi salvo. Verifique os logs."}, status_code=500)
+		_broadcast_data("projects", ids=ids)
 		return JSONResponse({"ok": True, "count": count, "ids": ids})
 	except Exception as e:
 		print(f"[Backend] ❌ Erro ao salvar projetos: {e}")  # Debug
@@ -955,7 +1485,8 @@ async def import_inventory(payload: dict):
 		items = payload.get("items")
 		if not isinstance(items, list):
 			return JSONResponse({"error": "Campo 'items' deve ser lista"}, status_code=400)
-		count, ids = bulk_upsert_json("inventory_items", items, id_key="id")
+		count, ids = await asyncio.to_thread(bulk_upsert_json, "inventory_items", items, id_key="id")
+		_broadcast_data("inventory", ids=ids)
 		return JSONResponse({"ok": True, "count": count, "ids": ids})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -964,7 +1495,7 @@ async def import_inventory(payload: dict):
 @app.get("/api/inventory")
 async def list_inventory():
 	try:
-		data = get_all_json("inventory_items")
+		data = await asyncio.to_thread(get_all_json, "inventory_items")
 		return JSONResponse({"items": data})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -986,36 +1517,10 @@ async def import_planner(payload: dict):
 			return JSONResponse({"error": "Campo 'state' deve ser objeto"}, status_code=400)
 		if not isinstance(events, list):
 			return JSONResponse({"error": "Campo 'events' deve ser lista"}, status_code=400)
-		upsert_singleton_state("state", state)
-		# Substituição simples dos eventos atuais pelos fornecidos
-		# Estratégia: limpar e reescrever
-		from .db import get_connection  # import local para evitar ciclos no topo
-		conn = get_connection()
-		try:
-			conn.execute("DELETE FROM calendar_events")
-			for ev in events:
-				if not isinstance(ev, dict):
-					continue
-				ev_id = str(ev.get("id") or "")
-				if not ev_id:
-					continue
-				conn.execute(
-					"""
-					INSERT INTO calendar_events (id, data, updated_at)
-					VALUES (?, ?, strftime('%s','now'))
-					ON CONFLICT(id) DO UPDATE SET
-						data = excluded.data,
-						updated_at = excluded.updated_at
-					""",
-					(ev_id, json.dumps(ev, ensure_ascii=False)),
-				)
-			conn.commit()
-			print(f"[Backend] ✅ Planner salvo: state + {len(events)} eventos")
-		except Exception as e:
-			conn.rollback()
-			raise e
-		finally:
-			conn.close()
+		# Estado e eventos numa única transação; os eventos atuais são substituídos
+		count = await asyncio.to_thread(replace_planner, "state", state, events)
+		print(f"[Backend] ✅ Planner salvo: state + {count} eventos")
+		_broadcast_data("planner", action="replace")
 		return JSONResponse({"ok": True, "events_count": len(events)})
 	except Exception as e:
 		print(f"[Backend] ❌ Erro ao salvar planner: {e}")
@@ -1027,8 +1532,8 @@ async def import_planner(payload: dict):
 @app.get("/api/planner")
 async def get_planner():
 	try:
-		state = get_singleton_state("state")
-		events = get_all_json("calendar_events")
+		state = await asyncio.to_thread(get_singleton_state, "state")
+		events = await asyncio.to_thread(get_all_json, "calendar_events")
 		return JSONResponse({"state": state, "events": events})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -1123,7 +1628,8 @@ async def import_notes(payload: dict):
 		notes = payload.get("notes")
 		if not isinstance(notes, list):
 			return JSONResponse({"error": "Campo 'notes' deve ser lista"}, status_code=400)
-		count, ids = bulk_upsert_json("notes", notes, id_key="id")
+		count, ids = await asyncio.to_thread(bulk_upsert_json, "notes", notes, id_key="id")
+		_broadcast_data("notes", ids=ids)
 		return JSONResponse({"ok": True, "count": count, "ids": ids})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
@@ -1132,7 +1638,7 @@ async def import_notes(payload: dict):
 @app.get("/api/notes")
 async def list_notes():
 	try:
-		data = get_all_json("notes")
+		data = await asyncio.to_thread(get_all_json, "notes")
 		return JSONResponse({"notes": data})
 	except Exception as e:
 		return JSONResponse({"error": str(e)}, status_code=500)
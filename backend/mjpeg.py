@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from .frame_source import FrameSource
+
+try:
+	import cv2  # type: ignore
+except Exception:
+	cv2 = None
+
+BOUNDARY = "axonframe"
+# Variantes guardadas no cache (as menos usadas saem primeiro)
+MAX_VARIANTS = 16
+
+
+def _clamp_params(quality: int, scale: float) -> Tuple[int, float]:
+	"""Qualidade em passos de 5 e escala em passos de 0.05: poucas variantes possíveis."""
+	quality = max(10, min(95, int(round(int(quality) / 5.0)) * 5))
+	scale = max(0.1, min(1.0, round(float(scale) * 20.0) / 20.0))
+	return quality, scale
+
+
+class JpegCache:
+	"""
+	JPEG do frame mais recente, codificado uma única vez por variante
+	(qualidade, escala) e compartilhado entre todos os clientes do stream MJPEG
+	e do /frame.jpg. A codificação roda fora do loop asyncio.
+	"""
+	def __init__(self, max_variants: int = MAX_VARIANTS) -> None:
+		# (token da fonte, qualidade, escala) -> (seq, bytes), em ordem de uso
+		self._entries: "OrderedDict[Tuple[str, int, float], Tuple[int, bytes]]" = OrderedDict()
+		self._locks: Dict[Tuple[str, int, float], threading.Lock] = {}
+		self.max_variants = max(1, int(max_variants))
+		self._lock = threading.Lock()
+		self.encodes = 0
+		self.hits = 0
+
+	def _encode(self, source: FrameSource, key, quality: int, scale: float) -> Optional[Tuple[int, bytes]]:
+		with self._lock:
+			lock = self._locks.setdefault(key, threading.Lock())
+		# Um codificador por variante: clientes simultâneos esperam e reaproveitam
+		with lock:
+			latest = source.get_latest(copy=False)
+			if latest is None:
+				return None
+			seq = latest[0]
+			cached = self._entries.get(key)
+			if cached is not None and cached[0] == seq:
+				self.hits += 1
+				return cached
+			frame = latest[2]
+			if scale < 1.0:
+				frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+			ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+			# A view aponta para o ring: se o slot foi reescrito durante a codificação, descarta
+			if not ok or not source.is_valid(seq):
+				return cached
+			entry = (seq, buf.tobytes())
+			with self._lock:
+				self._entries[key] = entry
+				self._entries.move_to_end(key)
+				while len(self._entries) > self.max_variants:
+					old, _ = self._entries.popitem(last=False)
+					self._locks.pop(old, None)
+			self.encodes += 1
+			return entry
+
+	async def get(self, source: FrameSource, quality: int = 80, scale: float = 1.0) -> Optional[Tuple[int, bytes]]:
+		"""Retorna (seq, jpeg) do frame mais recente ou None."""
+		if cv2 is None:
+			return None
+		quality, scale = _clamp_params(quality, scale)
+		key = (source.token, quality, scale)
+		cached = self._entries.get(key)
+		if cached is not None and cached[0] == source.latest_seq:
+			self.hits += 1
+			with self._lock:
+				if key in self._entries:
+					self._entries.move_to_end(key)
+			return cached
+		return await asyncio.to_thread(self._encode, source, key, quality, scale)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._locks.clear()
+
+	def stats(self) -> Dict[str, Any]:
+		return {"variants": len(self._entries), "encodes": self.encodes, "hits": self.hits}
+
+
+def etag_for(source: FrameSource, seq: int, quality: int, scale: float) -> str:
+	quality, scale = _clamp_params(quality, scale)
+	return f'"{source.token}-{seq}-{quality}-{scale:g}"'
+
+
+async def mjpeg_stream(
+	get_source, cache: JpegCache, quality: int = 70, scale: float = 1.0, max_fps: float = 10.0,
+) -> AsyncIterator[bytes]:
+	"""
+	Gera as partes de um `multipart/x-mixed-replace`: só envia quando há frame
+	novo e no máximo `max_fps` por segundo. `get_source` devolve a FrameSource
+	atual (ou None, que encerra o stream).
+	"""
+	interval = 1.0 / max(0.5, min(30.0, max_fps))
+	loop = asyncio.get_running_loop()
+	last_seq = 0
+	next_at = loop.time()
+	while True:
+		source = get_source()
+		if source is None:
+			return
+		delay = next_at - loop.time()
+		if delay > 0:
+			await asyncio.sleep(delay)
+		if source.latest_seq <= last_seq:
+			# Sem frame novo: checa de novo em 1/4 do intervalo
+			await asyncio.sleep(interval * 0.25)
+			continue
+		item = await cache.get(source, quality, scale)
+		if item is None:
+			await asyncio.sleep(interval)
+			continue
+		last_seq, data = item
+		next_at = loop.time() + interval
+		yield (
+			f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(data)}\r\n\r\n".encode("ascii")
+			+ data + b"\r\n"
+		)
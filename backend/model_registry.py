@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class _Entry:
+	def __init__(self, value: Any, closer: Optional[Callable[[Any], None]]) -> None:
+		self.value = value
+		self.closer = closer
+		self.refs = 0
+		self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+	"""
+	Cache de recursos pesados do processo (modelos carregados, pools de
+	inferência) que sobrevive aos ciclos /api/scanner/start e stop.
+	Entradas sem uso são removidas quando ficam ociosas por mais de `idle_ttl`
+	segundos ou quando o limite `max_entries` é excedido (LRU).
+	"""
+	def __init__(self, max_entries: int = 3, idle_ttl: float = 900.0) -> None:
+		self.max_entries = max_entries
+		self.idle_ttl = idle_ttl
+		self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._loading: Dict[Hashable, threading.Lock] = {}
+		self._janitor: Optional[threading.Thread] = None
+		self._stop = threading.Event()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def get(self, key: Hashable, loader: Callable[[], Any], closer: Optional[Callable[[Any], None]] = None) -> Any:
+		"""
+		Retorna o recurso de `key`, carregando com `loader` se necessário.
+		Cada `get` bem-sucedido deve ter um `release` correspondente.
+		Se o loader retornar None, nada é guardado.
+		"""
+		with self._lock:
+			load_lock = self._loading.setdefault(key, threading.Lock())
+		# Lock por chave: dois chamadores não carregam o mesmo modelo em paralelo
+		with load_lock:
+			with self._lock:
+				entry = self._entries.get(key)
+				if entry is not None:
+					entry.refs += 1
+					entry.last_used = time.monotonic()
+					self._entries.move_to_end(key)
+					self.hits += 1
+					return entry.value
+			value = loader()
+			if value is None:
+				return None
+			with self._lock:
+				self.misses += 1
+				entry = _Entry(value, closer)
+				entry.refs = 1
+				self._entries[key] = entry
+				evicted = self._evict_locked(time.monotonic())
+		self._close_all(evicted)
+		return value
+
+	def release(self, key: Hashable) -> None:
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				entry.refs = max(0, entry.refs - 1)
+				entry.last_used = time.monotonic()
+
+	def evict_idle(self) -> int:
+		with self._lock:
+			evicted = self._evict_locked(time.monotonic())
+		self._close_all(evicted)
+		return len(evicted)
+
+	def _evict_locked(self, now: float) -> list:
+		evicted = []
+		for key in list(self._entries.keys()):
+			entry = self._entries[key]
+			if entry.refs == 0 and now - entry.last_used > self.idle_ttl:
+				evicted.append(self._entries.pop(key))
+		# LRU: remove as mais antigas sem uso até caber no limite
+		for key in list(self._entries.keys()):
+			if len(self._entries) <= self.max_entries:
+				break
+			if self._entries[key].refs == 0:
+				evicted.append(self._entries.pop(key))
+		self.evictions += len(evicted)
+		return evicted
+
+	@staticmethod
+	def _close_all(entries: list) -> None:
+		for entry in entries:
+			if entry.closer is not None:
+				try:
+					entry.closer(entry.value)
+				except Exception:
+					pass
+
+	def start_janitor(self, interval: float = 60.0) -> None:
+		"""Thread de fundo que aplica o TTL de ociosidade periodicamente."""
+		if self._janitor and self._janitor.is_alive():
+			return
+		self._stop.clear()
+
+		def _loop() -> None:
+			# wait() retorna True assim que close() sinaliza a parada
+			while not self._stop.wait(interval):
+				self.evict_idle()
+
+		self._janitor = threading.Thread(target=_loop, name="ModelRegistryJanitor", daemon=True)
+		self._janitor.start()
+
+	def clear(self) -> None:
+		with self._lock:
+			entries = list(self._entries.values())
+			self._entries.clear()
+		self._close_all(entries)
+
+	def close(self, timeout: float = 2.0) -> None:
+		"""Para o janitor e libera todas as entradas (shutdown da aplicação)."""
+		self._stop.set()
+		janitor = self._janitor
+		if janitor is not None and janitor.is_alive() and janitor is not threading.current_thread():
+			janitor.join(timeout=timeout)
+		self._janitor = None
+		self.clear()
+
+	def stats(self) -> Dict[str, Any]:
+		now = time.monotonic()
+		with self._lock:
+			return {
+				"entries": [
+					{"key": list(k) if isinstance(k, tuple) else k, "refs": e.refs, "idle_s": round(now - e.last_used, 1)}
+					for k, e in self._entries.items()
+				],
+				"hits": self.hits,
+				"misses": self.misses,
+				"evictions": self.evictions,
+			}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+	"""Registro único do processo."""
+	global _registry
+	with _registry_lock:
+		if _registry is None:
+			_registry = ModelRegistry()
+			_registry.start_janitor()
+		return _registry
+
+
+def warmup(backend: Any, shape=(720, 1280, 3), runs: int = 1) -> None:
+	"""Roda inferências descartáveis para pagar o custo da primeira execução."""
+	frame = np.zeros(shape, dtype=np.uint8)
+	for _ in range(runs):
+		try:
+			backend.predict(frame)
+		except Exception:
+			break
+
+
+def model_key(backend_name: str, model_name: str) -> tuple:
+	return ("model", backend_name, model_name)
+
+
+def acquire_backend(backend_name: str, model_name: str, min_confidence: float = 0.5):
+	"""
+	Backend de inferência carregado e aquecido, residente no registro do
+	processo. O backend é compartilhado entre chamadores: `min_confidence` só
+	vale como padrão de quem o carrega; cada chamador passa o próprio limiar
+	em `predict(frame, min_confidence)`.
+	"""
+	from .inference_backends import create_backend
+
+	def _load():
+		be = create_backend(backend_name, model_name, min_confidence)
+		if not be.load():
+			return None
+		warmup(be)
+		return be
+
+	return get_registry().get(model_key(backend_name, model_name), _load)
+
+
+def preload_in_background(backend_name: str, model_name: str) -> threading.Thread:
+	"""Carrega e aquece o modelo numa thread, sem bloquear o startup."""
+	def _run() -> None:
+		if acquire_backend(backend_name, model_name) is not None:
+			get_registry().release(model_key(backend_name, model_name))
+
+	t = threading.Thread(target=_run, name="ModelPreload", daemon=True)
+	t.start()
+	return t
@@ -0,0 +1,81 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+	import cv2  # type: ignore
+except Exception:
+	cv2 = None
+
+
+class MotionGate:
+	"""
+	Portão barato na frente da inferência: compara uma miniatura em tons de
+	cinza do frame atual com a do último frame inferido.
+	Se a fração de pixels que mudaram for menor que `sensitivity`, a inferência
+	é pulada e o detector reaproveita as detecções anteriores.
+	`refresh_interval` (segundos) força uma inferência periódica mesmo em cena
+	estática.
+	"""
+	def __init__(
+		self,
+		sensitivity: float = 0.01,
+		refresh_interval: float = 5.0,
+		pixel_threshold: int = 25,
+		size: Tuple[int, int] = (64, 36),
+	) -> None:
+		self.sensitivity = sensitivity
+		self.refresh_interval = refresh_interval
+		self.pixel_threshold = pixel_threshold
+		self._size = size
+		self._reference: Optional[np.ndarray] = None
+		self._last_refresh = 0.0
+		self.last_change = 0.0
+		self.inferences = 0
+		self.skipped = 0
+
+	def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+		if cv2 is not None:
+			gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+			return cv2.resize(gray, self._size, interpolation=cv2.INTER_AREA).astype(np.int16)
+		# Fallback sem OpenCV: amostragem simples
+		h, w = frame.shape[:2]
+		sy = max(1, h // self._size[1])
+		sx = max(1, w // self._size[0])
+		small = frame[::sy, ::sx]
+		if small.ndim == 3:
+			small = small.mean(axis=2)
+		return small.astype(np.int16)
+
+	def should_infer(self, frame: np.ndarray, now: Optional[float] = None, force: bool = False) -> bool:
+		"""
+		Retorna True se o frame deve passar pela inferência. Com `force` o frame
+		passa de qualquer jeito (ex.: ainda não há detecções para reaproveitar),
+		mas vira a nova referência e entra nas contagens como os demais.
+		"""
+		now = time.monotonic() if now is None else now
+		thumb = self._thumbnail(frame)
+		ref = self._reference
+		if ref is not None and ref.shape == thumb.shape:
+			changed = float(np.count_nonzero(np.abs(thumb - ref) > self.pixel_threshold)) / thumb.size
+			self.last_change = changed
+			if not force and changed < self.sensitivity and now - self._last_refresh < self.refresh_interval:
+				self.skipped += 1
+				return False
+		self._reference = thumb
+		self._last_refresh = now
+		self.inferences += 1
+		return True
+
+	def reset(self) -> None:
+		self._reference = None
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"inferences": self.inferences,
+			"skipped": self.skipped,
+			"last_change": self.last_change,
+			"sensitivity": self.sensitivity,
+			"refresh_interval": self.refresh_interval,
+		}
@@ -1,7 +1,16 @@
 import threading
 import time
 from dataclasses import dataclass
-from typing import Callable, List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
+
+import numpy as np
+
+from .frame_source import FrameSource
+from .inference_worker import InferencePool
+from .motion_gate import MotionGate
+from .calibration import LensModel, apply_homography_boxes, apply_homography_points, projector_roi
+from .rate_controller import AdaptiveRateController
+from .tracker import MultiObjectTracker
 
 try:
 	from ultralytics import YOLO  # type: ignore
@@ -36,11 +45,24 @@ class DetectedObject:
 class ObjectDetector:
 	"""
 	Detector de objetos usando YOLO (Ultralytics).
+	Com `inference="process"`, o modelo roda em processos separados que leem
+	os frames direto do FrameRing (memória compartilhada), mantendo o loop
+	asyncio do servidor livre.
+	Com `roi=True` e uma homografia disponível, a inferência roda só no
+	recorte da câmera que cobre a área projetada; as coordenadas publicadas
+	continuam normalizadas ao frame inteiro.
 	Publica eventos JSON no callback `on_event` no formato:
 	{
 		"type": "detections",
 		"source": "yolo",
-		"objects": [{ label, confidence, x1, y1, x2, y2 }]  // coords normalizadas [0..1]
+		"ts": float | null,  // captura do keyframe (time.monotonic); null nas caixas previstas
+		"infer_ms": float | null,  // duração da inferência neste keyframe
+		"reused": bool,  // true quando o portão de movimento pulou a inferência
+		"predicted": bool,  // true para caixas extrapoladas pelo rastreador entre keyframes
+		"roi": { x1, y1, x2, y2 } | null,  // recorte usado, normalizado ao frame
+		"objects": [{ label, confidence, x1, y1, x2, y2, track_id? }],  // coords normalizadas [0..1]
+		"objects_mapped": [{ label, confidence, cx, cy, quad, track_id? }],  // só com homografia
+		"projector_mapped": true  // só com homografia
 	}
 	"""
 	def __init__(
@@ -51,6 +73,18 @@ class ObjectDetector:
 		min_confidence: float = 0.5,
 		target_fps: float = 5.0,
 		enabled: bool = True,
+		frame_source: Optional[FrameSource] = None,
+		inference: str = "thread",
+		motion_gate: Optional[MotionGate] = None,
+		homography_provider: Optional[Callable[[], Optional[np.ndarray]]] = None,
+		roi: bool = False,
+		rate_controller: Optional[AdaptiveRateController] = None,
+		queue_depth: Optional[Callable[[], int]] = None,
+		tracker: Optional[MultiObjectTracker] = None,
+		output_fps: Optional[float] = None,
+		backend: str = "torch",
+		pool: Optional[InferencePool] = None,
+		lens_provider: Optional[Callable[[], Optional[LensModel]]] = None,
 	) -> None:
 		self._on_event = on_event
 		self._camera_index = camera_index
@@ -60,7 +94,39 @@ class ObjectDetector:
 		self._enabled = enabled
 		self._stop_event = threading.Event()
 		self._thread: Optional[threading.Thread] = None
+		# Backend de inferência: "torch", "onnx", "onnx-int8" ou "openvino"
+		self._backend_name = backend
 		self._model = None
+		# Motivo de o detector não estar rodando (ex.: modelo não carregou)
+		self._error: Optional[str] = None
+		# "thread": inferência nesta thread; "process": pool de processos (InferencePool)
+		self._inference = inference
+		# Pool externo (ex.: residente no ModelRegistry) não é parado por este detector
+		self._pool: Optional[InferencePool] = pool
+		self._owns_pool = pool is None
+		# Portão de movimento opcional: em cena estática reaproveita as últimas detecções
+		self._motion_gate = motion_gate
+		self._last_objects: Optional[List[DetectedObject]] = None
+		self._frames = 0
+		# Inferências descartadas porque o slot do ring foi sobrescrito durante o predict
+		self._stale = 0
+		# Modo ROI: com homografia, infere só no recorte que cobre a área projetada
+		self._homography_provider = homography_provider
+		self._roi_enabled = roi
+		self._roi_cache: Optional[tuple] = None  # (H, lente, w, h, roi)
+		# Lente no modo "points": cantos das caixas corrigidos antes da homografia
+		self._lens_provider = lens_provider
+		# Controle adaptativo do FPS (latência de inferência + profundidade da fila de eventos)
+		self._rate = rate_controller
+		self._queue_depth = queue_depth
+		if self._rate is not None:
+			self._target_dt = self._rate.interval
+		# Rastreador opcional: IDs estáveis e caixas previstas a `output_fps` entre inferências
+		self._tracker = tracker
+		self._output_fps = output_fps
+		# Sem FrameSource compartilhada, o detector abre a própria câmera
+		self._owns_source = frame_source is None
+		self._frame_source = frame_source or FrameSource(camera_index)
 
 	def start(self) -> None:
 		if not self._enabled:
@@ -68,6 +134,11 @@ class ObjectDetector:
 		if self._thread and self._thread.is_alive():
 			return
 		self._stop_event.clear()
+		if self._owns_source:
+			self._frame_source.start()
+		if self._inference == "process" and self._pool is None:
+			self._pool = InferencePool(self._model_name, self._min_conf, backend=self._backend_name)
+			self._pool.start()
 		self._thread = threading.Thread(target=self._run, name="ObjectDetectorThread", daemon=True)
 		self._thread.start()
 
@@ -75,113 +146,252 @@ class ObjectDetector:
 		self._stop_event.set()
 		if self._thread and self._thread.is_alive():
 			self._thread.join(timeout=2.0)
+		if self._pool is not None and self._owns_pool:
+			self._pool.stop()
+			self._pool = None
+		if self._owns_source:
+			self._frame_source.close()
 
 	def _run(self) -> None:
-		if YOLO is None or cv2 is None:
+		if self._inference == "process":
+			self._run_loop(self._infer_process)
 			return
-		try:
-			self._model = YOLO(self._model_name)
-		except Exception:
+		# Import local para evitar ciclo (inference_backends importa este módulo)
+		from .model_registry import acquire_backend, get_registry, model_key
+		# Modelo residente no registro: sobrevive ao stop/start do scanner
+		backend = acquire_backend(self._backend_name, self._model_name, self._min_conf)
+		if backend is None:
+			self._error = f"falha ao carregar o modelo {self._model_name} ({self._backend_name})"
+			print(f"[Backend] ObjectDetector: {self._error}; detecção desativada")
 			return
-		# Tenta abrir com preferências de backend no Windows
-		cap = None
-		# Preferir MSMF primeiro no Windows, pois DSHOW pode falhar por índice em alguns sistemas
-		for backend in (getattr(cv2, "CAP_MSMF", 1400), getattr(cv2, "CAP_DSHOW", 700), getattr(cv2, "CAP_ANY", 0)):
-			try:
-				cap = cv2.VideoCapture(self._camera_index, backend)
-				if cap.isOpened():
-					break
-				else:
-					cap.release()
-			except Exception:
-				try:
-					if cap is not None:
-						cap.release()
-				except Exception:
-					pass
-				cap = None
-		# Fallback final: tentar sem especificar backend
-		if cap is None or not cap.isOpened():
-			try:
-				cap = cv2.VideoCapture(self._camera_index)
-			except Exception:
-				cap = None
-		if cap is None or not cap.isOpened():
-			return
-		# Opcional: fixa resolução comum para melhorar compatibilidade
+		self._error = None
+		self._model = backend
 		try:
-			cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-			cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-		except Exception:
-			pass
-		# guarda último frame para /frame.jpg
-		self._last_frame = None  # type: ignore[attr-defined]
+			self._run_loop(self._infer_thread)
+		finally:
+			self._model = None
+			get_registry().release(model_key(self._backend_name, self._model_name))
+
+	def _current_roi(self, w: int, h: int) -> Optional[Tuple[int, int, int, int]]:
+		if not self._roi_enabled or self._homography_provider is None:
+			return None
+		H = self._homography_provider()
+		if H is None:
+			return None
+		lens = self._lens_provider() if self._lens_provider is not None else None
+		cached = self._roi_cache
+		if cached is not None and cached[0] is H and cached[1] is lens and cached[2] == w and cached[3] == h:
+			return cached[4]
+		roi = projector_roi(H, w, h, lens=lens)
+		if roi == (0, 0, w, h):
+			roi = None
+		self._roi_cache = (H, lens, w, h, roi)
+		return roi
+
+	def _run_loop(self, infer: Callable[[int, Any, Optional[Tuple[int, int, int, int]]], Optional[List[DetectedObject]]]) -> None:
+		sub = self._frame_source.subscribe("object_detector", max_fps=1.0 / self._target_dt)
+		tracker = self._tracker
+		# Com rastreador, acorda no ritmo de saída para publicar caixas previstas entre keyframes
+		emit_dt = 1.0 / self._output_fps if tracker is not None and self._output_fps else None
+		last_emit = 0.0
+		last_meta: Optional[Tuple[int, int, Any]] = None  # (w, h, roi) do último keyframe
 		try:
-			last_time = 0.0
+			# O ritmo de inferência é aplicado pela própria assinatura
 			while not self._stop_event.is_set():
-				start = time.time()
-				ok, frame = cap.read()
-				if not ok or frame is None:
-					time.sleep(0.01)
+				item = sub.read(timeout=min(0.5, emit_dt) if emit_dt else 0.5)
+				if item is None:
+					now = time.monotonic()
+					if emit_dt and last_meta is not None and len(tracker) and now - last_emit >= emit_dt * 0.9:
+						self._publish(last_meta[0], last_meta[1], last_meta[2], True, tracker.predict(now), predicted=True, ts=None)
+						last_emit = now
 					continue
-				# salva last frame (referência)
-				self._last_frame = frame
+				seq, ts, frame = item
 				h, w = frame.shape[:2]
-				# Inference
-				try:
-					results = self._model(frame, verbose=False)
-				except Exception:
-					# Se der erro pontual, continua
-					time.sleep(0.05)
-					continue
-				objects: List[DetectedObject] = []
-				for r in results:
-					if not hasattr(r, "boxes") or r.boxes is None:
+				self._frames += 1
+				gate = self._motion_gate
+				# Todo frame passa pelo portão (mantém a referência e as contagens em dia);
+				# sem detecções anteriores para reaproveitar, a inferência é forçada
+				reused = gate is not None and not gate.should_infer(frame, force=self._last_objects is None)
+				roi = self._current_roi(w, h)
+				infer_ms = None
+				if reused:
+					objects = self._last_objects
+				else:
+					t0 = time.perf_counter()
+					objects = infer(seq, frame, roi)
+					infer_ms = (time.perf_counter() - t0) * 1000.0
+					if self._rate is not None and objects is not None:
+						depth = self._queue_depth() if self._queue_depth is not None else 0
+						self._target_dt = 1.0 / self._rate.update(time.perf_counter() - t0, depth)
+						sub.set_max_fps(self._rate.fps)
+					if not self._frame_source.is_valid(seq):
+						# O frame é uma view do ring: se o escritor reusou o slot durante
+						# a inferência, as caixas podem vir de um frame rasgado. Descarta.
+						self._stale += 1
 						continue
-					boxes = r.boxes
-					if getattr(boxes, "xyxy", None) is None or getattr(boxes, "conf", None) is None or getattr(boxes, "cls", None) is None:
+					if objects is None:
+						# Se der erro pontual, continua
+						time.sleep(0.05)
 						continue
-					xyxy = boxes.xyxy.cpu().numpy()
-					conf = boxes.conf.cpu().numpy()
-					cls = boxes.cls.cpu().numpy()
-					for i in range(xyxy.shape[0]):
-						if float(conf[i]) < self._min_conf:
-							continue
-						x1, y1, x2, y2 = xyxy[i]
-						label_idx = int(cls[i])
-						label = r.names.get(label_idx, str(label_idx)) if hasattr(r, "names") else str(label_idx)
-						objects.append(
-							DetectedObject(
-								label=label,
-								confidence=float(conf[i]),
-								x1=max(0.0, min(1.0, float(x1) / w)),
-								y1=max(0.0, min(1.0, float(y1) / h)),
-								x2=max(0.0, min(1.0, float(x2) / w)),
-								y2=max(0.0, min(1.0, float(y2) / h)),
-							)
-						)
-				# Publica evento
-				self._on_event({
-					"type": "detections",
-					"source": "yolo",
-					"frame_size": {"w": w, "h": h},
-					"objects": [
+					if roi is not None:
+						objects = roi_to_frame(objects, roi, w, h)
+					self._last_objects = objects
+				if tracker is not None:
+					# Associa no instante da captura e publica já projetado para agora
+					tracker.update(objects, ts)
+					out = tracker.predict(time.monotonic())
+				else:
+					out = [
 						{
 							"label": o.label,
 							"confidence": o.confidence,
 							"x1": o.x1, "y1": o.y1, "x2": o.x2, "y2": o.y2,
 						} for o in objects
 					]
-				})
-				# Ritmo alvo
-				elapsed = time.time() - start
-				sleep_time = max(0.0, self._target_dt - elapsed)
-				time.sleep(sleep_time)
+				self._publish(w, h, roi, reused, out, predicted=False, ts=ts, infer_ms=infer_ms)
+				last_meta = (w, h, roi)
+				last_emit = time.monotonic()
 		finally:
-			cap.release()
+			sub.close()
+
+	def _publish(
+		self, w: int, h: int, roi, reused: bool, objects: List[Dict[str, Any]], predicted: bool,
+		ts: Optional[float], infer_ms: Optional[float] = None,
+	) -> None:
+		message: Dict[str, Any] = {
+			"type": "detections",
+			"source": "yolo",
+			"ts": ts,
+			"infer_ms": infer_ms,
+			"frame_size": {"w": w, "h": h},
+			"reused": reused,
+			"predicted": predicted,
+			"roi": None if roi is None else {
+				"x1": roi[0] / w, "y1": roi[1] / h, "x2": roi[2] / w, "y2": roi[3] / h,
+			},
+			"objects": objects,
+		}
+		# Mapeamento para o projetor feito aqui, na thread do detector: o loop só repassa
+		H = self._homography_provider() if self._homography_provider is not None else None
+		if H is not None:
+			lens = self._lens_provider() if self._lens_provider is not None else None
+			message["objects_mapped"] = map_to_projector(H, objects, w, h, lens)
+			message["projector_mapped"] = True
+		self._on_event(message)
+
+	def _infer_thread(self, seq: int, frame, roi) -> Optional[List[DetectedObject]]:
+		if roi is not None:
+			frame = frame[roi[1]:roi[3], roi[0]:roi[2]]
+		try:
+			# Limiar por chamada: o backend residente é compartilhado no processo
+			return self._model.predict(frame, self._min_conf)
+		except Exception:
+			return None
+
+	def _infer_process(self, seq: int, frame, roi) -> Optional[List[DetectedObject]]:
+		ring = self._frame_source.ring
+		if ring is None or self._pool is None:
+			return None
+		return self._pool.infer(ring.name, seq, roi=roi)
 
 	def get_last_frame(self):
 		"""Retorna o último frame da câmera (BGR) ou None."""
-		return getattr(self, "_last_frame", None)
+		return self._frame_source.get_last_frame()
+
+	def get_stats(self) -> Dict[str, Any]:
+		"""Contadores para /api/scanner/status."""
+		stats: Dict[str, Any] = {
+			"inference": self._inference,
+			"backend": self._backend_name,
+			"frames": self._frames,
+			"stale": self._stale,
+			"fps": round(1.0 / self._target_dt, 2),
+			"error": self._error,
+		}
+		if self._rate is not None:
+			stats["rate"] = self._rate.stats()
+		if self._motion_gate is not None:
+			stats["motion_gate"] = self._motion_gate.stats()
+		if self._pool is not None:
+			stats["pool"] = self._pool.stats()
+		return stats
+
 
+def map_to_projector(
+	H: np.ndarray, objects: List[Dict[str, Any]], w: int, h: int, lens: Optional[LensModel] = None,
+) -> List[Dict[str, Any]]:
+	"""
+	Mapeia as caixas (normalizadas ao frame) para o projetor numa única chamada
+	vetorizada: centro (cx, cy) e o quadrilátero projetado (`quad`, 4 cantos).
+	Com `lens`, cantos e centros são corrigidos da distorção antes da homografia.
+	"""
+	if not objects:
+		return []
+	boxes = np.array([[o["x1"], o["y1"], o["x2"], o["y2"]] for o in objects], dtype=np.float64)
+	boxes *= (w, h, w, h)
+	# Centro da caixa na câmera mapeado pela homografia (não a média dos cantos)
+	centers = (boxes[:, :2] + boxes[:, 2:]) * 0.5
+	if lens is None:
+		quads = apply_homography_boxes(H, boxes)
+		centers = apply_homography_points(H, centers)
+	else:
+		x1, y1, x2, y2 = boxes.T
+		corners = np.stack([x1, y1, x2, y1, x2, y2, x1, y2], axis=1).reshape(-1, 2)
+		pts = lens.undistort_points(np.concatenate([corners, centers]), w, h)
+		mapped_pts = apply_homography_points(H, pts)
+		quads = mapped_pts[:len(corners)].reshape(-1, 4, 2)
+		centers = mapped_pts[len(corners):]
+	mapped: List[Dict[str, Any]] = []
+	for o, c, q in zip(objects, centers.tolist(), quads.tolist()):
+		m = {"label": o["label"], "confidence": o["confidence"], "cx": c[0], "cy": c[1], "quad": q}
+		if "track_id" in o:
+			m["track_id"] = o["track_id"]
+		mapped.append(m)
+	return mapped
+
+
+def roi_to_frame(objects: List[DetectedObject], roi: Tuple[int, int, int, int], w: int, h: int) -> List[DetectedObject]:
+	"""Converte coords normalizadas ao recorte `roi` para coords normalizadas ao frame inteiro."""
+	x0, y0, x1, y1 = roi
+	sx = (x1 - x0) / float(w)
+	sy = (y1 - y0) / float(h)
+	ox = x0 / float(w)
+	oy = y0 / float(h)
+	return [
+		DetectedObject(
+			label=o.label,
+			confidence=o.confidence,
+			x1=ox + o.x1 * sx, y1=oy + o.y1 * sy,
+			x2=ox + o.x2 * sx, y2=oy + o.y2 * sy,
+		) for o in objects
+	]
 
+
+def parse_results(results, w: int, h: int, min_confidence: float) -> List[DetectedObject]:
+	"""
+	Converte a saída do Ultralytics em DetectedObject com coords normalizadas [0..1].
+	Filtragem e normalização são feitas em lote com NumPy.
+	"""
+	objects: List[DetectedObject] = []
+	scale = np.array([w, h, w, h], dtype=np.float32)
+	for r in results:
+		if not hasattr(r, "boxes") or r.boxes is None:
+			continue
+		boxes = r.boxes
+		if getattr(boxes, "xyxy", None) is None or getattr(boxes, "conf", None) is None or getattr(boxes, "cls", None) is None:
+			continue
+		conf = boxes.conf.cpu().numpy()
+		keep = conf >= min_confidence
+		if not keep.any():
+			continue
+		xyxy = np.clip(boxes.xyxy.cpu().numpy()[keep] / scale, 0.0, 1.0).tolist()
+		cls = boxes.cls.cpu().numpy()[keep].astype(int).tolist()
+		conf = conf[keep].tolist()
+		names = r.names if hasattr(r, "names") else {}
+		for (x1, y1, x2, y2), c, label_idx in zip(xyxy, conf, cls):
+			objects.append(DetectedObject(
+				label=names.get(label_idx, str(label_idx)),
+				confidence=float(c),
+				x1=x1, y1=y1, x2=x2, y2=y2,
+			))
+	return objects
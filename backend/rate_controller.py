@@ -0,0 +1,80 @@
+import threading
+from typing import Any, Dict, Optional
+
+
+class AdaptiveRateController:
+	"""
+	Controle em malha fechada do FPS do detector (AIMD).
+	A cada inferência recebe a latência medida e a profundidade da fila de
+	eventos; aumenta o ritmo aos poucos enquanto há folga e reduz rapidamente
+	quando a inferência não cabe no intervalo ou a fila começa a acumular.
+	O ritmo efetivo fica sempre entre `min_fps` e `max_fps`.
+	"""
+	def __init__(
+		self,
+		min_fps: float = 1.0,
+		max_fps: float = 15.0,
+		initial_fps: float = 5.0,
+		headroom: float = 0.8,
+		max_queue_depth: int = 4,
+		increase_step: float = 0.5,
+		decrease_factor: float = 0.7,
+		smoothing: float = 0.2,
+	) -> None:
+		self.min_fps = max(0.1, min_fps)
+		self.max_fps = max(self.min_fps, max_fps)
+		self._fps = min(self.max_fps, max(self.min_fps, initial_fps))
+		# Fração do intervalo que a inferência pode ocupar
+		self._headroom = headroom
+		self._max_queue_depth = max_queue_depth
+		self._increase_step = increase_step
+		self._decrease_factor = decrease_factor
+		self._alpha = smoothing
+		self._latency: Optional[float] = None
+		self._queue_depth = 0
+		self._lock = threading.Lock()
+		self.decreases = 0
+		self.increases = 0
+
+	@property
+	def fps(self) -> float:
+		return self._fps
+
+	@property
+	def interval(self) -> float:
+		return 1.0 / self._fps
+
+	def update(self, latency_s: float, queue_depth: int = 0) -> float:
+		"""Registra uma medição e retorna o novo FPS efetivo."""
+		with self._lock:
+			if self._latency is None:
+				self._latency = latency_s
+			else:
+				self._latency += self._alpha * (latency_s - self._latency)
+			self._queue_depth = queue_depth
+			capacity = self._headroom / max(1e-4, self._latency)
+			fps = self._fps
+			if queue_depth > self._max_queue_depth:
+				# Consumidor atrasado: redução multiplicativa
+				fps *= self._decrease_factor
+				self.decreases += 1
+			elif capacity < fps:
+				# Inferência não cabe no intervalo: reduz até a capacidade medida
+				fps = max(fps * self._decrease_factor, capacity)
+				self.decreases += 1
+			elif fps < self.max_fps:
+				fps = min(fps + self._increase_step, capacity)
+				self.increases += 1
+			self._fps = min(self.max_fps, max(self.min_fps, fps))
+			return self._fps
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"fps": round(self._fps, 2),
+			"min_fps": self.min_fps,
+			"max_fps": self.max_fps,
+			"latency_ms": None if self._latency is None else round(self._latency * 1000.0, 1),
+			"queue_depth": self._queue_depth,
+			"increases": self.increases,
+			"decreases": self.decreases,
+		}
@@ -0,0 +1,297 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .frame_source import FrameSource
+
+try:
+	import cv2  # type: ignore
+except Exception:
+	cv2 = None
+
+_META_FILE = "meta.json"
+_RAW_FILE = "frames.bin"
+_VIDEO_FILE = "frames.mp4"
+_TS_FILE = "timestamps.npy"
+
+# Diretório das gravações usadas pela API (/api/scanner/start com "replay"/"record");
+# scripts/recording.py aceita qualquer caminho
+RECORDINGS_DIR = Path(
+	os.environ.get("AXON_RECORDINGS") or Path(__file__).resolve().parent.parent / "recordings"
+).resolve()
+
+
+def resolve_recording(name: str) -> Path:
+	"""
+	Caminho de uma gravação pedida pela API, relativo a RECORDINGS_DIR.
+	Rejeita (ValueError) caminhos absolutos e qualquer coisa fora do diretório.
+	"""
+	rel = Path(str(name))
+	if not str(name).strip() or rel.is_absolute() or rel.drive or ".." in rel.parts:
+		raise ValueError(f"gravação inválida: {name!r} (use um nome relativo a {RECORDINGS_DIR})")
+	path = (RECORDINGS_DIR / rel).resolve()
+	if path == RECORDINGS_DIR or RECORDINGS_DIR not in path.parents:
+		raise ValueError(f"gravação fora de {RECORDINGS_DIR}: {name!r}")
+	return path
+
+
+class FrameRecorder:
+	"""
+	Grava frames e timestamps num diretório.
+
+	- "raw": frames BGR sem compressão em `frames.bin` (lidos depois por
+	  np.memmap, sem decodificação; reprodução exata para regressão);
+	- "video": `frames.mp4` (mp4v), bem mais compacto, porém com perdas.
+
+	Os timestamps de captura (time.monotonic) vão para `timestamps.npy` e o
+	formato para `meta.json`.
+	"""
+	def __init__(self, path: str, fmt: str = "raw", fps: float = 30.0) -> None:
+		self.path = Path(path)
+		self.fmt = fmt
+		self.fps = fps
+		self.count = 0
+		self._shape: Optional[Tuple[int, ...]] = None
+		self._timestamps: List[float] = []
+		self._raw = None
+		self._writer = None
+		self.path.mkdir(parents=True, exist_ok=True)
+
+	def write(self, frame: np.ndarray, ts: float) -> None:
+		if self._shape is None:
+			self._shape = tuple(frame.shape)
+			if self.fmt == "video":
+				if cv2 is None:
+					raise RuntimeError("OpenCV indisponível para gravar vídeo")
+				h, w = frame.shape[:2]
+				self._writer = cv2.VideoWriter(str(self.path / _VIDEO_FILE), cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+			else:
+				self._raw = open(self.path / _RAW_FILE, "wb")
+		elif tuple(frame.shape) != self._shape:
+			# Resolução mudou no meio da gravação: descarta o frame
+			return
+		if self._writer is not None:
+			self._writer.write(frame)
+		else:
+			self._raw.write(np.ascontiguousarray(frame).data)
+		self._timestamps.append(ts)
+		self.count += 1
+
+	def close(self) -> None:
+		if self._raw is not None:
+			self._raw.close()
+			self._raw = None
+		if self._writer is not None:
+			self._writer.release()
+			self._writer = None
+		np.save(str(self.path / _TS_FILE), np.asarray(self._timestamps, dtype=np.float64))
+		meta = {"format": self.fmt, "shape": list(self._shape or ()), "dtype": "uint8", "count": self.count, "fps": self.fps}
+		(self.path / _META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+
+class RecordingSession:
+	"""Assina uma FrameSource e grava cada frame entregue numa thread própria."""
+	def __init__(self, source: FrameSource, path: str, fmt: str = "raw", max_fps: Optional[float] = None) -> None:
+		self._source = source
+		self._recorder = FrameRecorder(path, fmt, fps=max_fps or 30.0)
+		self._max_fps = max_fps
+		self._stop_event = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def count(self) -> int:
+		return self._recorder.count
+
+	def start(self) -> None:
+		if self._thread and self._thread.is_alive():
+			return
+		self._stop_event.clear()
+		self._thread = threading.Thread(target=self._run, name="RecordingThread", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stop_event.set()
+		if self._thread and self._thread.is_alive():
+			self._thread.join(timeout=2.0)
+
+	def _run(self) -> None:
+		sub = self._source.subscribe("recorder", max_fps=self._max_fps)
+		try:
+			while not self._stop_event.is_set():
+				item = sub.read(timeout=0.5)
+				if item is None:
+					continue
+				_, ts, frame = item
+				self._recorder.write(frame, ts)
+		finally:
+			sub.close()
+			self._recorder.close()
+
+
+class FrameRecording:
+	"""
+	Leitura de uma gravação: diretório do FrameRecorder, pilha .npy
+	(N x H x W x 3) ou arquivo de vídeo. Sem timestamps gravados, usa `fps`.
+	"""
+	def __init__(self, path: str, fps: float = 30.0) -> None:
+		self.path = Path(path)
+		self._frames = None  # memmap (raw/.npy)
+		self._video: Optional[Path] = None
+		meta: Dict[str, Any] = {}
+		if self.path.is_dir():
+			meta_file = self.path / _META_FILE
+			if meta_file.exists():
+				meta = json.loads(meta_file.read_text(encoding="utf-8"))
+			fps = float(meta.get("fps") or fps)
+			if meta.get("format") == "video" or (self.path / _VIDEO_FILE).exists():
+				self._video = self.path / _VIDEO_FILE
+			else:
+				shape = tuple(meta["shape"])
+				frame_bytes = int(np.prod(shape))
+				# A contagem vem do tamanho do arquivo: gravações interrompidas continuam legíveis
+				count = (self.path / _RAW_FILE).stat().st_size // frame_bytes
+				self._frames = np.memmap(str(self.path / _RAW_FILE), dtype=np.uint8, mode="r", shape=(count,) + shape)
+			ts_file = self.path / _TS_FILE
+			timestamps = np.load(str(ts_file)) if ts_file.exists() else None
+		elif self.path.suffix == ".npy":
+			self._frames = np.load(str(self.path), mmap_mode="r")
+			timestamps = None
+		else:
+			self._video = self.path
+			timestamps = None
+			if cv2 is not None:
+				cap = cv2.VideoCapture(str(self.path))
+				fps = cap.get(cv2.CAP_PROP_FPS) or fps
+				cap.release()
+		self.fps = fps
+		n = len(self) if timestamps is None else len(timestamps)
+		self.timestamps = timestamps if timestamps is not None else np.arange(n, dtype=np.float64) / max(1e-6, fps)
+
+	def __len__(self) -> int:
+		if self._frames is not None:
+			return int(self._frames.shape[0])
+		if self._video is not None and cv2 is not None:
+			cap = cv2.VideoCapture(str(self._video))
+			n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+			cap.release()
+			return n
+		return 0
+
+	def frames(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+		"""Itera (índice, timestamp gravado, frame BGR)."""
+		if self._frames is not None:
+			n = min(len(self._frames), len(self.timestamps))
+			for i in range(n):
+				yield i, float(self.timestamps[i]), self._frames[i]
+			return
+		if self._video is None or cv2 is None:
+			return
+		cap = cv2.VideoCapture(str(self._video))
+		try:
+			i = 0
+			while True:
+				ok, frame = cap.read()
+				if not ok or frame is None:
+					break
+				ts = float(self.timestamps[i]) if i < len(self.timestamps) else i / max(1e-6, self.fps)
+				yield i, ts, frame
+				i += 1
+		finally:
+			cap.release()
+
+
+class ReplayFrameSource(FrameSource):
+	"""
+	FrameSource que reproduz uma gravação no lugar da câmera.
+
+	- `speed` > 0: tempo real (1.0) ou multiplicado, respeitando os intervalos
+	  gravados; os timestamps publicados são os do relógio atual.
+	- `speed` = 0: o mais rápido possível em `lockstep`: cada frame só é
+	  publicado depois que todos os assinantes leram o anterior, e os
+	  timestamps publicados preservam os intervalos gravados. Assim o
+	  resultado não depende da velocidade da máquina.
+
+	Com `track_frames`, `frame_index` mapeia o timestamp publicado para o
+	índice do frame na gravação e `published_at`, para o instante em que foi
+	publicado (usado pelo benchmark).
+	"""
+	def __init__(
+		self,
+		path: str,
+		speed: float = 1.0,
+		loop: bool = False,
+		lockstep: Optional[bool] = None,
+		min_subscribers: int = 0,
+		ring_slots: int = 8,
+		track_frames: bool = False,
+	) -> None:
+		super().__init__(camera_index=-1, ring_slots=ring_slots)
+		self._path = path
+		self.speed = speed
+		self.loop = loop
+		self.lockstep = speed <= 0 if lockstep is None else lockstep
+		self.min_subscribers = min_subscribers
+		self.track_frames = track_frames
+		self.frame_index: Dict[float, int] = {}
+		self.published_at: Dict[float, float] = {}
+		self.finished = threading.Event()
+
+	def _delivered(self, sub) -> None:
+		if self.lockstep:
+			with self._cond:
+				self._cond.notify_all()
+
+	def _wait_consumed(self, seq: int, timeout: float = 5.0) -> None:
+		with self._cond:
+			self._cond.wait_for(
+				lambda: self._stop_event.is_set() or all(s._last_seq >= seq for s in self._subscribers),
+				timeout,
+			)
+
+	def _run(self) -> None:
+		self.finished.clear()
+		recording = FrameRecording(self._path)
+		self._opened = True
+		try:
+			with self._cond:
+				self._cond.wait_for(
+					lambda: self._stop_event.is_set() or len(self._subscribers) >= self.min_subscribers, 10.0,
+				)
+			base = time.monotonic()
+			offset = 0.0
+			while not self._stop_event.is_set():
+				first: Optional[float] = None
+				last_rts = 0.0
+				for i, rts, frame in recording.frames():
+					if self._stop_event.is_set():
+						break
+					if first is None:
+						first = rts
+					rel = offset + (rts - first)
+					last_rts = rts
+					if self.speed > 0:
+						delay = base + rel / self.speed - time.monotonic()
+						if delay > 0:
+							self._stop_event.wait(delay)
+						ts = time.monotonic()
+					else:
+						ts = base + rel
+					if self.track_frames:
+						self.frame_index[ts] = i
+						self.published_at[ts] = time.monotonic()
+					seq = self._publish_frame(frame, ts)
+					if self.lockstep:
+						self._wait_consumed(seq)
+				if not self.loop or first is None:
+					break
+				offset += (last_rts - first) + 1.0 / max(1e-6, recording.fps)
+		finally:
+			self._opened = False
+			self.finished.set()
+			with self._cond:
+				self._cond.notify_all()
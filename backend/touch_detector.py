@@ -1,7 +1,13 @@
 import threading
 import time
 from dataclasses import dataclass
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from .frame_source import FrameSource
+from .gestures import GestureRecognizer
+from .touch_engine import TouchEngine
 
 try:
 	import cv2  # type: ignore
@@ -22,33 +28,64 @@ class TouchEvent:
 	"""
 	Evento de toque normalizado no espaço da tela projetada.
 	x e y no intervalo [0.0, 1.0]
+	phase: "down", "move" ou "up" para contatos rastreados; "tap" para um
+	toque já completo (modo teste). ts no relógio time.monotonic.
 	"""
 	x: float
 	y: float
 	source: str = "detector"
+	phase: str = "tap"
+	contact_id: int = 0
+	ts: float = 0.0
+
+	def to_message(self) -> Dict[str, Any]:
+		if self.phase == "tap":
+			msg: Dict[str, Any] = {"type": "tap", "x": self.x, "y": self.y, "source": self.source}
+			if self.ts:
+				msg["ts"] = self.ts
+			return msg
+		return {"type": "touch", "phase": self.phase, "x": self.x, "y": self.y, "source": self.source, "id": self.contact_id, "ts": self.ts}
 
 
 class TouchDetector:
 	"""
-	Detector de toque por visão computacional (esqueleto).
+	Detector de toque por visão computacional.
+	Lê frames da FrameSource (até 60 fps) e os entrega ao TouchEngine, que
+	emite contatos já mapeados pela homografia de `homography_provider`.
+	Os contatos passam pelo GestureRecognizer na própria thread; `on_touch`
+	recebe TouchEvent (down/move/up) e GestureEvent (tap, drag, ...).
 	No modo teste, gera toques sintéticos a cada 3 segundos.
 	"""
 	def __init__(
 		self,
-		on_touch: Callable[[TouchEvent], None],
+		on_touch: Callable[[Any], None],
 		camera_index: int = 0,
 		test_mode: bool = False,
+		frame_source: Optional[FrameSource] = None,
+		homography_provider: Optional[Callable[[], Optional[np.ndarray]]] = None,
+		segmentation: str = "skin",
+		gestures: Optional[GestureRecognizer] = None,
+		lens_provider: Optional[Callable[[], Any]] = None,
 	) -> None:
 		self._on_touch = on_touch
 		self._camera_index = camera_index
 		self._test_mode = test_mode
 		self._stop_event = threading.Event()
 		self._thread: Optional[threading.Thread] = None
+		# Sem FrameSource compartilhada (e fora do modo teste), abre a própria câmera
+		self._owns_source = frame_source is None and not test_mode
+		self._frame_source: Optional[FrameSource] = FrameSource(camera_index) if self._owns_source else frame_source
+		self._engine = TouchEngine(
+			homography_provider=homography_provider, segmentation=segmentation, lens_provider=lens_provider,
+		)
+		self._gestures = gestures or GestureRecognizer()
 
 	def start(self) -> None:
 		if self._thread and self._thread.is_alive():
 			return
 		self._stop_event.clear()
+		if self._owns_source:
+			self._frame_source.start()
 		self._thread = threading.Thread(target=self._run_loop, name="TouchDetectorThread", daemon=True)
 		self._thread.start()
 
@@ -56,6 +93,8 @@ class TouchDetector:
 		self._stop_event.set()
 		if self._thread and self._thread.is_alive():
 			self._thread.join(timeout=2.0)
+		if self._owns_source:
+			self._frame_source.close()
 
 	def _run_loop(self) -> None:
 		if self._test_mode:
@@ -77,43 +116,32 @@ class TouchDetector:
 		if cv2 is None:
 			# Sem OpenCV, não emite toques automáticos
 			return
-		# Preferir DirectShow, com fallback para MSMF/ANY no Windows
-		cap = None
-		# Preferir MSMF primeiro no Windows (DSHOW pode falhar por índice em alguns sistemas)
-		for backend in (getattr(cv2, "CAP_MSMF", 1400), getattr(cv2, "CAP_DSHOW", 700), getattr(cv2, "CAP_ANY", 0)):
-			try:
-				cap_try = cv2.VideoCapture(self._camera_index, backend)
-				if cap_try.isOpened():
-					cap = cap_try
-					break
-				cap_try.release()
-			except Exception:
-				try:
-					cap_try.release()
-				except Exception:
-					pass
-		# Fallback final sem especificar backend
-		if cap is None:
-			try:
-				cap = cv2.VideoCapture(self._camera_index)
-			except Exception:
-				cap = None
-		if cap is None:
-			return
-		try:
-			cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-			cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-		except Exception:
-			pass
+		sub = self._frame_source.subscribe("touch_detector", max_fps=60.0)
 		try:
-			# Placeholder simples: apenas lê frames sem emitir toques
-			# Para produção: implementar detecção real de toque
+			# A assinatura entrega sempre o frame mais recente: se um frame
+			# estourar o orçamento, os intermediários são descartados
 			while not self._stop_event.is_set():
-				ok, _ = cap.read()
-				if not ok:
-					break
-				time.sleep(0.01)
+				# Acorda também no próximo prazo do reconhecedor (long-press, "up" pendente)
+				timeout = 0.5
+				deadline = self._gestures.next_deadline()
+				if deadline is not None:
+					timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+				got = sub.read(timeout=timeout)
+				if got is None:
+					self._emit(self._gestures.poll())
+					continue
+				_, ts, frame = got
+				for phase, x, y, contact_id in self._engine.process(frame, ts):
+					ev = TouchEvent(x=x, y=y, source="cv", phase=phase, contact_id=contact_id, ts=ts)
+					self._emit(self._gestures.feed(ev))
+				self._emit(self._gestures.poll())
 		finally:
-			cap.release()
+			sub.close()
+			self._gestures.reset()
 
+	def _emit(self, events: list) -> None:
+		for ev in events:
+			self._on_touch(ev)
 
+	def get_stats(self) -> Dict[str, Any]:
+		return self._engine.stats()
@@ -0,0 +1,292 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .calibration import LensModel, apply_homography_points
+
+try:
+	import cv2  # type: ignore
+except Exception:
+	cv2 = None
+
+
+@dataclass
+class Fingertip:
+	"""Ponta de dedo candidata num frame (pixels do frame original)."""
+	x: float
+	y: float
+	area: float
+
+
+class _Contact:
+	def __init__(self, contact_id: int, tip: Fingertip, ts: float) -> None:
+		self.id = contact_id
+		self.x = tip.x
+		self.y = tip.y
+		self.still_frames = 0
+		self.touching = False
+		self.last_ts = ts
+		self.missed = 0
+		self.reported = False
+
+
+class TouchEngine:
+	"""
+	Motor de toque por câmera sobre a superfície projetada.
+
+	Pipeline por frame (tudo vetorizado em OpenCV/NumPy, na resolução de
+	processamento `proc_size`):
+	1. modelo de fundo por média móvel (cv2.accumulateWeighted), atualizado
+	   só onde não há primeiro plano;
+	2. segmentação: diferença de fundo combinada com pele (YCrCb) ou, em
+	   câmeras IR, com limiar de brilho;
+	3. contornos dentro da área projetada; a ponta do dedo é o ponto do
+	   contorno mais distante de onde a mão entra na imagem;
+	4. heurística de contato com o plano: a ponta precisa ficar parada
+	   (velocidade abaixo de `still_speed`) por `dwell_frames` frames para
+	   gerar "down"; depois segue com "move" até sumir ou saltar mais que
+	   `lift_speed` num frame ("up").
+
+	`still_speed`, `lift_speed` e `match_radius` são frações da diagonal do
+	frame por frame (0.004 ~ 6 px em 720p, 9 px em 1080p), então valem para
+	qualquer resolução de câmera.
+
+	As coordenadas emitidas já passam pela homografia (projetor 0..1); sem
+	calibração, ficam normalizadas à câmera.
+	"""
+	def __init__(
+		self,
+		homography_provider: Optional[Callable[[], Optional[np.ndarray]]] = None,
+		proc_size: Tuple[int, int] = (640, 360),
+		segmentation: str = "skin",
+		min_area: float = 150.0,
+		fg_threshold: int = 28,
+		ir_threshold: int = 200,
+		learning_rate: float = 0.02,
+		dwell_frames: int = 4,
+		still_speed: float = 0.004,
+		lift_speed: float = 0.05,
+		match_radius: float = 0.06,
+		budget_ms: float = 16.0,
+		lens_provider: Optional[Callable[[], Optional[LensModel]]] = None,
+	) -> None:
+		self._homography_provider = homography_provider
+		# Lente no modo "points": só as pontas de dedo são corrigidas, não o frame
+		self._lens_provider = lens_provider
+		self._proc_size = proc_size
+		self.segmentation = segmentation
+		self.min_area = min_area
+		self.fg_threshold = fg_threshold
+		self.ir_threshold = ir_threshold
+		self.learning_rate = learning_rate
+		self.dwell_frames = dwell_frames
+		self.still_speed = still_speed
+		self.lift_speed = lift_speed
+		self.match_radius = match_radius
+		self.budget_ms = budget_ms
+		self._background: Optional[np.ndarray] = None
+		self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5)) if cv2 is not None else None
+		self._roi_cache: Optional[tuple] = None  # (H, lente, frame shape, máscara)
+		self._contacts: List[_Contact] = []
+		self._next_id = 1
+		# Estatísticas de custo por frame
+		self.frames = 0
+		self.over_budget = 0
+		self.avg_ms = 0.0
+
+	def reset_background(self) -> None:
+		self._background = None
+
+	def _roi_mask(self, H: Optional[np.ndarray], lens: Optional[LensModel], frame_w: int, frame_h: int) -> Optional[np.ndarray]:
+		"""Máscara (em proc_size) da área projetada, recalculada só quando H ou a lente mudam."""
+		if H is None:
+			return None
+		cached = self._roi_cache
+		if cached is not None and cached[0] is H and cached[1] is lens and cached[2] == (frame_w, frame_h):
+			return cached[3]
+		mask = None
+		try:
+			Hinv = np.linalg.inv(H)
+			if lens is None:
+				border = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float64)
+			else:
+				# Com distorção os lados ficam curvos: amostra a borda em sentido horário
+				t = np.linspace(0.0, 1.0, 9)[:-1]
+				zeros, ones = np.zeros_like(t), np.ones_like(t)
+				border = np.concatenate([
+					np.stack([t, zeros], 1), np.stack([ones, t], 1),
+					np.stack([1.0 - t, ones], 1), np.stack([zeros, 1.0 - t], 1),
+				])
+			cam = apply_homography_points(Hinv, border)
+			if lens is not None:
+				cam = lens.distort_points(cam, frame_w, frame_h)
+			pw, ph = self._proc_size
+			poly = np.round(cam * [pw / frame_w, ph / frame_h]).astype(np.int32)
+			mask = np.zeros((ph, pw), dtype=np.uint8)
+			cv2.fillPoly(mask, [poly], 255)
+		except Exception:
+			mask = None
+		self._roi_cache = (H, lens, (frame_w, frame_h), mask)
+		return mask
+
+	def _segment(self, small: np.ndarray, gray: np.ndarray) -> np.ndarray:
+		bg = self._background
+		fg = cv2.absdiff(gray, cv2.convertScaleAbs(bg))
+		_, fg = cv2.threshold(fg, self.fg_threshold, 255, cv2.THRESH_BINARY)
+		if self.segmentation == "ir":
+			_, bright = cv2.threshold(gray, self.ir_threshold, 255, cv2.THRESH_BINARY)
+			mask = cv2.bitwise_and(fg, bright)
+		elif self.segmentation == "skin":
+			ycrcb = cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb)
+			skin = cv2.inRange(ycrcb, (0, 133, 77), (255, 173, 127))
+			mask = cv2.bitwise_and(fg, skin)
+		else:
+			mask = fg
+		return cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._kernel)
+
+	def _fingertips(self, mask: np.ndarray, sx: float, sy: float) -> List[Fingertip]:
+		contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+		ph, pw = mask.shape[:2]
+		tips: List[Fingertip] = []
+		for c in contours:
+			area = cv2.contourArea(c)
+			if area < self.min_area:
+				continue
+			pts = c.reshape(-1, 2).astype(np.float32)
+			# Ponto de entrada da mão: pontos do contorno na borda da imagem (ou base da caixa)
+			on_border = (pts[:, 0] <= 2) | (pts[:, 1] <= 2) | (pts[:, 0] >= pw - 3) | (pts[:, 1] >= ph - 3)
+			if on_border.any():
+				entry = pts[on_border].mean(axis=0)
+			else:
+				x, y, w, h = cv2.boundingRect(c)
+				entry = np.array([x + w * 0.5, y + h], dtype=np.float32)
+			d2 = ((pts - entry) ** 2).sum(axis=1)
+			tip = pts[int(np.argmax(d2))]
+			tips.append(Fingertip(x=float(tip[0]) * sx, y=float(tip[1]) * sy, area=float(area)))
+		return tips
+
+	def _update_contacts(self, tips: List[Fingertip], ts: float, diag: float) -> List[Tuple[str, _Contact]]:
+		"""
+		Associa pontas aos contatos anteriores e retorna as transições de
+		contato com a superfície: ("down"|"move"|"up", contato). `diag` é a
+		diagonal do frame em pixels (escala dos limiares).
+		"""
+		changes: List[Tuple[str, _Contact]] = []
+		unmatched = list(range(len(tips)))
+		r2 = (self.match_radius * diag) ** 2
+		still = self.still_speed * diag
+		lift = self.lift_speed * diag
+		for contact in self._contacts:
+			best = -1
+			best_d2 = r2
+			for j in unmatched:
+				d2 = (tips[j].x - contact.x) ** 2 + (tips[j].y - contact.y) ** 2
+				if d2 <= best_d2:
+					best, best_d2 = j, d2
+			if best < 0:
+				contact.missed += 1
+				contact.still_frames = 0
+				continue
+			unmatched.remove(best)
+			tip = tips[best]
+			speed = best_d2 ** 0.5
+			contact.x, contact.y = tip.x, tip.y
+			contact.last_ts = ts
+			contact.missed = 0
+			if speed <= still:
+				contact.still_frames += 1
+			else:
+				contact.still_frames = 0
+				# Salto grande: considera que o dedo saiu da superfície
+				if contact.touching and speed > lift:
+					contact.touching = False
+					changes.append(("up", contact))
+					continue
+			if contact.touching:
+				if speed > 0.0:
+					changes.append(("move", contact))
+			elif contact.still_frames >= self.dwell_frames:
+				contact.touching = True
+				changes.append(("down", contact))
+		# Contatos perdidos por 2 frames são encerrados
+		alive: List[_Contact] = []
+		for c in self._contacts:
+			if c.missed < 2:
+				alive.append(c)
+			elif c.touching:
+				c.touching = False
+				changes.append(("up", c))
+		self._contacts = alive
+		for j in unmatched:
+			self._contacts.append(_Contact(self._next_id, tips[j], ts))
+			self._next_id += 1
+		return changes
+
+	def _to_output(
+		self, points: np.ndarray, frame_w: int, frame_h: int, H: Optional[np.ndarray], lens: Optional[LensModel] = None,
+	) -> np.ndarray:
+		if lens is not None:
+			points = lens.undistort_points(points, frame_w, frame_h)
+		if H is not None:
+			return apply_homography_points(H, points)
+		return points / (frame_w, frame_h)
+
+	def process(self, frame: np.ndarray, ts: Optional[float] = None) -> List[Tuple[str, float, float, int]]:
+		"""
+		Processa um frame BGR e retorna as transições de contato deste frame
+		como (phase, x, y, contact_id), com phase "down", "move" ou "up" e x,y
+		no espaço do projetor (ou da câmera sem H). Contatos que começam fora
+		da área projetada são ignorados até o fim.
+		"""
+		if cv2 is None:
+			return []
+		t0 = time.perf_counter()
+		ts = time.monotonic() if ts is None else ts
+		frame_h, frame_w = frame.shape[:2]
+		pw, ph = self._proc_size
+		small = cv2.resize(frame, (pw, ph), interpolation=cv2.INTER_LINEAR) if (frame_w, frame_h) != (pw, ph) else frame
+		gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+		if self._background is None or self._background.shape != gray.shape:
+			self._background = gray.astype(np.float32)
+			return []
+		mask = self._segment(small, gray)
+		H = self._homography_provider() if self._homography_provider is not None else None
+		lens = self._lens_provider() if self._lens_provider is not None else None
+		roi = self._roi_mask(H, lens, frame_w, frame_h)
+		if roi is not None:
+			mask = cv2.bitwise_and(mask, roi)
+		# Fundo só aprende onde não há mão
+		cv2.accumulateWeighted(gray, self._background, self.learning_rate, mask=cv2.bitwise_not(mask))
+		tips = self._fingertips(mask, frame_w / pw, frame_h / ph)
+		out = []
+		changes = self._update_contacts(tips, ts, float(np.hypot(frame_w, frame_h)))
+		if not changes:
+			self._account(time.perf_counter() - t0)
+			return out
+		# Todos os contatos do frame mapeados numa única chamada
+		points = np.array([[c.x, c.y] for _, c in changes], dtype=np.float64)
+		for (phase, c), (u, v) in zip(changes, self._to_output(points, frame_w, frame_h, H, lens).tolist()):
+			if phase == "down":
+				c.reported = 0.0 <= u <= 1.0 and 0.0 <= v <= 1.0
+			if c.reported:
+				out.append((phase, u, v, c.id))
+		self._account(time.perf_counter() - t0)
+		return out
+
+	def _account(self, elapsed: float) -> None:
+		ms = elapsed * 1000.0
+		self.frames += 1
+		self.avg_ms += 0.05 * (ms - self.avg_ms) if self.frames > 1 else ms
+		if ms > self.budget_ms:
+			self.over_budget += 1
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"frames": self.frames,
+			"avg_ms": round(self.avg_ms, 2),
+			"over_budget": self.over_budget,
+			"budget_ms": self.budget_ms,
+			"contacts": len(self._contacts),
+		}
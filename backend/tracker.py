@@ -0,0 +1,173 @@
+import itertools
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+	"""IoU entre todas as caixas de `a` (N x 4) e `b` (M x 4), formato x1,y1,x2,y2."""
+	if a.size == 0 or b.size == 0:
+		return np.zeros((a.shape[0], b.shape[0]), dtype=np.float64)
+	x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+	y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+	x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+	y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+	inter = np.clip(x2 - x1, 0.0, None) * np.clip(y2 - y1, 0.0, None)
+	area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+	area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+	union = area_a[:, None] + area_b[None, :] - inter
+	return np.where(union > 0, inter / np.maximum(union, 1e-12), 0.0)
+
+
+def _box_to_z(box: Sequence[float]) -> np.ndarray:
+	x1, y1, x2, y2 = box
+	return np.array([(x1 + x2) * 0.5, (y1 + y2) * 0.5, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def _x_to_box(x: np.ndarray) -> List[float]:
+	cx, cy, w, h = x[:4]
+	w = max(0.0, w)
+	h = max(0.0, h)
+	return [
+		float(min(1.0, max(0.0, cx - w * 0.5))), float(min(1.0, max(0.0, cy - h * 0.5))),
+		float(min(1.0, max(0.0, cx + w * 0.5))), float(min(1.0, max(0.0, cy + h * 0.5))),
+	]
+
+
+def _transition(dt: float) -> np.ndarray:
+	F = np.eye(8)
+	F[0, 4] = F[1, 5] = F[2, 6] = F[3, 7] = dt
+	return F
+
+
+_H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+
+class Track:
+	"""
+	Um objeto rastreado: filtro de Kalman de velocidade constante sobre
+	(cx, cy, w, h) em coordenadas normalizadas, com o tempo em segundos.
+	"""
+	def __init__(self, track_id: int, label: str, confidence: float, box: Sequence[float], t: float) -> None:
+		self.id = track_id
+		self.label = label
+		self.confidence = confidence
+		self.x = np.zeros(8)
+		self.x[:4] = _box_to_z(box)
+		self.P = np.diag([1e-3, 1e-3, 1e-3, 1e-3, 1e-1, 1e-1, 1e-1, 1e-1])
+		self.t = t
+		self.last_seen = t
+		self.hits = 1
+		self.misses = 0
+
+	def predict(self, t: float, q: float) -> None:
+		dt = max(0.0, t - self.t)
+		if dt <= 0.0:
+			return
+		F = _transition(dt)
+		self.x = F @ self.x
+		# Ruído de processo proporcional ao intervalo
+		Q = np.diag([dt * q] * 4 + [dt * q * 10.0] * 4)
+		self.P = F @ self.P @ F.T + Q
+		self.t = t
+
+	def update(self, box: Sequence[float], confidence: float, r: float, t: float) -> None:
+		z = _box_to_z(box)
+		S = _H @ self.P @ _H.T + np.eye(4) * r
+		K = self.P @ _H.T @ np.linalg.inv(S)
+		self.x = self.x + K @ (z - _H @ self.x)
+		self.P = (np.eye(8) - K @ _H) @ self.P
+		self.confidence = confidence
+		self.last_seen = t
+		self.hits += 1
+		self.misses = 0
+
+	def box_at(self, t: float) -> List[float]:
+		"""Caixa extrapolada para o instante `t` sem alterar o estado."""
+		dt = max(0.0, t - self.t)
+		return _x_to_box(_transition(dt) @ self.x if dt > 0 else self.x)
+
+
+class MultiObjectTracker:
+	"""
+	Rastreador estilo SORT: associação por IoU (gulosa, mesma classe) e Kalman
+	por objeto. Atribui IDs estáveis entre inferências e prevê as caixas nos
+	instantes em que a inferência não roda, permitindo publicar detecções a
+	15–30 Hz com o YOLO a 2–3 Hz.
+	"""
+	def __init__(
+		self,
+		iou_threshold: float = 0.2,
+		max_age: float = 1.5,
+		min_hits: int = 1,
+		process_noise: float = 1e-3,
+		measurement_noise: float = 1e-4,
+	) -> None:
+		self.iou_threshold = iou_threshold
+		self.max_age = max_age
+		self.min_hits = min_hits
+		self._q = process_noise
+		self._r = measurement_noise
+		self._tracks: List[Track] = []
+		self._ids = itertools.count(1)
+
+	def __len__(self) -> int:
+		return len(self._tracks)
+
+	def update(self, objects: Sequence[Any], t: float) -> List[Dict[str, Any]]:
+		"""
+		Incorpora as detecções de um keyframe (objetos com label, confidence,
+		x1..y2) e retorna os tracks ativos no instante `t`.
+		"""
+		for tr in self._tracks:
+			tr.predict(t, self._q)
+		dets = np.array([[o.x1, o.y1, o.x2, o.y2] for o in objects], dtype=np.float64).reshape(-1, 4)
+		preds = np.array([tr.box_at(t) for tr in self._tracks], dtype=np.float64).reshape(-1, 4)
+		ious = iou_matrix(preds, dets)
+		# Só associa objetos da mesma classe
+		if ious.size:
+			track_labels = np.array([tr.label for tr in self._tracks], dtype=object)
+			det_labels = np.array([o.label for o in objects], dtype=object)
+			ious[track_labels[:, None] != det_labels[None, :]] = 0.0
+		matched_tracks = set()
+		matched_dets = set()
+		if ious.size:
+			order = np.argsort(-ious, axis=None)
+			for flat in order:
+				i, j = divmod(int(flat), ious.shape[1])
+				if ious[i, j] < self.iou_threshold:
+					break
+				if i in matched_tracks or j in matched_dets:
+					continue
+				self._tracks[i].update(dets[j], float(objects[j].confidence), self._r, t)
+				matched_tracks.add(i)
+				matched_dets.add(j)
+		for i, tr in enumerate(self._tracks):
+			if i not in matched_tracks:
+				tr.misses += 1
+		for j, o in enumerate(objects):
+			if j not in matched_dets:
+				self._tracks.append(Track(next(self._ids), o.label, float(o.confidence), dets[j], t))
+		# Remove tracks sem atualização há mais de max_age segundos
+		self._tracks = [tr for tr in self._tracks if t - tr.last_seen <= self.max_age]
+		return self.predict(t)
+
+	def predict(self, t: float) -> List[Dict[str, Any]]:
+		"""Tracks ativos com caixas extrapoladas para o instante `t`."""
+		out: List[Dict[str, Any]] = []
+		for tr in self._tracks:
+			if tr.hits < self.min_hits:
+				continue
+			if t - tr.last_seen > self.max_age:
+				continue
+			x1, y1, x2, y2 = tr.box_at(t)
+			out.append({
+				"track_id": tr.id,
+				"label": tr.label,
+				"confidence": tr.confidence,
+				"x1": x1, "y1": y1, "x2": x2, "y2": y2,
+			})
+		return out
+
+	def reset(self) -> None:
+		self._tracks = []
@@ -0,0 +1,139 @@
+import json
+import struct
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+try:
+	import orjson  # type: ignore
+except Exception:
+	orjson = None
+
+try:
+	import msgpack  # type: ignore
+except Exception:
+	msgpack = None
+
+# Codificações aceitas em /ws?encoding=...
+# - "json": texto JSON (padrão)
+# - "msgpack": MessagePack binário (precisa do pacote msgpack)
+# - "packed": detecções como float32 empacotado; demais mensagens em JSON
+ENCODINGS = ("json", "msgpack", "packed")
+
+PACKED_MAGIC = b"AXD1"
+# Colunas de "objects" e de "objects_mapped" no formato packed
+OBJECT_FIELDS = ("x1", "y1", "x2", "y2", "confidence", "track_id")
+MAPPED_FIELDS = ("cx", "cy", "q0x", "q0y", "q1x", "q1y", "q2x", "q2y", "q3x", "q3y")
+
+Payload = Union[str, bytes]
+
+
+def available_encoding(requested: str) -> str:
+	"""Codificação efetiva: cai para "json" se a pedida não existir ou faltar dependência."""
+	if requested == "msgpack" and msgpack is None:
+		return "json"
+	return requested if requested in ENCODINGS else "json"
+
+
+def dumps_json(message: Dict[str, Any]) -> str:
+	if orjson is not None:
+		return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+	return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def pack_detections(message: Dict[str, Any]) -> bytes:
+	"""
+	Layout (little-endian):
+	  "AXD1" | uint32 tamanho do cabeçalho | cabeçalho JSON (utf-8, alinhado a 4 bytes)
+	  | float32[n x 6] objects (x1, y1, x2, y2, confidence, track_id ou -1)
+	  | float32[n x 10] objects_mapped (cx, cy, 4 cantos do quad), se "mapped"
+	O cabeçalho leva os demais campos da mensagem mais "n", "labels" e "mapped".
+	"""
+	objects: List[Dict[str, Any]] = message.get("objects") or []
+	mapped_list = message.get("objects_mapped")
+	mapped = bool(mapped_list) and len(mapped_list) == len(objects)
+	header = {k: v for k, v in message.items() if k not in ("objects", "objects_mapped")}
+	header["n"] = len(objects)
+	header["labels"] = [o.get("label") for o in objects]
+	header["mapped"] = mapped
+	head = dumps_json(header).encode("utf-8")
+	head += b" " * (-len(head) % 4)
+	arr = np.empty((len(objects), len(OBJECT_FIELDS)), dtype="<f4")
+	for i, o in enumerate(objects):
+		tid = o.get("track_id")
+		arr[i] = (o["x1"], o["y1"], o["x2"], o["y2"], o["confidence"], -1 if tid is None else tid)
+	parts = [PACKED_MAGIC, struct.pack("<I", len(head)), head, arr.tobytes()]
+	if mapped:
+		m = np.empty((len(objects), len(MAPPED_FIELDS)), dtype="<f4")
+		for i, o in enumerate(mapped_list):
+			m[i, 0] = o["cx"]
+			m[i, 1] = o["cy"]
+			m[i, 2:] = np.asarray(o["quad"], dtype=np.float32).reshape(-1)
+		parts.append(m.tobytes())
+	return b"".join(parts)
+
+
+def unpack_detections(data: bytes) -> Dict[str, Any]:
+	"""Inverso de `pack_detections` (usado em testes e clientes Python)."""
+	if data[:4] != PACKED_MAGIC:
+		raise ValueError("não é uma mensagem packed")
+	(head_len,) = struct.unpack_from("<I", data, 4)
+	header = json.loads(data[8:8 + head_len])
+	n = header.pop("n")
+	labels = header.pop("labels")
+	mapped = header.pop("mapped")
+	off = 8 + head_len
+	arr = np.frombuffer(data, dtype="<f4", count=n * len(OBJECT_FIELDS), offset=off).reshape(n, -1)
+	objects = []
+	for label, row in zip(labels, arr.tolist()):
+		o = {"label": label, "confidence": row[4], "x1": row[0], "y1": row[1], "x2": row[2], "y2": row[3]}
+		if row[5] >= 0:
+			o["track_id"] = int(row[5])
+		objects.append(o)
+	header["objects"] = objects
+	if mapped:
+		off += arr.nbytes
+		m = np.frombuffer(data, dtype="<f4", count=n * len(MAPPED_FIELDS), offset=off).reshape(n, -1)
+		header["objects_mapped"] = [
+			{"label": o["label"], "confidence": o["confidence"], "cx": row[0], "cy": row[1],
+			 "quad": [row[2:4], row[4:6], row[6:8], row[8:10]],
+			 **({"track_id": o["track_id"]} if "track_id" in o else {})}
+			for o, row in zip(objects, m.tolist())
+		]
+	return header
+
+
+def encode(message: Dict[str, Any], encoding: str) -> Payload:
+	"""Texto (str) para frames de texto do WebSocket, bytes para frames binários."""
+	if encoding == "msgpack":
+		return msgpack.packb(message, use_bin_type=True)
+	if encoding == "packed" and message.get("type") == "detections" and isinstance(message.get("objects"), list):
+		return pack_detections(message)
+	return dumps_json(message)
+
+
+class EncodedMessage:
+	"""
+	Mensagem de um broadcast, compartilhada pelas filas de todos os clientes.
+	Cada codificação é gerada uma única vez, na primeira vez que algum
+	cliente a envia; mensagens descartadas nunca são codificadas.
+	"""
+	__slots__ = ("message", "lossless", "topic", "_payloads")
+
+	def __init__(self, message: Dict[str, Any], lossless: bool = False, topic: Optional[str] = None) -> None:
+		self.message = message
+		self.lossless = lossless
+		# Tópico de assinatura (ver backend/connections.py); None = mensagem de controle
+		self.topic = topic
+		self._payloads: Dict[str, Payload] = {}
+
+	def payload(self, encoding: str) -> Payload:
+		p = self._payloads.get(encoding)
+		if p is None:
+			# No packed, o que não é detecção sai igual ao JSON: reaproveita
+			key = encoding if encoding != "packed" or self.message.get("type") == "detections" else "json"
+			p = self._payloads.get(key)
+			if p is None:
+				p = self._payloads[key] = encode(self.message, key)
+			self._payloads[encoding] = p
+		return p
@@ -0,0 +1,2 @@
+# Presença na raiz do repositório: o pytest põe a raiz no sys.path e os
+# testes importam o pacote `backend` diretamente.
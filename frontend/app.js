@@ -58,17 +58,36 @@
 
 	// WebSocket para receber toques normalizados (x,y em [0..1])
 	let ws;
+	// Devolve ao servidor os carimbos do evento para medir a latência ponta a ponta (/api/latency)
+	function echoLatency(msg, handlerMs) {
+		if (!ws || ws.readyState !== WebSocket.OPEN || typeof msg.t_sent !== 'number') return;
+		try {
+			ws.send(JSON.stringify({ type: 'latency_echo', kind: msg.type, ts: msg.ts, t_sent: msg.t_sent, handler_ms: handlerMs }));
+		} catch {}
+	}
+	// Tópicos assinados já na conexão; ao reconectar, retoma do último seq recebido
+	const wsResume = AxonWire.createResume();
+	function openWs() {
+		return AxonWire.connect('packed', { topics: 'tap,detections', ...wsResume.params() });
+	}
+	// Toques reenviados na reconexão só valem se ainda forem recentes
+	const REPLAYED_TAP_MAX_AGE_MS = 1000;
+	function isStaleReplay(msg) {
+		return msg.replayed && msg.age_ms > REPLAYED_TAP_MAX_AGE_MS;
+	}
 	function connectWs() {
-		const proto = location.protocol === 'https:' ? 'wss' : 'ws';
-		ws = new WebSocket(`${proto}://${location.host}/ws`);
+		ws = openWs();
 		ws.onopen = () => setWsStatus('Conectado', true);
 		ws.onclose = () => { setWsStatus('Desconectado', false); setTimeout(connectWs, 1000); };
 		ws.onerror = () => setWsStatus('Erro', false);
 		ws.onmessage = (evt) => {
 			try {
-				const msg = JSON.parse(evt.data);
-				if (msg.type === 'tap' && typeof msg.x === 'number' && typeof msg.y === 'number') {
+				const msg = AxonWire.decode(evt.data);
+				wsResume.track(msg);
+				if (msg.type === 'tap' && typeof msg.x === 'number' && typeof msg.y === 'number' && !isStaleReplay(msg)) {
+					const t0 = performance.now();
 					handleTap(msg.x, msg.y);
+					echoLatency(msg, performance.now() - t0);
 				} else if (msg.type === 'detections' && Array.isArray(msg.objects)) {
 					// Se houver objetos mapeados ao projetor, usa centros (cx,cy) normalizados
 					if (Array.isArray(msg.objects_mapped) && msg.projector_mapped) {
@@ -554,16 +573,18 @@
 	(function extendWsHandler() {
 		const baseConnect = connectWs;
 		connectWs = function() {
-			const proto = location.protocol === 'https:' ? 'wss' : 'ws';
-			ws = new WebSocket(`${proto}://${location.host}/ws`);
+			ws = openWs();
 			ws.onopen = () => setWsStatus('Conectado', true);
 			ws.onclose = () => { setWsStatus('Desconectado', false); setTimeout(connectWs, 1000); };
 			ws.onerror = () => setWsStatus('Erro', false);
 			ws.onmessage = (evt) => {
 				try {
-					const msg = JSON.parse(evt.data);
-					if (msg.type === 'tap' && typeof msg.x === 'number' && typeof msg.y === 'number') {
+					const msg = AxonWire.decode(evt.data);
+					wsResume.track(msg);
+					if (msg.type === 'tap' && typeof msg.x === 'number' && typeof msg.y === 'number' && !isStaleReplay(msg)) {
+						const t0 = performance.now();
 						handleTap(msg.x, msg.y);
+						echoLatency(msg, performance.now() - t0);
 					} else if (msg.type === 'detections' && Array.isArray(msg.objects)) {
 						renderDetections(msg.objects);
 					}
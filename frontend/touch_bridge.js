@@ -0,0 +1,89 @@
+// Ponte de toque: converte os eventos de toque/gestos do /ws em eventos de
+// ponteiro e mouse sintéticos, para que telas como Sketch e PCB funcionem
+// na superfície projetada sem código específico. Depende de ws_codec.js
+// (AxonWire), carregado antes.
+(() => {
+	const targets = new Map(); // id do contato -> elemento que recebeu o down
+	let lastPinchScale = 1;
+
+	function toClient(msg) {
+		return {
+			x: Math.max(0, Math.min(1, msg.x)) * window.innerWidth,
+			y: Math.max(0, Math.min(1, msg.y)) * window.innerHeight,
+		};
+	}
+
+	function fire(el, type, msg, extra) {
+		if (!el) return;
+		const { x, y } = toClient(msg);
+		const init = { bubbles: true, cancelable: true, clientX: x, clientY: y, button: 0, buttons: type.endsWith('up') ? 0 : 1, ...extra };
+		let ev;
+		if (type.startsWith('pointer') && typeof PointerEvent === 'function') {
+			ev = new PointerEvent(type, { pointerId: msg.id || 1, pointerType: 'touch', isPrimary: targets.size <= 1, ...init });
+		} else if (type === 'wheel') {
+			ev = new WheelEvent(type, init);
+		} else {
+			ev = new MouseEvent(type, init);
+		}
+		el.dispatchEvent(ev);
+	}
+
+	function handle(msg) {
+		if (typeof msg.x !== 'number' || typeof msg.y !== 'number') return;
+		const { x, y } = toClient(msg);
+		if (msg.type === 'touch') {
+			if (msg.phase === 'down') {
+				const el = document.elementFromPoint(x, y);
+				targets.set(msg.id, el);
+				fire(el, 'pointerdown', msg);
+				fire(el, 'mousedown', msg);
+			} else if (msg.phase === 'move') {
+				const el = targets.get(msg.id) || document.elementFromPoint(x, y);
+				fire(el, 'pointermove', msg);
+				fire(el, 'mousemove', msg);
+			} else if (msg.phase === 'up') {
+				const el = targets.get(msg.id) || document.elementFromPoint(x, y);
+				targets.delete(msg.id);
+				fire(el, 'pointerup', msg);
+				fire(el, 'mouseup', msg);
+			}
+		} else if (msg.type === 'tap') {
+			fire(document.elementFromPoint(x, y), 'click', msg);
+		} else if (msg.type === 'long_press') {
+			fire(document.elementFromPoint(x, y), 'contextmenu', msg, { button: 2 });
+		} else if (msg.type === 'pinch' && typeof msg.scale === 'number') {
+			if (msg.phase === 'start') lastPinchScale = 1;
+			const delta = msg.scale - lastPinchScale;
+			lastPinchScale = msg.scale;
+			// Pinça vira zoom por roda (ctrlKey, como no trackpad)
+			if (Math.abs(delta) > 0.01) {
+				fire(document.elementFromPoint(x, y), 'wheel', msg, { deltaY: -delta * 500, ctrlKey: true });
+			}
+		}
+	}
+
+	// Só toques e gestos (tópico "tap" na própria URL: nenhuma detecção chega
+	// antes do onopen); ao reconectar, retoma do último seq recebido
+	const resume = AxonWire.createResume();
+	// Gestos reenviados na reconexão só valem se ainda forem recentes
+	const REPLAYED_MAX_AGE_MS = 1000;
+
+	function connect() {
+		const ws = AxonWire.connect('packed', { topics: 'tap', ...resume.params() });
+		ws.onclose = () => setTimeout(connect, 1000);
+		ws.onmessage = (evt) => {
+			try {
+				const msg = AxonWire.decode(evt.data);
+				resume.track(msg);
+				if (msg.replayed && msg.age_ms > REPLAYED_MAX_AGE_MS) return;
+				const t0 = performance.now();
+				handle(msg);
+				// Eco de latência (ver /api/latency)
+				if (typeof msg.t_sent === 'number' && ws.readyState === WebSocket.OPEN) {
+					ws.send(JSON.stringify({ type: 'latency_echo', kind: msg.type, ts: msg.ts, t_sent: msg.t_sent, handler_ms: performance.now() - t0 }));
+				}
+			} catch {}
+		};
+	}
+	connect();
+})();
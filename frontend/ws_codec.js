@@ -0,0 +1,78 @@
+// Decodificação das mensagens do /ws. Com /ws?encoding=packed as detecções
+// chegam como frame binário (float32 empacotado, ver backend/wire.py) e as
+// demais mensagens continuam em JSON.
+(() => {
+	const MAGIC = 'AXD1';
+	const OBJ_COLS = 6;    // x1, y1, x2, y2, confidence, track_id (-1 = sem)
+	const MAPPED_COLS = 10; // cx, cy, 4 cantos do quad
+	const textDecoder = new TextDecoder();
+
+	function unpackDetections(buf) {
+		const view = new DataView(buf);
+		const headLen = view.getUint32(4, true);
+		const msg = JSON.parse(textDecoder.decode(new Uint8Array(buf, 8, headLen)));
+		const n = msg.n;
+		let off = 8 + headLen;
+		const obj = new Float32Array(buf, off, n * OBJ_COLS);
+		msg.objects = msg.labels.map((label, i) => {
+			const r = i * OBJ_COLS;
+			const o = { label, confidence: obj[r + 4], x1: obj[r], y1: obj[r + 1], x2: obj[r + 2], y2: obj[r + 3] };
+			if (obj[r + 5] >= 0) o.track_id = obj[r + 5];
+			return o;
+		});
+		if (msg.mapped) {
+			off += n * OBJ_COLS * 4;
+			const m = new Float32Array(buf, off, n * MAPPED_COLS);
+			msg.objects_mapped = msg.objects.map((o, i) => {
+				const r = i * MAPPED_COLS;
+				const mo = {
+					label: o.label, confidence: o.confidence, cx: m[r], cy: m[r + 1],
+					quad: [[m[r + 2], m[r + 3]], [m[r + 4], m[r + 5]], [m[r + 6], m[r + 7]], [m[r + 8], m[r + 9]]],
+				};
+				if (o.track_id != null) mo.track_id = o.track_id;
+				return mo;
+			});
+		}
+		delete msg.n; delete msg.labels; delete msg.mapped;
+		return msg;
+	}
+
+	function decode(data) {
+		if (typeof data === 'string') return JSON.parse(data);
+		const head = new Uint8Array(data, 0, 4);
+		if (String.fromCharCode(...head) !== MAGIC) throw new Error('frame binário desconhecido');
+		return unpackDetections(data);
+	}
+
+	// Abre o /ws pedindo a codificação packed; `params` vai na query
+	// (ex.: { topics: 'tap,detections', last_seq: 42, epoch: '...' })
+	function connect(encoding = 'packed', params = {}) {
+		const proto = location.protocol === 'https:' ? 'wss' : 'ws';
+		const query = new URLSearchParams({ encoding });
+		for (const [k, v] of Object.entries(params)) if (v != null && v !== '') query.set(k, v);
+		const ws = new WebSocket(`${proto}://${location.host}/ws?${query}`);
+		ws.binaryType = 'arraybuffer';
+		return ws;
+	}
+
+	// Acompanha epoch/seq do servidor para retomar de onde parou ao reconectar
+	function createResume() {
+		const state = { epoch: '', seq: null };
+		return {
+			params() {
+				return state.seq == null ? {} : { last_seq: state.seq, epoch: state.epoch };
+			},
+			track(msg) {
+				if (msg.type === 'hello' || msg.type === 'snapshot') {
+					if (msg.epoch !== state.epoch) state.seq = null;
+					state.epoch = msg.epoch;
+					if (state.seq == null || msg.type === 'snapshot') state.seq = msg.seq;
+				} else if (typeof msg.seq === 'number' && (state.seq == null || msg.seq > state.seq)) {
+					state.seq = msg.seq;
+				}
+			},
+		};
+	}
+
+	window.AxonWire = { decode, connect, createResume };
+})();
@@ -1,8 +1,42 @@
+import argparse
+import os
+import subprocess
+import sys
+
 import uvicorn
 
-if __name__ == "__main__":
-	# Executa o servidor com reload desativado para manter uma única thread/processo
-	uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=False)
 
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Servidor do Axon.")
+	parser.add_argument("--host", default="0.0.0.0")
+	parser.add_argument("--port", type=int, default=8000)
+	parser.add_argument(
+		"--workers", type=int, default=1,
+		help="Workers da API. Com mais de 1, câmera e detectores rodam num processo produtor à parte "
+		     "e os eventos chegam aos workers pelo barramento (backend/event_bus.py)",
+	)
+	parser.add_argument("--producer-port", type=int, default=8001, help="Porta HTTP interna do processo produtor")
+	args = parser.parse_args()
+
+	if args.workers <= 1:
+		# Executa o servidor com reload desativado para manter uma única thread/processo
+		uvicorn.run("backend.main:app", host=args.host, port=args.port, reload=False)
+		return
 
- 
\ No newline at end of file
+	from backend.event_bus import default_address
+	env = dict(os.environ, AXON_BUS=default_address())
+	# Produtor único: dono da câmera, dos detectores e do hub do barramento
+	producer = subprocess.Popen(
+		[sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(args.producer_port)],
+		env=dict(env, AXON_ROLE="producer"),
+	)
+	try:
+		os.environ.update(env, AXON_ROLE="api")
+		uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers, reload=False)
+	finally:
+		producer.terminate()
+		producer.wait(timeout=10)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,103 @@
+"""
+Compara backends de inferência (latência, FPS e concordância das detecções
+com o primeiro backend) em frames salvos.
+
+	python -m scripts.bench_backends <pasta_de_imagens|frames.npy> --backends torch,onnx,onnx-int8
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.inference_backends import cv2, create_backend
+from backend.object_detector import DetectedObject
+from backend.tracker import iou_matrix
+
+
+def _load_frames(path: Path) -> List[np.ndarray]:
+	"""Carrega frames salvos: imagens (.jpg/.png) de um diretório ou uma pilha .npy (N x H x W x 3)."""
+	if path.suffix == ".npy":
+		stack = np.load(str(path), mmap_mode="r")
+		return [np.asarray(f) for f in stack]
+	frames: List[np.ndarray] = []
+	for p in sorted(path.iterdir()):
+		if p.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp"):
+			img = cv2.imread(str(p))
+			if img is not None:
+				frames.append(img)
+	return frames
+
+
+def _match_ratio(ref: List[DetectedObject], other: List[DetectedObject], iou_threshold: float = 0.5) -> float:
+	"""Fração das detecções de referência reencontradas (mesmo rótulo, IoU >= limiar)."""
+	if not ref:
+		return 1.0 if not other else 0.0
+	a = np.array([[o.x1, o.y1, o.x2, o.y2] for o in ref]).reshape(-1, 4)
+	b = np.array([[o.x1, o.y1, o.x2, o.y2] for o in other]).reshape(-1, 4)
+	ious = iou_matrix(a, b)
+	hits = 0
+	for i, o in enumerate(ref):
+		for j, p in enumerate(other):
+			if o.label == p.label and ious[i, j] >= iou_threshold:
+				hits += 1
+				break
+	return hits / len(ref)
+
+
+def benchmark(frames: List[np.ndarray], backends: List[str], model_name: str, min_confidence: float, warmup: int = 3) -> List[Dict[str, Any]]:
+	report: List[Dict[str, Any]] = []
+	reference: Optional[List[List[DetectedObject]]] = None
+	for name in backends:
+		be = create_backend(name, model_name, min_confidence)
+		t0 = time.perf_counter()
+		if not be.load():
+			report.append({"backend": name, "error": "indisponível"})
+			continue
+		load_s = time.perf_counter() - t0
+		for f in frames[:warmup]:
+			be.predict(f)
+		lat: List[float] = []
+		outputs: List[List[DetectedObject]] = []
+		for f in frames:
+			t = time.perf_counter()
+			outputs.append(be.predict(f))
+			lat.append((time.perf_counter() - t) * 1000.0)
+		arr = np.array(lat)
+		row: Dict[str, Any] = {
+			"backend": name,
+			"load_s": round(load_s, 2),
+			"frames": len(frames),
+			"mean_ms": round(float(arr.mean()), 2),
+			"p50_ms": round(float(np.percentile(arr, 50)), 2),
+			"p95_ms": round(float(np.percentile(arr, 95)), 2),
+			"fps": round(1000.0 / float(arr.mean()), 1),
+			"detections": sum(len(o) for o in outputs),
+		}
+		if reference is None:
+			reference = outputs
+		else:
+			row["agreement"] = round(float(np.mean([_match_ratio(r, o) for r, o in zip(reference, outputs)])), 3)
+		report.append(row)
+	return report
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Compara backends de inferência em frames salvos.")
+	parser.add_argument("frames", help="Diretório de imagens ou arquivo .npy com a pilha de frames")
+	parser.add_argument("--backends", default="torch,onnx,onnx-int8", help="Lista separada por vírgulas")
+	parser.add_argument("--model", default="yolov8n.pt")
+	parser.add_argument("--min-confidence", type=float, default=0.5)
+	args = parser.parse_args()
+	frames = _load_frames(Path(args.frames))
+	if not frames:
+		print("Nenhum frame encontrado.")
+		return
+	backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+	for row in benchmark(frames, backends, args.model, args.min_confidence):
+		print(row)
+
+
+if __name__ == "__main__":
+	main()
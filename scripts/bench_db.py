@@ -0,0 +1,136 @@
+"""
+Benchmark de listagem e importação no app.db: conexão nova por chamada (como
+antes do pool) x ConnectionPool em WAL. Roda num banco temporário.
+
+	python -m scripts.bench_db --items 500 --iterations 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from backend import db
+
+
+def _legacy_list(path: Path, table: str) -> List[Dict[str, Any]]:
+	conn = db._open(path)
+	try:
+		return [json.loads(r["data"]) for r in conn.execute(f"SELECT data FROM {table}").fetchall()]
+	finally:
+		conn.close()
+
+
+def _legacy_import(path: Path, table: str, items: List[Dict[str, Any]]) -> None:
+	conn = db._open(path)
+	try:
+		for obj in items:
+			db._upsert(conn, table, "id", str(obj["id"]), obj)
+		conn.commit()
+	finally:
+		conn.close()
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Any]:
+	if not samples:
+		return {"count": 0}
+	p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+	return {"count": len(samples), "p50": round(float(p50), 3), "p90": round(float(p90), 3), "p99": round(float(p99), 3)}
+
+
+def _timed(fn: Callable[[], Any], out: List[float]) -> None:
+	t0 = time.perf_counter()
+	fn()
+	out.append((time.perf_counter() - t0) * 1000.0)
+
+
+def bench(mode: str, directory: Path, items: int, iterations: int, readers: int) -> Dict[str, Any]:
+	path = directory / f"bench-{mode}.db"
+	pool = None
+	if mode == "legacy":
+		conn = db._open(path)
+		conn.execute("CREATE TABLE projects (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at INTEGER)")
+		conn.commit()
+		conn.close()
+		do_list = lambda: _legacy_list(path, "projects")
+		do_import = lambda batch: _legacy_import(path, "projects", batch)
+	else:
+		pool = db.ConnectionPool(path, readers=readers)
+		db.init_db(pool)
+		do_list = lambda: db.get_all_json("projects", pool=pool)
+		do_import = lambda batch: db.bulk_upsert_json("projects", batch, pool=pool)
+
+	def batch(i: int) -> List[Dict[str, Any]]:
+		return [{"id": f"p{k}", "name": f"Projeto {k}", "rev": i, "notes": "x" * 200} for k in range(items)]
+
+	errors = {"read": 0, "import": 0}
+	try:
+		do_import(batch(0))
+		list_ms: List[float] = []
+		import_ms: List[float] = []
+		for i in range(iterations):
+			_timed(do_list, list_ms)
+			_timed(lambda: do_import(batch(i + 1)), import_ms)
+
+		# Listagens concorrentes (como várias requisições no threadpool) enquanto outra thread importa
+		stop = threading.Event()
+
+		def importer() -> None:
+			i = 0
+			while not stop.is_set():
+				try:
+					do_import(batch(i))
+				except sqlite3.OperationalError:
+					errors["import"] += 1
+				i += 1
+
+		def read_one(out: List[float]) -> None:
+			try:
+				_timed(do_list, out)
+			except sqlite3.OperationalError:
+				errors["read"] += 1
+
+		contended_ms: List[float] = []
+		thread = threading.Thread(target=importer, daemon=True)
+		thread.start()
+		with ThreadPoolExecutor(max_workers=readers) as ex:
+			list(ex.map(lambda _: read_one(contended_ms), range(iterations * readers)))
+		stop.set()
+		thread.join()
+	finally:
+		if pool is not None:
+			pool.close()
+	return {
+		"mode": mode,
+		"items": items,
+		"list_ms": _percentiles(list_ms),
+		"import_ms": _percentiles(import_ms),
+		"concurrent_list_during_import_ms": _percentiles(contended_ms),
+		"errors": errors,
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--items", type=int, default=500, help="Objetos por importação")
+	parser.add_argument("--iterations", type=int, default=50)
+	parser.add_argument("--readers", type=int, default=db.READERS, help="Leituras simultâneas")
+	args = parser.parse_args()
+	with tempfile.TemporaryDirectory() as tmp:
+		for mode in ("legacy", "pool"):
+			# Os logs "[DB] ..." de cada importação ficariam no meio da medição
+			with contextlib.redirect_stdout(io.StringIO()):
+				result = bench(mode, Path(tmp), args.items, args.iterations, args.readers)
+			print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,98 @@
+"""
+Benchmark da passagem thread -> loop: run_coroutine_threadsafe (caminho
+antigo) x EventBridge, com produtores em threads.
+
+	python -m scripts.bench_event_queue --rate 250 --producers 2
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict
+
+from backend.event_queue import EventBridge, EventQueue
+from backend.latency import LatencyHistogram
+
+
+def bench_path(path: str, rate: float, seconds: float, producers: int) -> Dict[str, Any]:
+	"""Produtores em threads a `rate` eventos/s cada; mede o custo no produtor e a latência até o loop."""
+	hist = LatencyHistogram()
+	producer_cost = LatencyHistogram()
+
+	async def run() -> int:
+		loop = asyncio.get_running_loop()
+		queue = EventQueue()
+		if path == "bridge":
+			bridge = EventBridge(loop, queue.put_nowait)
+			submit = bridge.submit
+		else:
+			aqueue: asyncio.Queue = asyncio.Queue()
+
+			async def pump() -> None:
+				while True:
+					queue.put_nowait(await aqueue.get())
+			pump_task = asyncio.create_task(pump())
+
+			def submit(item: Any) -> None:
+				asyncio.run_coroutine_threadsafe(aqueue.put(item), loop)
+
+		stop = threading.Event()
+
+		def produce(pid: int) -> None:
+			interval = 1.0 / rate
+			next_at = time.perf_counter()
+			i = 0
+			while not stop.is_set():
+				t0 = time.perf_counter()
+				kind = "touch" if i % 4 == 0 else "detections"
+				submit((time.monotonic(), {"type": kind, "source": f"p{pid}", "i": i}))
+				producer_cost.record((time.perf_counter() - t0) * 1000.0)
+				i += 1
+				next_at += interval
+				delay = next_at - time.perf_counter()
+				if delay > 0:
+					time.sleep(delay)
+
+		threads = [threading.Thread(target=produce, args=(p,), daemon=True) for p in range(producers)]
+		for t in threads:
+			t.start()
+		received = 0
+		deadline = loop.time() + seconds
+		while loop.time() < deadline:
+			try:
+				t_emit, _ = await asyncio.wait_for(queue.get(), timeout=0.1)
+			except asyncio.TimeoutError:
+				continue
+			hist.record((time.monotonic() - t_emit) * 1000.0)
+			received += 1
+		stop.set()
+		for t in threads:
+			t.join()
+		if path != "bridge":
+			pump_task.cancel()
+		return received
+
+	t0 = time.process_time()
+	received = asyncio.run(run())
+	return {
+		"path": path,
+		"events_per_s": round(received / seconds, 1),
+		"cpu_s": round(time.process_time() - t0, 3),
+		"handoff_ms": hist.snapshot(),
+		"submit_ms": producer_cost.snapshot(),
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark da passagem thread -> loop (run_coroutine_threadsafe x EventBridge).")
+	parser.add_argument("--rate", type=float, default=250.0, help="Eventos/s por produtor")
+	parser.add_argument("--producers", type=int, default=2)
+	parser.add_argument("--seconds", type=float, default=3.0)
+	args = parser.parse_args()
+	for path in ("coroutine", "bridge"):
+		print(json.dumps(bench_path(path, args.rate, args.seconds, args.producers), indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,29 @@
+"""
+Calibração da lente (tabuleiro de xadrez) a partir de frames salvos; o
+resultado vai para o mesmo arquivo usado pela API.
+
+	python -m scripts.calibrate_lens [backend/lens_frames] --pattern 9x6 --mode points
+"""
+import argparse
+from pathlib import Path
+
+from backend.calibration import LENS_FILE, LENS_MODES, LENS_FRAMES_DIR, calibrate_lens, load_lens_frames, save_lens
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Calibração da lente (tabuleiro de xadrez) a partir de frames salvos.")
+	parser.add_argument("frames", nargs="?", default=str(LENS_FRAMES_DIR), help="Diretório com imagens do tabuleiro")
+	parser.add_argument("--pattern", default="9x6", help="Cantos internos, colunas x linhas")
+	parser.add_argument("--mode", choices=LENS_MODES, default="points")
+	args = parser.parse_args()
+	cols, rows = (int(v) for v in args.pattern.lower().split("x"))
+	lens = calibrate_lens(load_lens_frames(Path(args.frames)), (cols, rows), args.mode)
+	if lens is None:
+		print("Tabuleiro não encontrado em frames suficientes.")
+		return
+	save_lens(lens)
+	print(f"Lente salva em {LENS_FILE} (erro RMS {lens.rms:.3f} px, modo {lens.mode})")
+
+
+if __name__ == "__main__":
+	main()
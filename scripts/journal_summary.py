@@ -0,0 +1,24 @@
+"""
+Resumo do diário binário de eventos (AXON_JOURNAL): contagens por tipo e
+percentis de latência captura -> broadcast.
+
+	python -m scripts.journal_summary DIR --kinds tap,detections
+"""
+import argparse
+import json
+from pathlib import Path
+
+from backend.journal import load, summary
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Resumo do diário binário de eventos (AXON_JOURNAL).")
+	parser.add_argument("directory")
+	parser.add_argument("--kinds", default="", help="Tipos separados por vírgula (ex.: tap,detections)")
+	args = parser.parse_args()
+	data = load(Path(args.directory), [k for k in args.kinds.split(",") if k] or None)
+	print(json.dumps({"records": int(len(data)), "kinds": summary(data)}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+	main()
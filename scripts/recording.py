@@ -0,0 +1,202 @@
+"""
+Gravação e replay de frames para benchmark offline dos detectores. Aceita
+qualquer caminho (a API fica restrita ao diretório de gravações).
+
+	python -m scripts.recording record gravacao/ --seconds 20
+	python -m scripts.recording bench gravacao/ --out run.json [--compare anterior.json] [--touch]
+	python -m scripts.recording compare a.json b.json
+"""
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.frame_source import FrameSource
+from backend.motion_gate import MotionGate
+from backend.object_detector import ObjectDetector
+from backend.recording import RecordingSession, ReplayFrameSource
+from backend.touch_detector import TouchDetector
+from backend.tracker import iou_matrix
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+	if not values:
+		return {"mean": None, "p50": None, "p90": None, "p99": None}
+	arr = np.asarray(values, dtype=np.float64)
+	return {
+		"mean": round(float(arr.mean()), 2),
+		"p50": round(float(np.percentile(arr, 50)), 2),
+		"p90": round(float(np.percentile(arr, 90)), 2),
+		"p99": round(float(np.percentile(arr, 99)), 2),
+	}
+
+
+def record(camera_index: int, out: str, seconds: float, fmt: str = "raw", max_fps: Optional[float] = None) -> int:
+	source = FrameSource(camera_index)
+	source.start()
+	session = RecordingSession(source, out, fmt, max_fps)
+	session.start()
+	try:
+		time.sleep(seconds)
+	finally:
+		session.stop()
+		source.close()
+	return session.count
+
+
+def bench(
+	path: str,
+	backend: str = "torch",
+	model_name: str = "yolov8n.pt",
+	min_confidence: float = 0.5,
+	speed: float = 0.0,
+	motion_gate: bool = False,
+	touch: bool = False,
+) -> Dict[str, Any]:
+	"""
+	Reproduz a gravação pelo ObjectDetector (e opcionalmente pelo
+	TouchDetector) e mede fps, latências e as detecções por frame.
+	"""
+	source = ReplayFrameSource(path, speed=speed, min_subscribers=2 if touch else 1, track_frames=True)
+	events: List[Tuple[float, Dict[str, Any]]] = []
+	touches: List[Any] = []
+	lock = threading.Lock()
+
+	def _on_event(msg: Dict[str, Any]) -> None:
+		with lock:
+			events.append((time.monotonic(), msg))
+
+	detector = ObjectDetector(
+		on_event=_on_event,
+		model_name=model_name,
+		min_confidence=min_confidence,
+		target_fps=1000.0,
+		frame_source=source,
+		inference="thread",
+		backend=backend,
+		motion_gate=MotionGate() if motion_gate else None,
+	)
+	touch_detector = TouchDetector(on_touch=touches.append, frame_source=source) if touch else None
+	detector.start()
+	if touch_detector is not None:
+		touch_detector.start()
+	t0 = time.monotonic()
+	source.start()
+	source.finished.wait()
+	wall = time.monotonic() - t0
+	# Dá tempo para o último frame ser publicado antes de parar
+	time.sleep(0.5)
+	detector.stop()
+	if touch_detector is not None:
+		touch_detector.stop()
+	source.close()
+
+	detections: Dict[int, List[List[Any]]] = {}
+	infer_ms: List[float] = []
+	latency_ms: List[float] = []
+	for t_recv, msg in events:
+		ts = msg.get("ts")
+		if ts is None or ts not in source.frame_index:
+			continue
+		idx = source.frame_index[ts]
+		detections[idx] = [[o["label"], round(float(o["confidence"]), 4), o["x1"], o["y1"], o["x2"], o["y2"]] for o in msg["objects"]]
+		if msg.get("infer_ms") is not None:
+			infer_ms.append(float(msg["infer_ms"]))
+		latency_ms.append((t_recv - source.published_at[ts]) * 1000.0)
+	report: Dict[str, Any] = {
+		"recording": str(path),
+		"backend": backend,
+		"frames": len(source.frame_index),
+		"processed": len(detections),
+		"wall_s": round(wall, 2),
+		"fps": round(len(detections) / wall, 2) if wall > 0 else None,
+		"infer_ms": _percentiles(infer_ms),
+		"latency_ms": _percentiles(latency_ms),
+		"detections": {str(k): v for k, v in sorted(detections.items())},
+	}
+	if touch_detector is not None:
+		report["touch_events"] = len(touches)
+		report["touch_engine"] = touch_detector.get_stats()
+	return report
+
+
+def compare(a: Dict[str, Any], b: Dict[str, Any], iou_threshold: float = 0.5) -> Dict[str, Any]:
+	"""Diferença de detecções entre duas execuções, frame a frame (mesmo rótulo e IoU)."""
+	da, db = a.get("detections", {}), b.get("detections", {})
+	common = sorted(set(da) & set(db), key=int)
+	ratios: List[float] = []
+	changed: List[int] = []
+	for k in common:
+		ra, rb = da[k], db[k]
+		if not ra and not rb:
+			ratios.append(1.0)
+			continue
+		boxes_a = np.array([r[2:6] for r in ra], dtype=np.float64).reshape(-1, 4)
+		boxes_b = np.array([r[2:6] for r in rb], dtype=np.float64).reshape(-1, 4)
+		ious = iou_matrix(boxes_a, boxes_b)
+		same = np.array([[x[0] == y[0] for y in rb] for x in ra], dtype=bool).reshape(ious.shape)
+		hit = (ious >= iou_threshold) & same
+		# Simétrico: conta as correspondências dos dois lados
+		matched = int(hit.any(axis=1).sum()) + int(hit.any(axis=0).sum())
+		ratio = matched / float(len(ra) + len(rb))
+		ratios.append(ratio)
+		if ratio < 1.0:
+			changed.append(int(k))
+	return {
+		"frames_compared": len(common),
+		"only_in_a": len(set(da) - set(db)),
+		"only_in_b": len(set(db) - set(da)),
+		"agreement": round(float(np.mean(ratios)), 4) if ratios else None,
+		"frames_changed": len(changed),
+		"first_changed": changed[:20],
+		"fps": [a.get("fps"), b.get("fps")],
+		"infer_p50_ms": [a.get("infer_ms", {}).get("p50"), b.get("infer_ms", {}).get("p50")],
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Gravação e replay de frames para benchmark offline dos detectores.")
+	sub = parser.add_subparsers(dest="cmd", required=True)
+	p_rec = sub.add_parser("record", help="Grava a câmera num diretório")
+	p_rec.add_argument("out")
+	p_rec.add_argument("--camera", type=int, default=0)
+	p_rec.add_argument("--seconds", type=float, default=10.0)
+	p_rec.add_argument("--format", choices=("raw", "video"), default="raw")
+	p_rec.add_argument("--max-fps", type=float, default=None)
+	p_bench = sub.add_parser("bench", help="Reproduz uma gravação pelos detectores")
+	p_bench.add_argument("recording")
+	p_bench.add_argument("--backend", default="torch")
+	p_bench.add_argument("--model", default="yolov8n.pt")
+	p_bench.add_argument("--min-confidence", type=float, default=0.5)
+	p_bench.add_argument("--speed", type=float, default=0.0, help="0 = máximo (lockstep), 1 = tempo real")
+	p_bench.add_argument("--motion-gate", action="store_true")
+	p_bench.add_argument("--touch", action="store_true", help="Roda também o TouchDetector")
+	p_bench.add_argument("--out", help="Salva o relatório JSON")
+	p_bench.add_argument("--compare", help="Relatório JSON anterior para comparar")
+	p_cmp = sub.add_parser("compare", help="Compara dois relatórios JSON")
+	p_cmp.add_argument("a")
+	p_cmp.add_argument("b")
+	args = parser.parse_args()
+
+	if args.cmd == "record":
+		n = record(args.camera, args.out, args.seconds, args.format, args.max_fps)
+		print(f"{n} frames gravados em {args.out}")
+	elif args.cmd == "bench":
+		report = bench(args.recording, args.backend, args.model, args.min_confidence, args.speed, args.motion_gate, args.touch)
+		if args.out:
+			Path(args.out).write_text(json.dumps(report), encoding="utf-8")
+		print({k: v for k, v in report.items() if k != "detections"})
+		if args.compare:
+			print(compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report))
+	else:
+		a = json.loads(Path(args.a).read_text(encoding="utf-8"))
+		b = json.loads(Path(args.b).read_text(encoding="utf-8"))
+		print(compare(a, b))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,15 @@
+import pytest
+
+from backend import db
+
+
+@pytest.fixture(autouse=True)
+def _isolated_db(tmp_path, monkeypatch):
+	"""Nenhum teste toca o app.db versionado: cada um usa um banco temporário."""
+	path = tmp_path / "app.db"
+	# DB_PATH também aponta para o temporário: reaberturas após close_pool e
+	# get_connection() não caem no app.db
+	monkeypatch.setattr(db, "DB_PATH", path)
+	db.init_pool(path)
+	yield
+	db.close_pool()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+from backend.connections import ConnectionManager, TOPICS, topic_for
+from backend.gestures import GESTURE_KINDS, GestureEvent
+
+
+class FakeWebSocket:
+	"""WebSocket mínimo; com `blocked` setado, o envio fica parado (cliente lento)."""
+	def __init__(self, blocked: bool = False) -> None:
+		self.sent = []
+		self.gate = asyncio.Event()
+		if not blocked:
+			self.gate.set()
+
+	async def accept(self) -> None:
+		pass
+
+	async def send_text(self, data: str) -> None:
+		await self.gate.wait()
+		self.sent.append(data)
+
+	async def send_bytes(self, data: bytes) -> None:
+		await self.gate.wait()
+		self.sent.append(data)
+
+	async def close(self, code: int = 1000) -> None:
+		pass
+
+
+def _gesture(kind: str, **extra) -> dict:
+	return GestureEvent(kind, 0.5, 0.5, 1.0, contact_id=1, extra=extra).to_message()
+
+
+def _types(ws: FakeWebSocket) -> list:
+	return [json.loads(m)["type"] for m in ws.sent]
+
+
+def test_gesture_kinds_are_tap_topic_and_lossless():
+	manager = ConnectionManager()
+	for kind in GESTURE_KINDS + ("touch",):
+		assert topic_for({"type": kind}) == "tap"
+		assert kind in manager.lossless_types
+		assert kind in TOPICS["tap"]
+
+
+def test_gestures_follow_topic_subscription():
+	async def run():
+		manager = ConnectionManager()
+		taps, dets = FakeWebSocket(), FakeWebSocket()
+		await manager.connect(taps, topics=["tap"])
+		await manager.connect(dets, topics=["detections"])
+		manager.broadcast(_gesture("drag", phase="move"))
+		manager.broadcast(_gesture("long_press"))
+		manager.broadcast({"type": "detections", "objects": []})
+		await asyncio.sleep(0.01)
+		return _types(taps), _types(dets)
+
+	taps, dets = asyncio.run(run())
+	assert taps == ["hello", "drag", "long_press"]
+	assert dets == ["hello", "detections"]
+
+
+def test_gestures_survive_overflow():
+	async def run():
+		manager = ConnectionManager(max_queue=2, overflow="drop_oldest")
+		ws = FakeWebSocket(blocked=True)
+		await manager.connect(ws)
+		for i in range(5):
+			manager.broadcast({"type": "detections", "objects": [], "i": i})
+			manager.broadcast(_gesture("drag", phase="move"))
+		manager.broadcast(_gesture("pinch", phase="end", scale=1.5))
+		ws.gate.set()
+		await asyncio.sleep(0.01)
+		return _types(ws), manager.dropped
+
+	types, dropped = asyncio.run(run())
+	assert types.count("drag") == 5
+	assert types.count("pinch") == 1
+	assert dropped > 0
+
+
+def test_gestures_are_replayed_on_resume():
+	async def run():
+		manager = ConnectionManager()
+		manager.broadcast({"type": "detections", "objects": []})
+		manager.broadcast(_gesture("drag", phase="start"))
+		manager.broadcast(_gesture("long_press"))
+		ws = FakeWebSocket()
+		await manager.connect(ws, last_seq=1, epoch=manager.epoch)
+		await asyncio.sleep(0.01)
+		return _types(ws)
+
+	assert asyncio.run(run()) == ["hello", "drag", "long_press"]
+
+
+def test_resume_up_to_date_sends_only_hello():
+	async def run():
+		manager = ConnectionManager()
+		manager.broadcast(_gesture("tap"))
+		ws = FakeWebSocket()
+		await manager.connect(ws, last_seq=manager.seq, epoch=manager.epoch)
+		await asyncio.sleep(0.01)
+		return _types(ws), manager.resumes, manager.snapshots
+
+	assert asyncio.run(run()) == (["hello"], 0, 0)
+
+
+def test_resume_from_other_epoch_gets_snapshot():
+	async def run():
+		manager = ConnectionManager()
+		manager.broadcast({"type": "scanner", "running": True})
+		manager.broadcast({"type": "data", "collection": "notes"})
+		ws = FakeWebSocket()
+		await manager.connect(ws, last_seq=5, epoch="processo-anterior")
+		await asyncio.sleep(0.01)
+		return [json.loads(m) for m in ws.sent]
+
+	hello, snapshot = asyncio.run(run())
+	assert hello["type"] == "hello"
+	assert snapshot["type"] == "snapshot" and snapshot["seq"] == 2
+	assert snapshot["scanner"]["running"] is True
+	assert snapshot["data_changed"] == ["notes"]
+
+
+def test_resume_beyond_log_gets_snapshot_of_changes():
+	async def run():
+		manager = ConnectionManager(log_size=2)
+		manager.broadcast({"type": "data", "collection": "projects"})  # seq 1
+		manager.broadcast({"type": "data", "collection": "notes"})     # seq 2
+		for _ in range(3):
+			manager.broadcast(_gesture("tap"))                         # seq 3..5
+		ws = FakeWebSocket()
+		await manager.connect(ws, last_seq=1, epoch=manager.epoch)
+		await asyncio.sleep(0.01)
+		return [json.loads(m) for m in ws.sent], manager.snapshots
+
+	sent, snapshots = asyncio.run(run())
+	assert snapshots == 1
+	# Só o que mudou depois do último seq que o cliente viu
+	assert sent[-1]["type"] == "snapshot" and sent[-1]["data_changed"] == ["notes"]
+
+
+def test_resume_replays_only_logged_topics_with_age():
+	async def run():
+		manager = ConnectionManager()
+		manager.broadcast(_gesture("tap"))                       # seq 1
+		manager.broadcast({"type": "detections", "objects": []}) # fora do log
+		manager.broadcast({"type": "data", "collection": "notes"})
+		ws = FakeWebSocket()
+		await manager.connect(ws, last_seq=0, epoch=manager.epoch)
+		await asyncio.sleep(0.01)
+		return [json.loads(m) for m in ws.sent]
+
+	sent = asyncio.run(run())
+	assert [m["type"] for m in sent] == ["hello", "tap", "data"]
+	assert all(m["replayed"] and m["age_ms"] >= 0 for m in sent[1:])
+	assert [m["seq"] for m in sent[1:]] == [1, 3]
+
+
+def test_resume_across_detections_only_gap_replays_tap():
+	async def run():
+		manager = ConnectionManager(log_size=4)
+		for _ in range(150):
+			manager.broadcast({"type": "detections", "objects": []})
+		last_seq = manager.seq  # cliente cai aqui
+		for _ in range(50):
+			manager.broadcast({"type": "detections", "objects": []})
+		manager.broadcast(_gesture("tap"))
+		ws = FakeWebSocket()
+		await manager.connect(ws, topics=["tap"], last_seq=last_seq, epoch=manager.epoch)
+		await asyncio.sleep(0.01)
+		return [json.loads(m) for m in ws.sent], manager.snapshots
+
+	sent, snapshots = asyncio.run(run())
+	assert snapshots == 0
+	assert [m["type"] for m in sent] == ["hello", "tap"]
+	assert sent[1]["seq"] == 201 and sent[1]["replayed"]
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from backend import db
+
+
+def test_pool_uses_wal_and_round_trips(tmp_path):
+	db.init_db()
+	assert db.get_pool().journal_mode == "wal"
+	count, ids = db.bulk_upsert_json("notes", [{"id": "a", "t": 1}, {"x": 1}, {"id": "b", "t": 2}])
+	assert (count, ids) == (2, ["a", "b"])
+	db.bulk_upsert_json("notes", [{"id": "a", "t": 3}])
+	assert sorted(db.get_all_json("notes"), key=lambda o: o["id"]) == [{"id": "a", "t": 3}, {"id": "b", "t": 2}]
+
+
+def test_readers_are_not_blocked_by_an_open_write(tmp_path):
+	db.init_db()
+	db.bulk_upsert_json("notes", [{"id": "a"}])
+	pool = db.get_pool()
+	in_write = threading.Event()
+	release = threading.Event()
+
+	def slow_writer():
+		with pool.writer() as conn:
+			conn.execute("DELETE FROM notes")
+			in_write.set()
+			release.wait(2.0)
+
+	t = threading.Thread(target=slow_writer)
+	t.start()
+	try:
+		assert in_write.wait(2.0)
+		# Em WAL a leitura vê o último commit sem esperar a transação aberta
+		assert db.get_all_json("notes") == [{"id": "a"}]
+	finally:
+		release.set()
+		t.join()
+	assert db.get_all_json("notes") == []
+
+
+def test_concurrent_reads_use_separate_connections(tmp_path):
+	db.init_db()
+	pool = db.get_pool()
+	with pool.reader() as a, pool.reader() as b:
+		assert a is not b
+	assert pool.stats()["readers_open"] == 2
+	with pool.reader() as c:
+		assert c in (a, b)
+
+
+def test_failed_write_rolls_back(tmp_path):
+	db.init_db()
+	db.bulk_upsert_json("notes", [{"id": "a"}])
+	with pytest.raises(RuntimeError):
+		with db.writer() as conn:
+			conn.execute("DELETE FROM notes")
+			raise RuntimeError("falha no meio")
+	assert db.get_all_json("notes") == [{"id": "a"}]
+
+
+def test_replace_planner_is_one_transaction(tmp_path):
+	db.init_db()
+	db.replace_planner("state", {"v": 1}, [{"id": "e1"}, {"id": "e2"}])
+	assert db.replace_planner("state", {"v": 2}, [{"id": "e3"}, "inválido"]) == 1
+	assert db.get_singleton_state("state") == {"v": 2}
+	assert db.get_all_json("calendar_events") == [{"id": "e3"}]
+
+
+def test_close_checkpoints_the_wal(tmp_path):
+	db.init_db()
+	db.bulk_upsert_json("notes", [{"id": str(i)} for i in range(100)])
+	wal = db.DB_PATH.with_name(db.DB_PATH.name + "-wal")
+	assert wal.exists() and wal.stat().st_size > 0
+	db.close_pool()
+	assert not wal.exists() or wal.stat().st_size == 0
+	assert len(db.get_all_json("notes")) == 100
+
+
+def test_init_pool_switches_database_explicitly(tmp_path):
+	db.init_db()
+	db.bulk_upsert_json("notes", [{"id": "a"}])
+	pool = db.get_pool()
+	assert db.get_pool() is pool
+	other = db.init_pool(tmp_path / "outro.db")
+	assert db.get_pool() is other and other.path == tmp_path / "outro.db"
+	db.init_db()
+	assert db.get_all_json("notes") == []
+	db.init_pool(tmp_path / "app.db")
+	assert db.get_all_json("notes") == [{"id": "a"}]
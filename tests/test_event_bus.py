@@ -0,0 +1,77 @@
+import asyncio
+import os
+import tempfile
+
+from backend import event_bus
+from backend.event_bus import BusClient, BusHub
+
+
+def _address() -> str:
+	if os.name == "nt":
+		return "tcp:127.0.0.1:8799"
+	return "unix:" + os.path.join(tempfile.mkdtemp(), "bus.sock")
+
+
+async def _rpc(method, params):
+	if method == "echo":
+		return params
+	raise ValueError(method)
+
+
+async def _wait_for(cond, timeout: float = 2.0) -> None:
+	deadline = asyncio.get_running_loop().time() + timeout
+	while not cond():
+		if asyncio.get_running_loop().time() > deadline:
+			raise AssertionError("timeout")
+		await asyncio.sleep(0.01)
+
+
+def test_relay_between_workers_and_rpc():
+	async def run():
+		address = _address()
+		hub_seen, a_seen, b_seen = [], [], []
+		hub = BusHub(address, _rpc, on_publish=hub_seen.append)
+		await hub.start()
+		a, b = BusClient(address, a_seen.append), BusClient(address, b_seen.append)
+		a.start()
+		b.start()
+		await _wait_for(lambda: a.connected and b.connected and hub.stats()["workers"] == 2)
+		hub.publish({"type": "drag", "phase": "move"})
+		a.publish({"type": "data", "collection": "notes"})
+		await _wait_for(lambda: len(b_seen) == 2 and len(a_seen) == 1)
+		result = await a.call("echo", {"x": 1})
+		await a.stop()
+		await b.stop()
+		await hub.stop()
+		return hub_seen, a_seen, b_seen, result
+
+	hub_seen, a_seen, b_seen, result = asyncio.run(run())
+	# Quem publicou não recebe de volta; o hub repassa aos demais
+	assert a_seen == [{"type": "drag", "phase": "move"}]
+	assert b_seen == [{"type": "drag", "phase": "move"}, {"type": "data", "collection": "notes"}]
+	assert hub_seen == [{"type": "data", "collection": "notes"}]
+	assert result == {"x": 1}
+
+
+def test_gestures_are_not_dropped_for_slow_peers(monkeypatch):
+	# Buffer "cheio" desde o início: só o que é sem perda passa
+	monkeypatch.setattr(event_bus, "MAX_PEER_BUFFER", -1)
+
+	async def run():
+		address = _address()
+		hub = BusHub(address, _rpc)
+		await hub.start()
+		seen = []
+		client = BusClient(address, seen.append)
+		client.start()
+		await _wait_for(lambda: hub.stats()["workers"] == 1)
+		for kind in ("detections", "drag", "long_press", "pinch", "tap", "touch", "scanner"):
+			hub.publish({"type": kind})
+		await _wait_for(lambda: len(seen) == 6)
+		await client.stop()
+		await hub.stop()
+		return [m["type"] for m in seen], hub.dropped
+
+	types, dropped = asyncio.run(run())
+	assert types == ["drag", "long_press", "pinch", "tap", "touch", "scanner"]
+	assert dropped == 1
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+from backend.event_queue import EventBridge, EventQueue
+
+
+def test_queue_serves_touches_first_and_coalesces_detections():
+	async def run():
+		queue = EventQueue()
+		queue.put_nowait((1.0, {"type": "detections", "source": "yolo", "i": 1}))
+		queue.put_nowait((2.0, {"type": "tap", "i": 2}))
+		queue.put_nowait((3.0, {"type": "detections", "source": "yolo", "i": 3}))
+		queue.put_nowait((4.0, {"type": "touch", "i": 4}))
+		pressure = queue.pressure()
+		out = [(await queue.get())[1]["i"] for _ in range(queue.qsize())]
+		return out, pressure, queue.stats()
+
+	out, pressure, stats = asyncio.run(run())
+	# Toques em ordem antes da detecção; só a detecção mais nova sobrevive
+	assert out == [2, 4, 3]
+	assert pressure == 4
+	assert stats["coalesced"] == 1 and stats["enqueued_detections"] == 2
+
+
+def test_bridge_delivers_everything_from_many_threads_in_order():
+	producers, per_thread = 4, 2000
+
+	async def run():
+		received = []
+		bridge = EventBridge(asyncio.get_running_loop(), received.append)
+
+		def produce(pid: int) -> None:
+			for i in range(per_thread):
+				bridge.submit((pid, i))
+
+		threads = [threading.Thread(target=produce, args=(p,)) for p in range(producers)]
+		for t in threads:
+			t.start()
+		while any(t.is_alive() for t in threads) or bridge.stats()["pending"]:
+			await asyncio.sleep(0.001)
+		for t in threads:
+			t.join()
+		await asyncio.sleep(0.01)
+		return received, bridge.stats()
+
+	received, stats = asyncio.run(run())
+	assert len(received) == producers * per_thread
+	for pid in range(producers):
+		assert [i for p, i in received if p == pid] == list(range(per_thread))
+	assert stats["submitted"] == stats["delivered"] == producers * per_thread
+	# Vários eventos por agendamento do loop
+	assert stats["batches"] < stats["delivered"]
+
+
+def test_bridge_counts_sink_errors_and_keeps_draining():
+	async def run():
+		received = []
+
+		def sink(item):
+			if item == 1:
+				raise ValueError("falha")
+			received.append(item)
+
+		bridge = EventBridge(asyncio.get_running_loop(), sink)
+		for i in range(3):
+			bridge.submit(i)
+		await asyncio.sleep(0.01)
+		return received, bridge.stats()
+
+	received, stats = asyncio.run(run())
+	assert received == [0, 2]
+	assert stats["sink_errors"] == 1 and "falha" in stats["last_error"]
+
+
+def test_bridge_submit_after_loop_closed_is_counted():
+	loop = asyncio.new_event_loop()
+	bridge = EventBridge(loop, lambda item: None)
+	loop.close()
+	bridge.submit("tarde")
+	stats = bridge.stats()
+	assert stats["submit_errors"] == 1 and stats["pending"] == 0
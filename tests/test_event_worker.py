@@ -0,0 +1,26 @@
+import asyncio
+import time
+
+from backend import main
+from backend.event_queue import EventQueue
+
+
+def test_worker_survives_a_bad_message(monkeypatch):
+	sent = []
+	monkeypatch.setattr(main.manager, "broadcast", lambda message, relay=True: sent.append(message))
+	monkeypatch.setitem(main._worker_errors, "errors", 0)
+
+	async def run():
+		queue = EventQueue()
+		task = asyncio.create_task(main._event_queue_worker(queue))
+		now = time.monotonic()
+		queue.put_nowait((now, {"type": "tap", "x": 0.1, "y": 0.2, "ts": "não é número"}))
+		queue.put_nowait((now, {"type": "tap", "x": 0.3, "y": 0.4, "ts": now}))
+		await asyncio.sleep(0.05)
+		alive = not task.done()
+		task.cancel()
+		return alive
+
+	assert asyncio.run(run())
+	assert main._worker_errors["errors"] == 1
+	assert [m["x"] for m in sent] == [0.3]
@@ -0,0 +1,86 @@
+import numpy as np
+
+from backend.frame_ring import FrameRing
+from backend.frame_source import FrameSource
+
+
+def _frame(value: int, shape=(4, 6, 3)) -> np.ndarray:
+	return np.full(shape, value, dtype=np.uint8)
+
+
+def test_overwritten_slot_is_invalid():
+	ring = FrameRing((4, 6, 3), slots=4)
+	try:
+		seqs = [ring.write(_frame(i), float(i)) for i in range(1, 5)]
+		seq, ts, view = ring.get(seqs[0])
+		assert ts == 1.0 and view[0, 0, 0] == 1
+		assert not view.flags.writeable
+		# Dá a volta no ring: o slot do primeiro frame é reusado
+		ring.write(_frame(9), 9.0)
+		assert not ring.is_valid(seqs[0])
+		assert ring.get(seqs[0]) is None
+		assert view[0, 0, 0] == 9
+		assert ring.is_valid(seqs[-1])
+	finally:
+		del view
+		ring.close()
+
+
+def test_copy_is_detached_from_the_slot():
+	ring = FrameRing((4, 6, 3), slots=2)
+	try:
+		seq = ring.write(_frame(1), 1.0)
+		_, _, frame = ring.get(seq, copy=True)
+		ring.write(_frame(2), 2.0)
+		ring.write(_frame(3), 3.0)
+		assert frame[0, 0, 0] == 1
+	finally:
+		ring.close()
+
+
+def test_in_flight_write_is_not_readable():
+	ring = FrameRing((4, 6, 3), slots=2)
+	try:
+		seq, view = ring.begin_write()
+		assert ring.get(seq) is None
+		view[:] = 5
+		ring.commit(seq, 5.0)
+		assert ring.latest()[2][0, 0, 0] == 5
+	finally:
+		del view
+		ring.close()
+
+
+def test_close_waits_for_live_views():
+	ring = FrameRing((4, 6, 3), slots=2)
+	seq = ring.write(_frame(1), 1.0)
+	view = ring.get(seq)[2]
+	crop = view[1:3, 2:4]
+	del view
+	# O recorte ainda aponta para o bloco: desmapear agora seria um segfault
+	assert ring.views_alive() == 1
+	assert ring.close() is False
+	assert ring.is_valid(seq)
+	del crop
+	assert ring.close() is True
+
+
+def test_resized_ring_is_closed_after_subscribers_drain():
+	source = FrameSource()
+	sub = source.subscribe("test")
+	try:
+		source._publish_frame(_frame(1), 1.0)
+		seq, _, view = sub.read(timeout=0.1)
+		old = source.ring
+		# Resolução muda enquanto o assinante ainda tem a view do ring antigo
+		source._publish_frame(_frame(2, shape=(8, 6, 3)), 2.0)
+		assert source.ring is not old
+		assert source._retired == [old]
+		assert view[0, 0, 0] == 1
+		del view
+		item = sub.read(timeout=0.1)
+		assert item[2].shape == (8, 6, 3)
+		assert source._retired == []
+	finally:
+		sub.close()
+		source.close()
@@ -0,0 +1,118 @@
+from backend.gestures import GestureEvent, GestureRecognizer
+from backend.touch_detector import TouchEvent
+
+
+def _ev(phase: str, x: float, y: float, ts: float, cid: int = 1) -> TouchEvent:
+	return TouchEvent(x=x, y=y, source="cv", phase=phase, contact_id=cid, ts=ts)
+
+
+def _run(rec: GestureRecognizer, points) -> list:
+	"""Alimenta (phase, x, y, ts[, id]) chamando poll a cada ponto, como o TouchDetector."""
+	out = []
+	for p in points:
+		out += rec.feed(_ev(*p))
+		out += rec.poll(p[3])
+	return out
+
+
+def _names(events) -> list:
+	names = []
+	for e in events:
+		if isinstance(e, GestureEvent):
+			names.append(f"{e.kind}:{e.phase}" if e.phase else e.kind)
+		else:
+			names.append(f"touch:{e.phase}")
+	return names
+
+
+def test_tap_is_emitted_with_the_up_without_delay():
+	rec = GestureRecognizer()
+	out = _run(rec, [("down", 0.5, 0.5, 1.0), ("up", 0.501, 0.5, 1.1)])
+	assert _names(out) == ["touch:down", "touch:up", "tap"]
+	assert out[-1].ts == 1.1
+	assert rec.next_deadline() is None
+
+
+def test_slow_release_is_not_a_tap():
+	rec = GestureRecognizer(long_press=10.0)
+	out = _run(rec, [("down", 0.5, 0.5, 1.0), ("up", 0.5, 0.5, 1.5)])
+	assert _names(out) == ["touch:down", "touch:up"]
+
+
+def test_long_press_fires_once_from_poll():
+	rec = GestureRecognizer(long_press=0.6)
+	out = rec.feed(_ev("down", 0.3, 0.3, 1.0))
+	assert rec.next_deadline() == 1.6
+	assert rec.poll(1.59) == []
+	fired = rec.poll(1.6)
+	assert _names(fired) == ["long_press"] and rec.poll(2.0) == []
+	out = rec.feed(_ev("up", 0.3, 0.3, 2.1))
+	# Depois do long-press, soltar não gera tap
+	assert _names(out) == ["touch:up"]
+
+
+def test_drag_start_move_end():
+	rec = GestureRecognizer()
+	out = _run(rec, [
+		("down", 0.1, 0.1, 1.0),
+		("move", 0.11, 0.1, 1.02),
+		("move", 0.15, 0.1, 1.04),
+		("move", 0.2, 0.1, 1.06),
+		("up", 0.2, 0.1, 1.08),
+	])
+	assert _names(out) == [
+		"touch:down", "touch:move", "touch:move", "drag:start", "drag:move",
+		"touch:move", "drag:move", "touch:up", "drag:end",
+	]
+	start = out[3]
+	assert (start.x, start.y) == (0.1, 0.1)
+
+
+def test_tiny_moves_are_dropped():
+	rec = GestureRecognizer(move_epsilon=0.002)
+	out = _run(rec, [("down", 0.5, 0.5, 1.0), ("move", 0.5005, 0.5, 1.01), ("up", 0.5, 0.5, 1.05)])
+	assert _names(out) == ["touch:down", "touch:up", "tap"]
+
+
+def test_pinch_scale_relative_to_start():
+	rec = GestureRecognizer()
+	out = _run(rec, [
+		("down", 0.4, 0.5, 1.0, 1),
+		("down", 0.6, 0.5, 1.0, 2),
+		("move", 0.3, 0.5, 1.1, 1),
+		("move", 0.7, 0.5, 1.1, 2),
+		("up", 0.7, 0.5, 1.2, 2),
+		("up", 0.3, 0.5, 1.2, 1),
+	])
+	pinch = [e for e in out if isinstance(e, GestureEvent) and e.kind == "pinch"]
+	assert [p.phase for p in pinch] == ["start", "move", "move", "end"]
+	assert abs(pinch[-2].extra["scale"] - 2.0) < 1e-9
+	# Nenhum tap ou arrasto sai de um gesto de dois dedos
+	assert not any(isinstance(e, GestureEvent) and e.kind in ("tap", "drag") for e in out)
+
+
+def test_debounce_rejoins_a_nearby_down():
+	rec = GestureRecognizer(up_debounce=0.005)
+	out = _run(rec, [
+		("down", 0.1, 0.1, 1.0, 1),
+		("move", 0.2, 0.1, 1.02, 1),
+		("up", 0.2, 0.1, 1.03, 1),
+	])
+	assert rec.next_deadline() == 1.03 + 0.005
+	# Segmentação falhou um frame: o motor reemite "down" com outro id
+	out += _run(rec, [("down", 0.21, 0.1, 1.033, 7), ("move", 0.3, 0.1, 1.04, 7), ("up", 0.3, 0.1, 1.05, 7)])
+	out += rec.poll(1.06)
+	names = _names(out)
+	assert names.count("touch:down") == 1 and names.count("touch:up") == 1
+	assert names.count("drag:start") == 1 and names[-1] == "drag:end"
+	assert all(getattr(e, "contact_id", 1) == 1 for e in out)
+
+
+def test_debounced_up_is_confirmed_after_the_interval():
+	rec = GestureRecognizer(up_debounce=0.005)
+	out = _run(rec, [("down", 0.5, 0.5, 1.0), ("up", 0.5, 0.5, 1.1)])
+	assert _names(out) == ["touch:down"]
+	out = rec.poll(1.105)
+	assert _names(out) == ["touch:up", "tap"]
+	# O up sai com o instante real da soltura
+	assert out[0].ts == 1.1
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from backend.inference_backends import InferenceBackend, OnnxBackend, create_backend
+
+
+class _OnlyLoad(InferenceBackend):
+	name = "parcial"
+
+	def load(self) -> bool:
+		return True
+
+
+def test_partial_backend_fails_on_construction():
+	with pytest.raises(TypeError):
+		_OnlyLoad("modelo.pt")
+
+
+def test_complete_backend_constructs():
+	class _Fake(_OnlyLoad):
+		def predict(self, frame: np.ndarray, min_confidence=None):
+			return []
+
+	be = _Fake("modelo.pt", min_confidence=0.3)
+	assert be.load() and be.predict(np.zeros((4, 4, 3), np.uint8)) == []
+	assert be.min_confidence == 0.3
+
+
+def test_create_backend_selects_by_name():
+	be = create_backend("onnx-int8", "modelo.pt")
+	assert isinstance(be, OnnxBackend) and be.int8 and be.name == "onnx-int8"
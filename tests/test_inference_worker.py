@@ -0,0 +1,90 @@
+import threading
+import time
+
+from backend import model_registry
+from backend.inference_worker import InferencePool
+from backend.object_detector import ObjectDetector
+
+
+class _FakeProc:
+	def __init__(self, alive: bool = True, exitcode=None) -> None:
+		self.alive = alive
+		self.exitcode = exitcode
+
+	def is_alive(self) -> bool:
+		return self.alive
+
+
+class _FakeQueue:
+	def put(self, item) -> None:
+		pass
+
+
+def _pool(*procs: _FakeProc) -> InferencePool:
+	"""Pool com processos falsos: o estado é conduzido pelos testes."""
+	pool = InferencePool("modelo.pt", workers=len(procs))
+	pool._procs = list(procs)
+	pool._worker_states = ["loading"] * len(procs)
+	pool._requests = _FakeQueue()
+	return pool
+
+
+def test_loading_pool_reports_loading():
+	pool = _pool(_FakeProc())
+	assert pool.infer("ring", 1) is None
+	assert pool.state == "loading" and pool.error is None
+
+
+def test_load_failure_marks_pool_failed_and_returns_immediately():
+	pool = _pool(_FakeProc())
+	pool._set_worker_state(0, "load_failed")
+	t0 = time.perf_counter()
+	assert pool.infer("ring", 1) is None
+	# Sem o sleep de "ainda carregando"
+	assert time.perf_counter() - t0 < 0.05
+	stats = pool.stats()
+	assert stats["state"] == "failed" and "modelo.pt" in stats["error"]
+	assert stats["worker_states"] == ["load_failed"]
+
+
+def test_dead_worker_while_loading_is_detected():
+	proc = _FakeProc()
+	pool = _pool(proc)
+	proc.alive, proc.exitcode = False, -9
+	assert pool.infer("ring", 1) is None
+	assert pool.state == "failed" and "-9" in pool.error
+
+
+def test_one_dead_worker_keeps_pool_ready():
+	a, b = _FakeProc(), _FakeProc()
+	pool = _pool(a, b)
+	pool._set_worker_state(0, "ready")
+	pool._set_worker_state(1, "ready")
+	b.alive = False
+	pool._check_workers()
+	assert pool.state == "ready" and pool.ready_workers == 1
+	assert pool.stats()["worker_states"] == ["ready", "dead"]
+
+
+def test_worker_death_releases_waiting_caller():
+	proc = _FakeProc()
+	pool = _pool(proc)
+	pool._set_worker_state(0, "ready")
+	result = []
+	caller = threading.Thread(target=lambda: result.append(pool.infer("ring", 1, timeout=5.0)))
+	caller.start()
+	while not pool._pending:
+		time.sleep(0.001)
+	proc.alive = False
+	pool._check_workers()
+	caller.join(timeout=1.0)
+	assert not caller.is_alive() and result == [None]
+	assert pool.state == "failed"
+
+
+def test_thread_detector_reports_load_failure(monkeypatch, capsys):
+	monkeypatch.setattr(model_registry, "acquire_backend", lambda *args: None)
+	det = ObjectDetector(lambda msg: None, frame_source=object(), model_name="nao_existe.pt")
+	det._run()
+	assert "nao_existe.pt" in det.get_stats()["error"]
+	assert "[Backend] ObjectDetector" in capsys.readouterr().out
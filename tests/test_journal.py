@@ -0,0 +1,96 @@
+import asyncio
+
+import numpy as np
+
+from backend import journal
+
+
+def _tap(i: int) -> dict:
+	return {"type": "tap", "x": 0.25, "y": 0.75, "id": i, "ts": 10.0 + i, "t_sent": 10.01 + i, "seq": i}
+
+
+def _detections(seq: int) -> dict:
+	return {
+		"type": "detections", "ts": 5.0, "t_sent": 5.02, "seq": seq,
+		"objects": [
+			{"label": "cup", "confidence": 0.9, "x1": 0.1, "y1": 0.2, "x2": 0.3, "y2": 0.4, "track_id": 7},
+			{"label": "pen", "confidence": 0.6, "x1": 0.5, "y1": 0.5, "x2": 0.6, "y2": 0.7},
+		],
+	}
+
+
+def _write(directory, messages, **kwargs) -> journal.JournalWriter:
+	async def run():
+		writer = journal.JournalWriter(directory, flush_interval=0.01, **kwargs)
+		writer.start()
+		for m in messages:
+			writer.append(m, t_emit=1.0)
+			# Um lote por mensagem: força as rotações
+			await asyncio.sleep(0.02)
+		await writer.stop()
+		return writer
+
+	return asyncio.run(run())
+
+
+def test_records_roundtrip_through_memmap(tmp_path):
+	writer = _write(tmp_path, [_tap(1), _detections(2)])
+	assert writer.stats()["records"] == 3 and writer.stats()["dropped"] == 0
+	segments = journal.list_segments(tmp_path)
+	assert len(segments) == 1
+	data = journal.open_segment(segments[0])
+	assert isinstance(data, np.memmap) and len(data) == 3
+	tap, cup, pen = data
+	assert journal.KINDS[tap["kind"]] == "tap" and tap["contact_id"] == 1
+	assert tap["x"] == np.float32(0.25) and np.isnan(tap["x2"])
+	assert cup["label"] == b"cup" and cup["contact_id"] == 7 and pen["contact_id"] == -1
+	summary = journal.summary(journal.load(tmp_path))
+	assert summary["tap"]["events"] == 1
+	assert summary["detections"] == {
+		"records": 2, "events": 1, "p50_ms": 20.0, "p90_ms": 20.0, "p99_ms": 20.0, "labels": {"cup": 1, "pen": 1},
+	}
+
+
+def test_empty_detections_write_a_marker_record(tmp_path):
+	empty = {"type": "detections", "ts": 6.0, "t_sent": 6.03, "seq": 3, "objects": []}
+	(marker,) = journal.message_records(empty, t_emit=1.0)
+	assert marker[6] == -1 and marker[-1] == b""
+	assert all(np.isnan(v) for v in marker[7:12])
+	_write(tmp_path, [_detections(2), empty])
+	data = journal.load(tmp_path)
+	assert len(data) == 3 and data[-1]["seq"] == 3 and np.isnan(data[-1]["x"])
+	summary = journal.summary(data)["detections"]
+	# O frame vazio conta como broadcast, mas não como label
+	assert summary["records"] == 3 and summary["events"] == 2
+	assert summary["p50_ms"] == 25.0 and summary["labels"] == {"cup": 1, "pen": 1}
+
+
+def test_rotation_keeps_only_recent_segments(tmp_path):
+	header = len(journal._header_bytes())
+	# Cabe um registro por segmento
+	_write(tmp_path, [_tap(i) for i in range(1, 6)], max_segment_bytes=header + journal.RECORD_DTYPE.itemsize, keep_segments=2)
+	segments = journal.list_segments(tmp_path)
+	assert len(segments) == 2
+	assert journal.load(tmp_path)["contact_id"].tolist() == [4, 5]
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+	_write(tmp_path, [_tap(1), _tap(2)])
+	segment = journal.list_segments(tmp_path)[0]
+	with open(segment, "ab") as f:
+		f.write(b"\x00" * (journal.RECORD_DTYPE.itemsize // 2))
+	assert len(journal.open_segment(segment)) == 2
+	assert journal.load(tmp_path, kinds=["detections"]).size == 0
+
+
+def test_append_drops_beyond_max_pending(tmp_path):
+	async def run():
+		writer = journal.JournalWriter(tmp_path, flush_interval=60.0, max_pending=2)
+		writer.start()
+		for i in range(3):
+			writer.append(_tap(i), t_emit=1.0)
+		await writer.stop()
+		return writer.stats()
+
+	stats = asyncio.run(run())
+	assert stats["dropped"] == 1 and stats["records"] == 2
@@ -0,0 +1,31 @@
+import time
+
+from backend import main
+from backend.latency import LatencyMonitor
+
+
+def _setup(monkeypatch) -> LatencyMonitor:
+	monitor = LatencyMonitor()
+	monkeypatch.setattr(main, "get_latency_monitor", lambda: monitor)
+	monkeypatch.setattr(main, "_echo_stats", {"accepted": 0, "rejected": 0, "last_rejected": None})
+	return monitor
+
+
+def test_known_kind_is_recorded(monkeypatch):
+	monitor = _setup(monkeypatch)
+	now = time.monotonic()
+	main._record_latency_echo({"type": "latency_echo", "kind": "tap", "ts": now - 0.05, "t_sent": now - 0.01, "handler_ms": 1.0})
+	assert set(monitor.stats()) == {"tap.client_rtt", "tap.glass_to_handler"}
+	assert main._echo_stats["accepted"] == 1
+
+
+def test_unknown_kinds_do_not_create_histograms(monkeypatch):
+	monitor = _setup(monkeypatch)
+	now = time.monotonic()
+	for i in range(100):
+		main._record_latency_echo({"kind": f"lixo{i}", "t_sent": now})
+	main._record_latency_echo({"kind": "tap", "t_sent": "agora"})
+	main._record_latency_echo({"kind": "tap", "t_sent": float("nan")})
+	main._record_latency_echo({"kind": "tap"})
+	assert monitor.stats() == {}
+	assert main._echo_stats["rejected"] == 103 and main._echo_stats["accepted"] == 0
@@ -0,0 +1,90 @@
+import asyncio
+import secrets
+
+import numpy as np
+import pytest
+
+from backend import main, mjpeg
+
+pytestmark = pytest.mark.skipif(mjpeg.cv2 is None, reason="OpenCV indisponível")
+
+
+class _FakeSource:
+	"""Só o que o JpegCache usa da FrameSource."""
+	def __init__(self) -> None:
+		self.token = secrets.token_hex(6)
+		self.latest_seq = 0
+		self._frame = None
+
+	def push(self, value: int) -> None:
+		self.latest_seq += 1
+		self._frame = np.full((48, 64, 3), value, dtype=np.uint8)
+
+	def get_latest(self, copy: bool = True):
+		return None if self._frame is None else (self.latest_seq, 0.0, self._frame)
+
+	def is_valid(self, seq: int) -> bool:
+		return seq == self.latest_seq
+
+
+def test_cache_encodes_once_per_frame_and_variant():
+	cache = mjpeg.JpegCache()
+	source = _FakeSource()
+	source.push(10)
+
+	async def run():
+		first = await cache.get(source, 80, 1.0)
+		second = await cache.get(source, 80, 1.0)
+		source.push(200)
+		third = await cache.get(source, 80, 1.0)
+		return first, second, third
+
+	first, second, third = asyncio.run(run())
+	assert first is second and first[0] == 1 and third[0] == 2
+	assert cache.stats()["encodes"] == 2 and cache.stats()["hits"] == 1
+
+
+def test_scale_variants_are_bounded():
+	cache = mjpeg.JpegCache(max_variants=4)
+	source = _FakeSource()
+	source.push(10)
+
+	async def run():
+		for i in range(200):
+			await cache.get(source, 80, 0.5 + i * 1e-4)
+		for scale in (0.1, 0.2, 0.3, 0.4, 0.6, 0.7):
+			await cache.get(source, 80, scale)
+
+	asyncio.run(run())
+	# 0.5 + ruído arredonda para poucas escalas; o LRU limita o resto
+	assert cache.stats()["variants"] == 4
+	assert len(cache._locks) <= 4
+
+
+def test_etag_changes_with_a_new_source_even_at_the_same_seq():
+	a, b = _FakeSource(), _FakeSource()
+	a.push(0)
+	b.push(0)
+	assert mjpeg.etag_for(a, 1, 80, 1.0) != mjpeg.etag_for(b, 1, 80, 1.0)
+	# Parâmetros equivalentes depois do arredondamento dão o mesmo ETag
+	assert mjpeg.etag_for(a, 1, 80, 1.0) == mjpeg.etag_for(a, 1, 81, 0.999)
+
+
+def test_frame_jpg_etag_and_304(monkeypatch):
+	from fastapi.testclient import TestClient
+
+	source = _FakeSource()
+	source.push(50)
+	monkeypatch.setattr(main, "_frame_source", source)
+	monkeypatch.setattr(main, "_jpeg_cache", mjpeg.JpegCache())
+	client = TestClient(main.app)
+	r = client.get("/frame.jpg")
+	assert r.status_code == 200 and r.headers["content-type"] == "image/jpeg"
+	etag = r.headers["etag"]
+	assert client.get("/frame.jpg", headers={"If-None-Match": etag}).status_code == 304
+	# Scanner reiniciado: fonte nova com o seq de novo em 1 não pode dar 304
+	restarted = _FakeSource()
+	restarted.push(200)
+	monkeypatch.setattr(main, "_frame_source", restarted)
+	r = client.get("/frame.jpg", headers={"If-None-Match": etag})
+	assert r.status_code == 200 and r.headers["etag"] != etag
@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+
+from backend import inference_backends, model_registry
+from backend.inference_backends import InferenceBackend
+from backend.model_registry import ModelRegistry, acquire_backend
+
+
+def _load(registry: ModelRegistry, key, closed: list):
+	return registry.get(key, lambda: "valor-%s" % key, closer=lambda v: closed.append(v))
+
+
+def test_hits_and_misses():
+	reg = ModelRegistry()
+	assert reg.get("a", lambda: 1) == 1
+	assert reg.get("a", lambda: 2) == 1
+	assert reg.stats()["hits"] == 1 and reg.stats()["misses"] == 1
+
+
+def test_loader_returning_none_is_not_cached():
+	reg = ModelRegistry()
+	assert reg.get("a", lambda: None) is None
+	assert reg.get("a", lambda: 3) == 3
+	assert reg.stats()["misses"] == 1
+
+
+def test_lru_evicts_oldest_unreferenced_entry():
+	reg = ModelRegistry(max_entries=2)
+	closed: list = []
+	for key in ("a", "b"):
+		_load(reg, key, closed)
+		reg.release(key)
+	# Uso recente de "a": "b" passa a ser o mais antigo
+	_load(reg, "a", closed)
+	reg.release("a")
+	_load(reg, "c", closed)
+	assert closed == ["valor-b"]
+	assert [e["key"] for e in reg.stats()["entries"]] == ["a", "c"]
+	assert reg.evictions == 1
+
+
+def test_lru_keeps_entries_in_use():
+	reg = ModelRegistry(max_entries=1)
+	closed: list = []
+	_load(reg, "a", closed)
+	_load(reg, "b", closed)
+	# "a" e "b" ainda têm referência: o limite é excedido até o release
+	assert closed == [] and len(reg.stats()["entries"]) == 2
+	reg.release("a")
+	_load(reg, "c", closed)
+	assert closed == ["valor-a"]
+
+
+def test_idle_ttl_evicts_only_released_entries(monkeypatch):
+	reg = ModelRegistry(idle_ttl=10.0)
+	closed: list = []
+	clock = [100.0]
+	monkeypatch.setattr(model_registry.time, "monotonic", lambda: clock[0])
+	_load(reg, "a", closed)
+	_load(reg, "b", closed)
+	reg.release("a")
+	clock[0] += 5.0
+	assert reg.evict_idle() == 0
+	clock[0] += 6.0
+	assert reg.evict_idle() == 1
+	assert closed == ["valor-a"]
+	assert [e["key"] for e in reg.stats()["entries"]] == ["b"]
+
+
+def test_close_stops_janitor_and_releases_entries():
+	reg = ModelRegistry(idle_ttl=0.0)
+	closed: list = []
+	_load(reg, "a", closed)
+	reg.start_janitor(interval=60.0)
+	janitor = reg._janitor
+	assert janitor is not None and janitor.is_alive()
+	reg.close()
+	assert not janitor.is_alive()
+	assert closed == ["valor-a"] and reg.stats()["entries"] == []
+
+
+def test_janitor_applies_idle_ttl():
+	reg = ModelRegistry(idle_ttl=0.0)
+	evicted = threading.Event()
+	reg.get("a", lambda: 1, closer=lambda v: evicted.set())
+	reg.release("a")
+	reg.start_janitor(interval=0.01)
+	try:
+		assert evicted.wait(2.0)
+	finally:
+		reg.close()
+
+
+class _ThresholdBackend(InferenceBackend):
+	name = "fake"
+
+	def load(self) -> bool:
+		return True
+
+	def predict(self, frame, min_confidence=None):
+		threshold = self._threshold(min_confidence)
+		return [c for c in (0.3, 0.6, 0.9) if c >= threshold]
+
+
+def test_shared_backend_threshold_is_per_call(monkeypatch):
+	monkeypatch.setattr(model_registry, "_registry", ModelRegistry())
+	monkeypatch.setattr(inference_backends, "create_backend", lambda name, model, conf: _ThresholdBackend(model, conf))
+	frame = np.zeros((4, 4, 3), np.uint8)
+	strict = acquire_backend("fake", "modelo.pt", min_confidence=0.8)
+	loose = acquire_backend("fake", "modelo.pt", min_confidence=0.2)
+	assert strict is loose
+	# O segundo acquire (e o preload com 0.5) não altera o backend compartilhado
+	assert strict.min_confidence == 0.8
+	assert strict.predict(frame, 0.8) == [0.9]
+	assert loose.predict(frame, 0.2) == [0.3, 0.6, 0.9]
@@ -0,0 +1,86 @@
+from typing import List
+
+import numpy as np
+
+from backend.motion_gate import MotionGate
+from backend.object_detector import DetectedObject, ObjectDetector
+
+
+def _frame(value: int) -> np.ndarray:
+	return np.full((72, 128, 3), value, dtype=np.uint8)
+
+
+def test_force_passes_and_becomes_reference():
+	gate = MotionGate(refresh_interval=60.0)
+	assert gate.should_infer(_frame(0), now=0.0)
+	assert not gate.should_infer(_frame(0), now=1.0)
+	assert gate.should_infer(_frame(0), now=2.0, force=True)
+	assert gate.stats()["inferences"] == 2 and gate.stats()["skipped"] == 1
+	# A referência continua sendo atualizada: movimento ainda é detectado
+	assert gate.should_infer(_frame(200), now=3.0)
+
+
+class _FakeSubscription:
+	def __init__(self, frames: List[np.ndarray], stop) -> None:
+		self._frames = list(frames)
+		self._stop = stop
+		self._seq = 0
+
+	def read(self, timeout: float = 0.5):
+		if not self._frames:
+			self._stop.set()
+			return None
+		self._seq += 1
+		return self._seq, float(self._seq), self._frames.pop(0)
+
+	def set_max_fps(self, fps: float) -> None:
+		pass
+
+	def close(self) -> None:
+		pass
+
+
+class _FakeSource:
+	def __init__(self, frames: List[np.ndarray], valid=lambda seq: True) -> None:
+		self._frames = frames
+		self._valid = valid
+		self.stop = None
+
+	def subscribe(self, name: str, max_fps=None):
+		return _FakeSubscription(self._frames, self.stop)
+
+	def is_valid(self, seq: int) -> bool:
+		return self._valid(seq)
+
+
+def _run(frames: List[np.ndarray], valid=lambda seq: True):
+	events = []
+	calls = []
+	source = _FakeSource(frames, valid)
+	gate = MotionGate(refresh_interval=60.0)
+	det = ObjectDetector(events.append, frame_source=source, motion_gate=gate)
+	source.stop = det._stop_event
+
+	def infer(seq, frame, roi):
+		calls.append(seq)
+		return [DetectedObject(label="cup", confidence=0.9, x1=0.1, y1=0.1, x2=0.2, y2=0.2)]
+
+	det._run_loop(infer)
+	return gate, calls, events
+
+
+def test_gate_sees_first_frame():
+	gate, calls, events = _run([_frame(0), _frame(0), _frame(0)])
+	# O primeiro frame vira referência: os seguintes, iguais, são pulados
+	assert calls == [1]
+	assert [e["reused"] for e in events] == [False, True, True]
+	assert gate.stats()["inferences"] == 1 and gate.stats()["skipped"] == 2
+
+
+def test_gate_forced_until_first_detections():
+	# Inferência do primeiro frame descartada (slot sobrescrito): o segundo,
+	# mesmo sem movimento, precisa inferir porque não há o que reaproveitar
+	gate, calls, events = _run([_frame(0), _frame(0), _frame(0)], valid=lambda seq: seq != 1)
+	assert calls == [1, 2]
+	assert [e["reused"] for e in events] == [False, True]
+	assert gate.stats()["inferences"] == 2 and gate.stats()["skipped"] == 1
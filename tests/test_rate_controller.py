@@ -0,0 +1,46 @@
+import pytest
+
+from backend.rate_controller import AdaptiveRateController
+
+
+def test_recovers_additively_while_there_is_headroom():
+	rc = AdaptiveRateController(min_fps=1.0, max_fps=15.0, initial_fps=5.0, increase_step=0.5)
+	fps = [rc.update(0.01) for _ in range(4)]
+	assert fps == pytest.approx([5.5, 6.0, 6.5, 7.0])
+	assert rc.increases == 4 and rc.decreases == 0
+
+
+def test_backs_off_multiplicatively_on_queue_overload():
+	rc = AdaptiveRateController(initial_fps=10.0, max_queue_depth=4, decrease_factor=0.7)
+	assert rc.update(0.01, queue_depth=5) == pytest.approx(7.0)
+	assert rc.update(0.01, queue_depth=5) == pytest.approx(4.9)
+	assert rc.decreases == 2
+
+
+def test_backs_off_to_capacity_when_inference_is_slow():
+	rc = AdaptiveRateController(initial_fps=10.0, headroom=0.8, decrease_factor=0.7)
+	# 200 ms por inferência: cabem 0.8 / 0.2 = 4 fps
+	assert rc.update(0.2) == pytest.approx(7.0)
+	assert rc.update(0.2) == pytest.approx(4.9)
+	assert rc.update(0.2) == pytest.approx(4.0)
+	# Na capacidade: não sobe além do que cabe
+	assert rc.update(0.2) == pytest.approx(4.0)
+
+
+def test_stays_within_bounds():
+	rc = AdaptiveRateController(min_fps=2.0, max_fps=8.0, initial_fps=50.0)
+	assert rc.fps == 8.0
+	for _ in range(50):
+		assert 2.0 <= rc.update(0.001) <= 8.0
+	assert rc.fps == 8.0
+	for _ in range(50):
+		assert 2.0 <= rc.update(5.0, queue_depth=100) <= 8.0
+	assert rc.fps == 2.0
+	assert rc.interval == pytest.approx(0.5)
+
+
+def test_latency_is_smoothed():
+	rc = AdaptiveRateController(initial_fps=5.0, smoothing=0.5)
+	rc.update(0.1)
+	rc.update(0.3)
+	assert rc.stats()["latency_ms"] == pytest.approx(200.0)
@@ -0,0 +1,27 @@
+import pytest
+
+from backend.recording import RECORDINGS_DIR, resolve_recording
+
+
+def test_names_resolve_inside_recordings_dir():
+	assert resolve_recording("sessao1") == RECORDINGS_DIR / "sessao1"
+	assert resolve_recording("mesa/tarde") == RECORDINGS_DIR / "mesa" / "tarde"
+
+
+@pytest.mark.parametrize("name", ["", "..", "../app.db", "a/../../etc", "/etc", "/tmp/x", "."])
+def test_paths_outside_recordings_dir_are_rejected(name):
+	with pytest.raises(ValueError):
+		resolve_recording(name)
+
+
+def test_scanner_start_rejects_traversal():
+	from fastapi.testclient import TestClient
+	from backend.main import app
+
+	with TestClient(app) as client:
+		for body in ({"replay": "../../etc"}, {"record": "/tmp/axon-frames"}):
+			r = client.post("/api/scanner/start", json=body)
+			assert r.status_code == 400
+			assert "error" in r.json()
+		r = client.post("/api/scanner/start", json={"replay": "nao-existe"})
+		assert r.status_code == 404
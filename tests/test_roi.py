@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from backend.calibration import LensModel, cv2, apply_homography_points, projector_roi
+from backend.object_detector import DetectedObject, roi_to_frame
+
+W, H_PX = 640, 480
+# Câmera -> projetor: o retângulo (100, 50)-(500, 350) da câmera vira [0, 1]²
+H = np.array([[1 / 400, 0, -100 / 400], [0, 1 / 300, -50 / 300], [0, 0, 1]], dtype=np.float64)
+
+
+def test_projector_roi_is_the_inverse_mapped_area_plus_margin():
+	assert projector_roi(H, W, H_PX, margin=0.0) == (100, 50, 500, 350)
+	assert projector_roi(H, W, H_PX, margin=0.02) == (92, 44, 508, 356)
+
+
+def test_projector_roi_is_clamped_and_rejects_degenerate():
+	big = np.array([[1 / 1000, 0, 0.1], [0, 1 / 1000, 0.1], [0, 0, 1]], dtype=np.float64)
+	assert projector_roi(big, W, H_PX) == (0, 0, W, H_PX)
+	tiny = np.diag([100.0, 100.0, 1.0])
+	assert projector_roi(tiny, W, H_PX) is None
+
+
+def test_roi_to_frame_applies_offset_and_scale():
+	roi = (100, 50, 500, 350)
+	crop = [DetectedObject(label="cup", confidence=0.8, x1=0.0, y1=0.0, x2=0.5, y2=1.0)]
+	(o,) = roi_to_frame(crop, roi, W, H_PX)
+	assert (o.label, o.confidence) == ("cup", 0.8)
+	assert o.x1 * W == pytest.approx(100) and o.y1 * H_PX == pytest.approx(50)
+	assert o.x2 * W == pytest.approx(300) and o.y2 * H_PX == pytest.approx(350)
+
+
+def test_box_in_crop_maps_back_to_its_projector_position():
+	roi = projector_roi(H, W, H_PX, margin=0.0)
+	# Caixa no meio do recorte: no frame inteiro, o centro cai no centro do projetor
+	(o,) = roi_to_frame([DetectedObject("pen", 0.9, 0.4, 0.4, 0.6, 0.6)], roi, W, H_PX)
+	center = np.array([[(o.x1 + o.x2) * 0.5 * W, (o.y1 + o.y2) * 0.5 * H_PX]])
+	assert apply_homography_points(H, center)[0] == pytest.approx([0.5, 0.5])
+
+
+LENS = LensModel(np.array([[500.0, 0, 320], [0, 500.0, 240], [0, 0, 1]]), np.array([-0.25, 0.05, 0, 0, 0]), (W, H_PX))
+
+
+needs_cv2 = pytest.mark.skipif(cv2 is None, reason="OpenCV indisponível")
+
+
+@needs_cv2
+def test_lens_distort_is_inverse_of_undistort():
+	pts = np.array([[100.0, 50.0], [320.0, 240.0], [600.0, 400.0]])
+	back = LENS.distort_points(LENS.undistort_points(pts, W, H_PX), W, H_PX)
+	assert back == pytest.approx(pts, abs=0.05)
+	# K escalada para outra resolução
+	half = LENS.undistort_points(pts / 2, W // 2, H_PX // 2)
+	assert half * 2 == pytest.approx(LENS.undistort_points(pts, W, H_PX), abs=0.05)
+
+
+@needs_cv2
+def test_projector_roi_with_lens_covers_the_distorted_border():
+	roi = projector_roi(H, W, H_PX, margin=0.0, lens=LENS)
+	assert roi is not None and roi != projector_roi(H, W, H_PX, margin=0.0)
+	t = np.linspace(0.0, 1.0, 33)
+	border = np.concatenate([np.stack([t, np.zeros_like(t)], 1), np.stack([t, np.ones_like(t)], 1),
+		np.stack([np.zeros_like(t), t], 1), np.stack([np.ones_like(t), t], 1)])
+	cam = LENS.distort_points(apply_homography_points(np.linalg.inv(H), border), W, H_PX)
+	x1, y1, x2, y2 = roi
+	# A borda curvada (amostrada mais fino que no projector_roi) fica dentro do recorte, com folga de 1 px
+	assert cam[:, 0].min() >= x1 - 1 and cam[:, 0].max() <= x2 + 1
+	assert cam[:, 1].min() >= y1 - 1 and cam[:, 1].max() <= y2 + 1
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from backend.touch_detector import TouchDetector
+from backend.touch_engine import TouchEngine, cv2
+
+pytestmark = pytest.mark.skipif(cv2 is None, reason="OpenCV indisponível")
+
+
+def _frame(w: int, h: int, finger_x=None, tip_y: float = 0.4, width: float = 0.03) -> np.ndarray:
+	"""Fundo liso; com `finger_x` (fração da largura), uma barra clara entra pela borda de baixo até `tip_y`."""
+	frame = np.full((h, w, 3), 60, dtype=np.uint8)
+	if finger_x is not None:
+		x0 = int(finger_x * w)
+		frame[int(tip_y * h):, x0:x0 + int(width * w)] = 220
+	return frame
+
+
+def _run(engine: TouchEngine, frames) -> list:
+	out = []
+	for i, f in enumerate(frames):
+		out += [(p, c) for p, _, _, c in engine.process(f, ts=i / 60.0)]
+	return out
+
+
+def _phases(events) -> list:
+	return [p for p, _ in events]
+
+
+def test_blob_appears_holds_moves_and_leaves():
+	w, h = 640, 360
+	engine = TouchEngine(segmentation="motion")
+	frames = [_frame(w, h)]                                     # aprende o fundo
+	frames += [_frame(w, h, 0.5)] * 6                           # aparece e fica parado
+	frames += [_frame(w, h, 0.5 + 0.01 * k) for k in range(1, 4)]  # arrasta devagar
+	frames += [_frame(w, h)] * 3                                # sai
+	events = _run(engine, frames)
+	assert _phases(events) == ["down", "move", "move", "move", "up"]
+	assert len({c for _, c in events}) == 1
+
+
+def test_tip_coordinates_are_normalized_to_the_camera_without_homography():
+	w, h = 640, 360
+	engine = TouchEngine(segmentation="motion")
+	engine.process(_frame(w, h), ts=0.0)
+	down = []
+	for i in range(1, 8):
+		down += [e for e in engine.process(_frame(w, h, 0.5, tip_y=0.4), ts=i / 60.0) if e[0] == "down"]
+	(_, x, y, _), = down
+	# Ponta = ponto do contorno mais longe da borda de entrada (topo da barra)
+	assert x == pytest.approx(0.5, abs=0.03) and y == pytest.approx(0.4, abs=0.02)
+
+
+def test_jitter_at_1080p_still_gives_a_down():
+	# 2 px de jitter na resolução de processamento = 6 px em 1080p, acima dos 3 px absolutos de antes
+	w, h = 1920, 1080
+	engine = TouchEngine(segmentation="motion")
+	jitter = [0.5, 0.5 + 6 / w] * 4
+	events = _run(engine, [_frame(w, h)] + [_frame(w, h, x) for x in jitter])
+	# Parado a partir do 4º frame: "down"; o jitter depois disso sai como "move"
+	assert _phases(events) == ["down", "move", "move", "move"]
+
+
+def test_fast_drag_is_not_split_into_fragments():
+	w, h = 1280, 720
+	engine = TouchEngine(segmentation="motion")
+	frames = [_frame(w, h)] + [_frame(w, h, 0.3)] * 6
+	# 30 px por frame em 720p: acima do antigo limite de 20 px que forçava "up"
+	frames += [_frame(w, h, 0.3 + 30 * k / w) for k in range(1, 8)]
+	frames += [_frame(w, h)] * 3
+	phases = _phases(_run(engine, frames))
+	assert phases[0] == "down" and phases[-1] == "up"
+	assert phases.count("down") == 1 and phases.count("up") == 1
+	assert phases.count("move") == 7
+
+
+def test_detector_with_injected_source_does_not_open_its_own():
+	source = object()
+	detector = TouchDetector(on_touch=lambda ev: None, frame_source=source)
+	assert detector._frame_source is source and not detector._owns_source
+	assert TouchDetector(on_touch=lambda ev: None, test_mode=True)._frame_source is None
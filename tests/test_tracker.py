@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from backend.object_detector import DetectedObject
+from backend.tracker import MultiObjectTracker, iou_matrix
+
+
+def _box(x: float, y: float = 0.4, size: float = 0.1, label: str = "cup") -> DetectedObject:
+	return DetectedObject(label=label, confidence=0.9, x1=x, y1=y, x2=x + size, y2=y + size)
+
+
+def test_iou_matrix_hand_computed():
+	a = np.array([[0, 0, 2, 2], [0, 0, 1, 1]], dtype=np.float64)
+	b = np.array([[1, 1, 3, 3], [0, 0, 2, 2], [5, 5, 6, 6]], dtype=np.float64)
+	expected = np.array([
+		[1 / 7, 1.0, 0.0],   # 1 / (4 + 4 - 1); igual; disjunto
+		[0.0, 1 / 4, 0.0],   # só encosta no canto; contida (1 / 4)
+	])
+	assert iou_matrix(a, b) == pytest.approx(expected)
+
+
+def test_iou_matrix_empty_and_degenerate():
+	some = np.array([[0, 0, 1, 1]], dtype=np.float64)
+	assert iou_matrix(np.zeros((0, 4)), some).shape == (0, 1)
+	assert iou_matrix(some, np.zeros((0, 4))).shape == (1, 0)
+	assert iou_matrix(np.zeros((0, 4)), np.zeros((0, 4))).shape == (0, 0)
+	# Caixas de área zero não dividem por zero
+	assert iou_matrix(np.zeros((1, 4)), np.zeros((1, 4)))[0, 0] == 0.0
+
+
+def test_ids_stay_stable_over_a_moving_box():
+	tracker = MultiObjectTracker()
+	ids = set()
+	for k in range(20):
+		out = tracker.update([_box(0.1 + 0.02 * k), _box(0.7, y=0.1, label="pen")], t=k * 0.1)
+		assert len(out) == 2
+		ids.add(tuple(sorted((o["label"], o["track_id"]) for o in out)))
+	assert ids == {(("cup", 1), ("pen", 2))}
+
+
+def test_other_class_never_takes_an_id():
+	tracker = MultiObjectTracker()
+	tracker.update([_box(0.2)], t=0.0)
+	out = tracker.update([_box(0.2, label="pen")], t=0.1)
+	assert sorted((o["label"], o["track_id"]) for o in out) == [("cup", 1), ("pen", 2)]
+
+
+def test_prediction_carries_the_box_through_missed_detections():
+	tracker = MultiObjectTracker(max_age=1.0)
+	# Anda 0.1 por segundo em x
+	for k in range(10):
+		tracker.update([_box(0.1 + 0.01 * k)], t=k * 0.1)
+	out = tracker.update([], t=1.4)
+	assert len(out) == 1 and out[0]["track_id"] == 1
+	assert out[0]["x1"] == pytest.approx(0.1 + 0.14, abs=0.01)
+	# Entre keyframes, predict extrapola sem mudar o estado
+	assert tracker.predict(1.5)[0]["x1"] == pytest.approx(0.25, abs=0.01)
+	# Detecção reaparece onde foi prevista: mesmo id
+	assert tracker.update([_box(0.25)], t=1.5)[0]["track_id"] == 1
+
+
+def test_track_dies_after_max_age():
+	tracker = MultiObjectTracker(max_age=0.5)
+	tracker.update([_box(0.3)], t=0.0)
+	assert len(tracker.update([], t=0.5)) == 1
+	assert tracker.predict(0.6) == []
+	assert tracker.update([], t=0.6) == [] and len(tracker) == 0
+	# Um objeto novo no mesmo lugar recebe outro id
+	assert tracker.update([_box(0.3)], t=0.7)[0]["track_id"] == 2
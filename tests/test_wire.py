@@ -0,0 +1,48 @@
+import json
+
+from backend import wire
+
+
+def _detections(mapped: bool) -> dict:
+	msg = {
+		"type": "detections", "source": "yolo", "seq": 3,
+		"objects": [
+			{"label": "cup", "confidence": 0.5, "x1": 0.125, "y1": 0.25, "x2": 0.5, "y2": 0.75, "track_id": 4},
+			{"label": "pen", "confidence": 0.75, "x1": 0.0, "y1": 0.0, "x2": 1.0, "y2": 1.0},
+		],
+	}
+	if mapped:
+		msg["objects_mapped"] = [
+			{"label": o["label"], "confidence": o["confidence"], "cx": 0.5, "cy": 0.25, "quad": [[0, 0], [1, 0], [1, 1], [0, 1]]}
+			for o in msg["objects"]
+		]
+	return msg
+
+
+def test_packed_roundtrip():
+	for mapped in (False, True):
+		msg = _detections(mapped)
+		data = wire.encode(msg, "packed")
+		assert isinstance(data, bytes) and data[:4] == wire.PACKED_MAGIC
+		out = wire.unpack_detections(data)
+		assert out["objects"] == msg["objects"]
+		assert out["seq"] == 3 and out["source"] == "yolo"
+		if mapped:
+			assert out["objects_mapped"][0]["track_id"] == 4
+			assert out["objects_mapped"][1]["quad"] == [[0, 0], [1, 0], [1, 1], [0, 1]]
+		else:
+			assert "objects_mapped" not in out
+
+
+def test_packed_leaves_other_messages_as_json():
+	item = wire.EncodedMessage({"type": "tap", "x": 0.5, "y": 0.5})
+	payload = item.payload("packed")
+	assert json.loads(payload)["type"] == "tap"
+	# Mesmo texto compartilhado com os clientes JSON
+	assert item.payload("json") is payload
+
+
+def test_unknown_or_unavailable_encoding_falls_back_to_json():
+	assert wire.available_encoding("xml") == "json"
+	assert wire.available_encoding("packed") == "packed"
+	assert wire.available_encoding("msgpack") == ("json" if wire.msgpack is None else "msgpack")